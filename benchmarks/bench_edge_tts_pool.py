@@ -0,0 +1,165 @@
+"""
+Edge-TTS 连接池性能对比
+旧实现（每段新建 edge_tts.Communicate，每次一次 websocket 握手）与 EdgeTTSPool（复用已握手的连接）对比，
+在本地模拟的 Edge-TTS websocket 服务上合成一批短句解说
+
+模拟服务按 Edge-TTS 协议应答（turn.start / 二进制音频帧 / turn.end），
+用 --handshake-ms 模拟 TCP+TLS+websocket 握手的往返耗时，--synth-ms 模拟服务端合成耗时
+
+用法:
+    python benchmarks/bench_edge_tts_pool.py                          # 100 段短句，并发 3
+    python benchmarks/bench_edge_tts_pool.py --segments 200 --handshake-ms 300
+"""
+
+import argparse
+import asyncio
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+from aiohttp import WSMsgType, web
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+import edge_tts.communicate  # noqa: E402
+from utils.edge_tts_pool import EdgeTTSPool  # noqa: E402
+
+WORDS = ["镜头", "慢慢", "推进", "主角", "回到", "家乡", "雨", "停了", "老屋", "门前", "故事", "开始"]
+
+# 模拟音频：每个字 600 字节（约 48kbps MP3 的 0.1 秒）
+BYTES_PER_CHAR = 600
+
+# 每个音频二进制消息的最大字节数
+AUDIO_FRAME_BYTES = 4096
+
+
+def make_segments(count: int):
+    """生成 6-16 字的短句解说"""
+    rng = random.Random(0)
+    return ["".join(rng.choice(WORDS) for _ in range(rng.randint(3, 8))) + "。" for _ in range(count)]
+
+
+class EdgeStandIn:
+    """本地模拟的 Edge-TTS websocket 服务"""
+
+    def __init__(self, handshake: float, synth: float):
+        self.handshake = handshake
+        self.synth = synth
+        self.connections = 0
+
+    async def handle(self, request):
+        # 握手往返耗时在升级连接之前
+        await asyncio.sleep(self.handshake)
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.connections += 1
+
+        async for message in websocket:
+            if message.type != WSMsgType.TEXT or "Path:ssml" not in message.data:
+                continue
+            request_id = message.data.split("X-RequestId:", 1)[1].split("\r\n", 1)[0]
+            text = re.search(r"<prosody[^>]*>(.*?)</prosody>", message.data, re.S).group(1)
+            await asyncio.sleep(self.synth)
+
+            await websocket.send_str(
+                f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+                "Path:turn.start\r\n\r\n{}"
+            )
+            header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio\r\n".encode()
+            audio = bytes(BYTES_PER_CHAR * len(text))
+            for start in range(0, len(audio), AUDIO_FRAME_BYTES):
+                await websocket.send_bytes(len(header).to_bytes(2, "big") + header + audio[start:start + AUDIO_FRAME_BYTES])
+            await websocket.send_str(
+                f"X-RequestId:{request_id}\r\nContent-Type:application/json; charset=utf-8\r\n"
+                "Path:turn.end\r\n\r\n{}"
+            )
+        return websocket
+
+
+async def synthesize_all(segments, concurrency: int, synthesize):
+    """按给定并发合成全部段落，返回 (总字节数, 各段耗时)"""
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(text):
+        async with semaphore:
+            start = time.perf_counter()
+            audio = await synthesize(text)
+            latencies.append(time.perf_counter() - start)
+            return len(audio)
+
+    sizes = await asyncio.gather(*(one(text) for text in segments))
+    return sum(sizes), latencies
+
+
+async def legacy(segments, concurrency: int):
+    """旧实现：每段新建 Communicate"""
+    async def synthesize(text):
+        communicate = edge_tts.Communicate(text, "zh-CN-XiaoxiaoNeural")
+        return b"".join([chunk["data"] async for chunk in communicate.stream() if chunk["type"] == "audio"])
+
+    return await synthesize_all(segments, concurrency, synthesize)
+
+
+async def pooled(segments, concurrency: int, url: str):
+    """EdgeTTSPool：连接数与并发数相同"""
+    async with EdgeTTSPool(size=concurrency, url=url) as pool:
+        return await synthesize_all(segments, concurrency, lambda text: pool.synthesize(text, "zh-CN-XiaoxiaoNeural"))
+
+
+async def run(name: str, server: EdgeStandIn, func, *args):
+    server.connections = 0
+    start = time.perf_counter()
+    total_bytes, latencies = await func(*args)
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    print(
+        f"{name:<30} {elapsed * 1000:8.0f}毫秒  "
+        f"单段 p50 {latencies[len(latencies) // 2] * 1000:6.0f}毫秒  "
+        f"p95 {latencies[int(len(latencies) * 0.95)] * 1000:6.0f}毫秒  "
+        f"握手{server.connections:>4}次  音频{total_bytes / 1024:8.0f}KB"
+    )
+    return elapsed
+
+
+async def main_async(args):
+    server = EdgeStandIn(args.handshake_ms / 1000, args.synth_ms / 1000)
+    app = web.Application()
+    app.router.add_get("/edge/v1", server.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    port = runner.addresses[0][1]
+    url = f"ws://127.0.0.1:{port}/edge/v1?TrustedClientToken=bench"
+    # 旧实现连接模块内的服务地址，指向本地模拟服务
+    edge_tts.communicate.WSS_URL = url
+
+    segments = make_segments(args.segments)
+    print(
+        f"{len(segments)}段短句，并发{args.concurrency}，"
+        f"模拟握手{args.handshake_ms}毫秒、合成{args.synth_ms}毫秒\n"
+    )
+    try:
+        old = min([await run("旧实现 (每段新建 Communicate)", server, legacy, segments, args.concurrency)
+                   for _ in range(args.repeat)])
+        new = min([await run("EdgeTTSPool", server, pooled, segments, args.concurrency, url)
+                   for _ in range(args.repeat)])
+        print(f"加速比: {old / new:.1f}x")
+    finally:
+        await runner.cleanup()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Edge-TTS 连接池性能对比")
+    parser.add_argument("--segments", type=int, default=100, help="短句段落数")
+    parser.add_argument("--concurrency", type=int, default=3, help="并发合成数（与 MAX_CONCURRENT_TTS_REQUESTS 默认值一致）")
+    parser.add_argument("--handshake-ms", type=int, default=150, help="模拟握手耗时(毫秒)")
+    parser.add_argument("--synth-ms", type=int, default=100, help="模拟服务端合成耗时(毫秒)")
+    parser.add_argument("--repeat", type=int, default=1, help="重复次数（取最快一次）")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
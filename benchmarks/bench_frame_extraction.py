@@ -0,0 +1,161 @@
+"""
+帧提取性能对比
+旧实现（逐帧 read / 逐个随机定位）与 FrameExtractor（grab 跳帧 + 排序单次遍历）对比
+
+用法:
+    python benchmarks/bench_frame_extraction.py                 # 自动生成 1080p 测试视频
+    python benchmarks/bench_frame_extraction.py --video my.mp4  # 使用已有视频
+"""
+
+import argparse
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from utils.frame_extractor import FrameExtractor  # noqa: E402
+
+
+def make_test_video(path: str, duration: float, gop: int, fps: int = 30, size=(1920, 1080)):
+    """
+    生成带运动内容的测试视频
+
+    有 ffmpeg 时用 H.264 编码并指定关键帧间隔（接近真实视频）；
+    否则退回 OpenCV mp4v 编码（关键帧间隔固定为12，随机定位代价偏低）
+    """
+    rng = np.random.default_rng(0)
+    background = rng.integers(0, 255, (size[1] // 8, size[0] // 8, 3), dtype=np.uint8)
+    background = cv2.resize(background, size, interpolation=cv2.INTER_LINEAR)
+
+    def frames():
+        for i in range(int(duration * fps)):
+            frame = np.roll(background, i * 4, axis=1)
+            cv2.circle(frame, ((i * 15) % size[0], size[1] // 2), 120, (255, 255, 255), -1)
+            yield frame
+
+    if shutil.which("ffmpeg"):
+        cmd = [
+            "ffmpeg", "-y", "-loglevel", "error",
+            "-f", "rawvideo", "-pix_fmt", "bgr24", "-s", f"{size[0]}x{size[1]}", "-r", str(fps),
+            "-i", "-",
+            "-c:v", "libx264", "-preset", "ultrafast", "-g", str(gop), "-pix_fmt", "yuv420p",
+            path
+        ]
+        process = subprocess.Popen(cmd, stdin=subprocess.PIPE)
+        for frame in frames():
+            process.stdin.write(frame.tobytes())
+        process.stdin.close()
+        process.wait()
+        return gop
+
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for frame in frames():
+        writer.write(frame)
+    writer.release()
+    return 12
+
+
+def legacy_interval(video_path: str, interval: float, max_frames: int) -> int:
+    """旧实现：逐帧 read，每隔 N 帧保留一帧"""
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    frame_interval = int(fps * interval)
+    frame_count = 0
+    kept = 0
+    while cap.isOpened() and kept < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame_count % frame_interval == 0:
+            kept += 1
+        frame_count += 1
+    cap.release()
+    return kept
+
+
+def legacy_timestamps(video_path: str, timestamps) -> int:
+    """旧实现：每个时间点随机定位一次"""
+    cap = cv2.VideoCapture(video_path)
+    kept = 0
+    for timestamp in timestamps:
+        cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
+        ret, frame = cap.read()
+        if ret:
+            kept += 1
+    cap.release()
+    return kept
+
+
+def engine_timestamps(video_path: str, timestamps, keyframe_indices=None) -> int:
+    """FrameExtractor：排序后单次遍历"""
+    with FrameExtractor(video_path, keyframe_indices=keyframe_indices) as extractor:
+        frames = extractor.read_at_timestamps(timestamps)
+    return sum(1 for _, frame in frames if frame is not None)
+
+
+def run(name: str, func, *args):
+    start = time.perf_counter()
+    count = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} {count:>4}帧  {elapsed:7.2f}秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="帧提取性能对比")
+    parser.add_argument("--video", help="测试视频路径，不指定则生成 1080p 测试视频")
+    parser.add_argument("--duration", type=float, default=60, help="生成视频时长（秒）")
+    parser.add_argument("--interval", type=float, default=3, help="固定间隔抽帧间隔（秒）")
+    parser.add_argument("--max-frames", type=int, default=50, help="最大帧数")
+    parser.add_argument("--segments", type=int, default=30, help="随机时间点数量（模拟解说片段）")
+    parser.add_argument("--gop", type=int, default=250, help="生成视频的关键帧间隔（帧）")
+    args = parser.parse_args()
+
+    video_path = args.video
+    gop = None
+    if not video_path:
+        video_path = str(Path(tempfile.gettempdir()) / "bench_frames_1080p.mp4")
+        print(f"生成测试视频: {video_path} ({args.duration:.0f}秒, 1920x1080)")
+        gop = make_test_video(video_path, args.duration, args.gop)
+        print(f"关键帧间隔: {gop}帧")
+
+    cap = cv2.VideoCapture(video_path)
+    fps = cap.get(cv2.CAP_PROP_FPS)
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    duration = total_frames / fps
+    cap.release()
+
+    # 生成的测试视频关键帧位置已知
+    keyframe_indices = list(range(0, total_frames, gop)) if gop else None
+
+    interval_timestamps = list(np.arange(0, duration, args.interval)[:args.max_frames])
+    random.seed(0)
+    segment_timestamps = [random.uniform(0, duration) for _ in range(args.segments)]
+
+    print("\n固定间隔抽帧")
+    old = run("旧实现 (逐帧read)", legacy_interval, video_path, args.interval, args.max_frames)
+    new = run("FrameExtractor", engine_timestamps, video_path, interval_timestamps)
+    print(f"加速比: {old / new:.1f}x")
+
+    print("\n按解说片段时间点抽帧")
+    old = run("旧实现 (逐个随机定位)", legacy_timestamps, video_path, segment_timestamps)
+    new = run("FrameExtractor", engine_timestamps, video_path, segment_timestamps)
+    print(f"加速比: {old / new:.1f}x")
+    if keyframe_indices:
+        new = run(
+            "FrameExtractor (关键帧索引)",
+            engine_timestamps, video_path, segment_timestamps, keyframe_indices
+        )
+        print(f"加速比: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
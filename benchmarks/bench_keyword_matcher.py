@@ -0,0 +1,138 @@
+"""
+关键词匹配性能对比
+旧实现（逐个关键词 `in` 查找）与 KeywordMatcher（Aho–Corasick 自动机单次扫描）对比，
+对字幕逐行计算重要性关键词、主题和情感命中
+
+用法:
+    python benchmarks/bench_keyword_matcher.py                  # 自动生成 10000 行 SRT 字幕
+    python benchmarks/bench_keyword_matcher.py --file my.srt    # 使用已有字幕文件
+"""
+
+import argparse
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+from agents.cloud_video_analysis_agent import IMPORTANCE_KEYWORDS  # noqa: E402
+from agents.subtitle_agent import EMOTION_KEYWORDS, THEME_KEYWORDS  # noqa: E402
+from utils.keyword_matcher import KeywordMatcher  # noqa: E402
+
+DICTIONARIES = (IMPORTANCE_KEYWORDS, THEME_KEYWORDS, EMOTION_KEYWORDS)
+
+FILLER = "我们今天在这里一起聊聊最近发生的事情然后再去外面走走看看天气怎么样吧"
+
+
+def make_subtitle_file(path: str, lines: int):
+    """生成混有关键词的 SRT 字幕"""
+    rng = random.Random(0)
+    keywords = [
+        word
+        for dictionary in DICTIONARIES
+        for words in dictionary.values()
+        for word in words
+    ]
+    with open(path, "w", encoding="utf-8") as f:
+        for i in range(lines):
+            parts = [FILLER[rng.randrange(len(FILLER) - 6):][:rng.randint(2, 6)] for _ in range(rng.randint(2, 6))]
+            for _ in range(rng.randint(0, 3)):
+                parts.insert(rng.randrange(len(parts) + 1), rng.choice(keywords))
+            start = i * 3
+            f.write(f"{i + 1}\n00:{start // 60 % 60:02d}:{start % 60:02d},000 --> 00:{(start + 2) // 60 % 60:02d}:{(start + 2) % 60:02d},000\n")
+            f.write("".join(parts) + "\n\n")
+
+
+def read_subtitle_lines(path: str):
+    """读取 SRT 字幕中的文本行"""
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.isdigit() and "-->" not in line:
+                lines.append(line)
+    return lines
+
+
+def legacy(dictionaries, lines):
+    """旧实现：每行对每个词典逐个关键词查找"""
+    hits = 0
+    for text in lines:
+        for dictionary in dictionaries:
+            for words in dictionary.values():
+                for keyword in words:
+                    if keyword in text:
+                        hits += 1
+    return hits
+
+
+def extend_dictionary(dictionary, extra: int, rng: random.Random):
+    """向词典的每个分类追加随机生成的关键词，模拟更大的词典"""
+    extended = {}
+    for category, words in dictionary.items():
+        words = list(words)
+        for _ in range(extra // len(dictionary)):
+            # 随机常用区汉字组成的 3-5 字词
+            words.append("".join(chr(rng.randrange(0x4E00, 0x9FA5)) for _ in range(rng.randint(3, 5))))
+        extended[category] = words
+    return extended
+
+
+def engine(matchers, lines):
+    """KeywordMatcher：每个词典一个自动机，批量扫描"""
+    hits = 0
+    for matcher in matchers:
+        for counts in matcher.count_batch(lines):
+            hits += sum(counts.values())
+    return hits
+
+
+def run(name: str, func, *args):
+    start = time.perf_counter()
+    hits = func(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{name:<32} 命中{hits:>6}次  {elapsed * 1000:8.1f}毫秒")
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="关键词匹配性能对比")
+    parser.add_argument("--file", help="字幕文件路径，不指定则生成 SRT 字幕")
+    parser.add_argument("--lines", type=int, default=10000, help="生成字幕的行数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复次数（取最快一次）")
+    parser.add_argument("--extra-keywords", type=int, default=1000, help="扩大词典测试中每个词典追加的关键词数，0 表示跳过")
+    args = parser.parse_args()
+
+    subtitle_path = args.file
+    if not subtitle_path:
+        subtitle_path = str(Path(tempfile.gettempdir()) / f"bench_subtitles_{args.lines}.srt")
+        print(f"生成测试字幕: {subtitle_path} ({args.lines}行)")
+        make_subtitle_file(subtitle_path, args.lines)
+
+    lines = read_subtitle_lines(subtitle_path)
+    keyword_total = sum(len(words) for dictionary in DICTIONARIES for words in dictionary.values())
+    print(f"字幕 {len(lines)} 行，关键词 {keyword_total} 个\n")
+
+    start = time.perf_counter()
+    matchers = [KeywordMatcher(d) for d in DICTIONARIES]
+    print(f"构建自动机: {(time.perf_counter() - start) * 1000:.1f}毫秒")
+
+    old = min(run("旧实现 (逐个关键词 in)", legacy, DICTIONARIES, lines) for _ in range(args.repeat))
+    new = min(run("KeywordMatcher", engine, matchers, lines) for _ in range(args.repeat))
+    print(f"加速比: {old / new:.1f}x")
+
+    if args.extra_keywords:
+        # 词典扩大后逐个查找的耗时随关键词数线性增长，自动机扫描耗时基本不变
+        rng = random.Random(1)
+        dictionaries = [extend_dictionary(d, args.extra_keywords, rng) for d in DICTIONARIES]
+        print(f"\n每个词典追加约 {args.extra_keywords} 个关键词")
+        matchers = [KeywordMatcher(d) for d in dictionaries]
+        old = min(run("旧实现 (逐个关键词 in)", legacy, dictionaries, lines) for _ in range(args.repeat))
+        new = min(run("KeywordMatcher", engine, matchers, lines) for _ in range(args.repeat))
+        print(f"加速比: {old / new:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
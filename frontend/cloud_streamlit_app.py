@@ -10,6 +10,7 @@ import sys
 import json
 import time
 from typing import Dict, Any, Optional, List
+from urllib.parse import urlencode
 import logging
 
 # 添加项目根目录到路径
@@ -39,6 +40,9 @@ st.set_page_config(
 # API基础URL
 API_BASE_URL = os.getenv("API_BASE_URL", "http://127.0.0.1:8000")
 
+# 浏览器访问API的地址（试听音频由浏览器直接从API流式加载）
+API_PUBLIC_URL = os.getenv("API_PUBLIC_URL", API_BASE_URL)
+
 # 自定义CSS
 st.markdown("""
 <style>
@@ -88,6 +92,19 @@ def check_api_health() -> bool:
         return False
 
 
+def render_voice_preview(voice_style: str, speed: float, pitch: float, volume: float, key: str):
+    """试听语音：浏览器直接加载流式合成接口，边下载边播放"""
+    if st.button("🔊 试听", key=key):
+        params = urlencode({
+            "text": "这是一段测试语音，用来试听不同的声音效果。",
+            "voice_style": voice_style,
+            "speed": speed,
+            "pitch": pitch,
+            "volume": volume
+        })
+        st.audio(f"{API_PUBLIC_URL}/tts/stream?{params}")
+
+
 def get_system_info() -> Optional[Dict]:
     """获取系统信息"""
     try:
@@ -332,6 +349,7 @@ def render_video_subtitle_workflow():
             speech_speed = st.slider("语速", 0.5, 2.0, 1.0, 0.1)
             speech_pitch = st.slider("音调", 0.5, 2.0, 1.0, 0.1)
             speech_volume = st.slider("音量", 0.5, 2.0, 1.0, 0.1)
+            render_voice_preview(selected_voice, speech_speed, speech_pitch, speech_volume, "workflow_voice_preview")
         
         # 成本估算
         st.subheader("💰 成本估算")
@@ -1155,6 +1173,7 @@ def render_video_editing_step():
     with col2:
         speech_pitch = st.slider("音调", 0.5, 2.0, 1.0, 0.1)
         speech_volume = st.slider("音量", 0.5, 2.0, 1.0, 0.1)
+        render_voice_preview(selected_voice, speech_speed, speech_pitch, speech_volume, "editing_voice_preview")
     
     edit_style = st.selectbox(
         "剪辑风格",
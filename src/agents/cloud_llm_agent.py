@@ -1,9 +1,17 @@
 import asyncio
 import json
 from typing import List, Dict, Any
-import requests
 from openai import AsyncOpenAI
 
+try:
+    from ..utils.http_client import http_post
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.http_client import http_post
+
 class CloudLLMAgent:
     def __init__(self, config):
         self.config = config
@@ -92,14 +100,14 @@ class CloudLLMAgent:
             }
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(
-                self.providers['qwen']['endpoint'],
-                headers=headers,
-                json=data
-            ) as response:
-                result = await response.json()
-                return result['output']['text']
+        response = await http_post(
+            self.providers['qwen']['endpoint'],
+            timeout_type="llm",
+            headers=headers,
+            json=data
+        )
+        result = response.json()
+        return result['output']['text']
     
     async def _call_ernie(self, prompt: str) -> str:
         """调用文心一言API（备用方案）"""
@@ -111,21 +119,20 @@ class CloudLLMAgent:
             'client_secret': self.providers['ernie']['secret_key']
         }
         
-        async with aiohttp.ClientSession() as session:
-            async with session.post(token_url, params=token_params) as response:
-                token_result = await response.json()
-                access_token = token_result['access_token']
-            
-            # 调用文心一言
-            chat_url = f"{self.providers['ernie']['endpoint']}?access_token={access_token}"
-            chat_data = {
-                'messages': [
-                    {'role': 'user', 'content': prompt}
-                ],
-                'temperature': 0.7,
-                'max_output_tokens': 2000
-            }
-            
-            async with session.post(chat_url, json=chat_data) as response:
-                result = await response.json()
-                return result['result']
\ No newline at end of file
+        response = await http_post(token_url, params=token_params)
+        token_result = response.json()
+        access_token = token_result['access_token']
+        
+        # 调用文心一言
+        chat_url = f"{self.providers['ernie']['endpoint']}?access_token={access_token}"
+        chat_data = {
+            'messages': [
+                {'role': 'user', 'content': prompt}
+            ],
+            'temperature': 0.7,
+            'max_output_tokens': 2000
+        }
+        
+        response = await http_post(chat_url, timeout_type="llm", json=chat_data)
+        result = response.json()
+        return result['result']
\ No newline at end of file
@@ -3,17 +3,20 @@ import json
 import logging
 import time
 from typing import Dict, List, Optional, Callable, Any
-import requests
 import re
 
 try:
     from ..config.cloud_settings import settings
+    from ..utils.http_client import http_post
+    from ..utils.speech_rate import get_speech_rate_model
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from src.config.cloud_settings import settings
+    from src.utils.http_client import http_post
+    from src.utils.speech_rate import get_speech_rate_model
 
 logger = logging.getLogger(__name__)
 
@@ -40,7 +43,7 @@ class CloudNarrationAgent:
         }
         
         try:
-            response = requests.post(url, params=params, timeout=10)
+            response = await http_post(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -90,7 +93,7 @@ class CloudNarrationAgent:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -128,7 +131,7 @@ class CloudNarrationAgent:
                 "max_output_tokens": max_tokens
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -350,6 +353,8 @@ class CloudNarrationAgent:
             # 计算统计信息
             total_duration = sum(seg["duration"] for seg in segments)
             word_count = sum(len(seg["content"]) for seg in segments)
+            speech_rate_model = await asyncio.get_event_loop().run_in_executor(None, get_speech_rate_model)
+            estimated_speech_time = sum(speech_rate_model.predict(seg["content"]) for seg in segments)
             
             result = {
                 "narration_text": narration_text,
@@ -363,7 +368,7 @@ class CloudNarrationAgent:
                     "total_segments": len(segments),
                     "total_duration": total_duration,
                     "word_count": word_count,
-                    "estimated_speech_time": word_count * 0.5  # 估算语音时长（秒）
+                    "estimated_speech_time": round(estimated_speech_time, 1)  # 语速模型预测的语音时长（秒）
                 }
             }
             
@@ -4,15 +4,49 @@ import os
 import time
 import logging
 from typing import Optional, Dict, Any, List, Callable
-import requests
 import base64
-from moviepy.editor import VideoFileClip
-import tempfile
 from xfyun_api import XfyunASR, XfyunTTS
 from baidu_aip import AipSpeech
 
+try:
+    from ..utils.http_client import http_post
+    from ..utils.audio_extraction import extract_audio
+    from ..utils.audio_probe import get_audio_duration
+    from ..utils.keyword_matcher import KeywordMatcher
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.http_client import http_post
+    from src.utils.audio_extraction import extract_audio
+    from src.utils.audio_probe import get_audio_duration
+    from src.utils.keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
+# 简单的情感词典
+EMOTION_KEYWORDS = {
+    "开心": ["开心", "高兴", "快乐", "兴奋", "愉快", "欢乐"],
+    "悲伤": ["悲伤", "难过", "伤心", "痛苦", "哭泣", "眼泪"],
+    "愤怒": ["愤怒", "生气", "恼火", "暴怒", "气愤"],
+    "惊讶": ["惊讶", "震惊", "吃惊", "意外", "惊奇"],
+    "恐惧": ["害怕", "恐惧", "担心", "紧张", "焦虑", "恐慌"]
+}
+
+# 简单的主题关键词
+THEME_KEYWORDS = {
+    "爱情": ["爱情", "恋爱", "喜欢", "爱", "情侣", "约会"],
+    "友情": ["朋友", "友谊", "友情", "伙伴", "同伴", "兄弟"],
+    "家庭": ["家庭", "父母", "孩子", "家人", "亲情", "家"],
+    "工作": ["工作", "职业", "事业", "公司", "老板", "同事"],
+    "学习": ["学习", "学校", "老师", "学生", "考试", "知识"],
+    "旅行": ["旅行", "旅游", "出行", "风景", "景点", "游玩"]
+}
+
+_emotion_matcher = KeywordMatcher(EMOTION_KEYWORDS)
+_theme_matcher = KeywordMatcher(THEME_KEYWORDS)
+
 class CloudSpeechAgent:
     def __init__(self, config):
         self.config = config
@@ -111,10 +145,6 @@ class CloudSpeechAgent:
             # 3. 分析台词内容
             analysis = self._analyze_dialogue_content(dialogue_segments)
             
-            # 4. 清理临时文件
-            if os.path.exists(audio_path):
-                os.remove(audio_path)
-            
             result = {
                 "dialogue_segments": dialogue_segments,
                 "analysis": analysis,
@@ -139,30 +169,13 @@ class CloudSpeechAgent:
             raise
     
     async def _extract_audio_from_video(self, video_path: str) -> str:
-        """从视频中提取音频"""
+        """从视频中提取音频（16kHz单声道WAV，适合语音识别，由音频提取服务缓存）"""
         try:
-            # 创建临时音频文件
-            temp_dir = tempfile.gettempdir()
-            audio_filename = f"temp_audio_{int(time.time())}.wav"
-            audio_path = os.path.join(temp_dir, audio_filename)
-            
-            # 使用moviepy提取音频
-            video = VideoFileClip(video_path)
-            if video.audio is None:
+            loop = asyncio.get_event_loop()
+            audio = await loop.run_in_executor(None, extract_audio, video_path, 16000)
+            if audio is None:
                 raise ValueError("视频中没有音频轨道")
-            
-            # 导出为WAV格式，16kHz采样率（适合语音识别）
-            video.audio.write_audiofile(
-                audio_path,
-                fps=16000,
-                nbytes=2,
-                codec='pcm_s16le',
-                verbose=False,
-                logger=None
-            )
-            
-            video.close()
-            return audio_path
+            return audio.path
             
         except Exception as e:
             logger.error(f"音频提取失败: {e}")
@@ -201,10 +214,10 @@ class CloudSpeechAgent:
         return await self._simple_transcribe(audio_path)
     
     async def _baidu_asr_with_timestamps(self, audio_path: str) -> List[Dict[str, Any]]:
-         """百度ASR带时间戳识别"""
-         try:
-             if not (self.settings.BAIDU_API_KEY and self.settings.BAIDU_SECRET_KEY):
-                 raise ValueError("百度API密钥未配置")
+        """百度ASR带时间戳识别"""
+        try:
+            if not (self.config.BAIDU_API_KEY and self.config.BAIDU_SECRET_KEY):
+                raise ValueError("百度API密钥未配置")
             
             # 获取access_token
             access_token = await self._get_baidu_access_token()
@@ -232,7 +245,7 @@ class CloudSpeechAgent:
                 "cuid": "python_client"
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -257,11 +270,7 @@ class CloudSpeechAgent:
             # 由于API较复杂，这里提供一个简化版本
             # 实际使用时需要集成阿里云SDK
             
-            # 读取音频并分析
-            from moviepy.editor import AudioFileClip
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            audio.close()
+            duration = get_audio_duration(audio_path)
             
             # 模拟分段（实际应该调用真实API）
             segments = []
@@ -293,11 +302,7 @@ class CloudSpeechAgent:
             # 这里应该调用腾讯云的语音识别API
             # 由于API较复杂，这里提供一个简化版本
             
-            # 读取音频并分析
-            from moviepy.editor import AudioFileClip
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            audio.close()
+            duration = get_audio_duration(audio_path)
             
             # 模拟分段
             segments = []
@@ -323,11 +328,7 @@ class CloudSpeechAgent:
     async def _simple_transcribe(self, audio_path: str) -> List[Dict[str, Any]]:
         """简单的音频分段方法（备用方案）"""
         try:
-            from moviepy.editor import AudioFileClip
-            
-            audio = AudioFileClip(audio_path)
-            duration = audio.duration
-            audio.close()
+            duration = get_audio_duration(audio_path)
             
             # 简单按时间分段
             segments = []
@@ -353,12 +354,8 @@ class CloudSpeechAgent:
     def _split_text_to_segments(self, full_text: str, audio_path: str) -> List[Dict[str, Any]]:
         """将完整文本分割为带时间戳的段落"""
         try:
-            from moviepy.editor import AudioFileClip
-            
             # 获取音频总时长
-            audio = AudioFileClip(audio_path)
-            total_duration = audio.duration
-            audio.close()
+            total_duration = get_audio_duration(audio_path)
             
             # 按句号、问号、感叹号分割
             import re
@@ -470,25 +467,7 @@ class CloudSpeechAgent:
     def _analyze_emotions(self, text: str) -> List[str]:
         """分析情感（简化版）"""
         try:
-            emotions = []
-            
-            # 简单的情感词典
-            emotion_keywords = {
-                "开心": ["开心", "高兴", "快乐", "兴奋", "愉快", "欢乐"],
-                "悲伤": ["悲伤", "难过", "伤心", "痛苦", "哭泣", "眼泪"],
-                "愤怒": ["愤怒", "生气", "愤怒", "恼火", "暴怒", "气愤"],
-                "惊讶": ["惊讶", "震惊", "吃惊", "意外", "惊奇", "惊讶"],
-                "恐惧": ["害怕", "恐惧", "担心", "紧张", "焦虑", "恐慌"]
-            }
-            
-            for emotion, keywords in emotion_keywords.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        emotions.append(emotion)
-                        break
-            
-            return list(set(emotions))  # 去重
-            
+            return _emotion_matcher.match_categories(text)
         except Exception as e:
             logger.error(f"情感分析失败: {e}")
             return []
@@ -496,26 +475,7 @@ class CloudSpeechAgent:
     def _extract_themes(self, text: str) -> List[str]:
         """提取主题（简化版）"""
         try:
-            themes = []
-            
-            # 简单的主题关键词
-            theme_keywords = {
-                "爱情": ["爱情", "恋爱", "喜欢", "爱", "情侣", "约会"],
-                "友情": ["朋友", "友谊", "友情", "伙伴", "同伴", "兄弟"],
-                "家庭": ["家庭", "父母", "孩子", "家人", "亲情", "家"],
-                "工作": ["工作", "职业", "事业", "公司", "老板", "同事"],
-                "学习": ["学习", "学校", "老师", "学生", "考试", "知识"],
-                "旅行": ["旅行", "旅游", "出行", "风景", "景点", "游玩"]
-            }
-            
-            for theme, keywords in theme_keywords.items():
-                for keyword in keywords:
-                    if keyword in text:
-                        themes.append(theme)
-                        break
-            
-            return themes
-            
+            return _theme_matcher.match_categories(text)
         except Exception as e:
             logger.error(f"主题提取失败: {e}")
             return []
@@ -531,7 +491,7 @@ class CloudSpeechAgent:
                 "client_secret": self.config.BAIDU_SECRET_KEY
             }
             
-            response = requests.post(url, params=params, timeout=30)
+            response = await http_post(url, params=params)
             response.raise_for_status()
             result = response.json()
             
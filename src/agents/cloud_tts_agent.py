@@ -2,34 +2,125 @@ import asyncio
 import base64
 import json
 import logging
+import re
+import struct
 import time
 import uuid
+import wave
+from collections import deque
+from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
-import requests
+from typing import AsyncIterator, Dict, List, Optional, Callable, Any
+from urllib.parse import quote
 import hashlib
 import hmac
 from datetime import datetime
+from xml.sax.saxutils import escape
 
 try:
     from ..config.cloud_settings import settings
+    from ..utils.audio_probe import get_audio_duration, probe_audio
+    from ..utils.audio_split import split_audio
     from ..utils.audio_utils import merge_audio_files
+    from ..utils.edge_tts_pool import get_edge_tts_pool
+    from ..utils.http_client import http_post
+    from ..utils.rate_limiter import get_rate_limiter
+    from ..utils.speech_rate import get_speech_rate_model
+    from ..utils.tts_cache import get_tts_cache, tts_cache_key
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from src.config.cloud_settings import settings
+    from src.utils.audio_probe import get_audio_duration, probe_audio
+    from src.utils.audio_split import split_audio
     from src.utils.audio_utils import merge_audio_files
+    from src.utils.edge_tts_pool import get_edge_tts_pool
+    from src.utils.http_client import http_post
+    from src.utils.rate_limiter import get_rate_limiter
+    from src.utils.speech_rate import get_speech_rate_model
+    from src.utils.tts_cache import get_tts_cache, tts_cache_key
 
 logger = logging.getLogger(__name__)
 
+# 各服务输出音频的采样率（参与缓存键计算）
+TTS_SAMPLE_RATES = {
+    "aliyun": 16000,
+    "tencent": 16000,
+    "edge": 24000
+}
+
+# 各服务单次请求的文本长度上限（字符）
+TTS_TEXT_LIMITS = {
+    "aliyun": 300,
+    "tencent": 150,
+    "edge": 2000
+}
+
+# 合并合成时段落之间的分隔符（私用区字符，合成前按服务替换为 SSML 停顿或句号）
+PACK_SEPARATOR = "\ue000"
+
+# 支持 SSML 的服务在段落之间插入的停顿(毫秒)，便于切分时识别边界
+PACK_BREAK_MS = 600
+
+# 每次合并合成的最大段落数，限制单次失败影响的范围
+PACK_MAX_SEGMENTS = 10
+
+# 流式合成时不支持增量输出的服务按句请求，首句合成完成即可开始播放
+_SENTENCE_PATTERN = re.compile(r"[^。！？!?；;\n]+[。！？!?；;]*")
+
+# 流式返回缓存音频时每块的字节数
+STREAM_CHUNK_BYTES = 16 * 1024
+
+# 每个服务保留的首块延迟样本数
+STREAM_LATENCY_WINDOW = 200
+
+# 音频格式 -> 响应媒体类型
+AUDIO_MEDIA_TYPES = {
+    "wav": "audio/wav",
+    "mp3": "audio/mpeg"
+}
+
+
+@dataclass
+class SpeechStream:
+    """流式合成结果：首个音频块已就绪，其余音频块边合成边产出"""
+    chunks: AsyncIterator[bytes]
+    service: str                # 内部服务名
+    media_type: str
+    cached: bool                # 是否命中语音缓存
+    first_chunk_latency: float  # 首块延迟(秒)
+
+
+def _wav_stream_header(channels: int, sample_width: int, sample_rate: int) -> bytes:
+    """流式 WAV 头：总长度未知，RIFF 与 data 大小填最大值"""
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF", 0xFFFFFFFF, b"WAVE",
+        b"fmt ", 16, 1, channels, sample_rate,
+        sample_rate * channels * sample_width, channels * sample_width, sample_width * 8,
+        b"data", 0xFFFFFFFF
+    )
+
+
+def _finalize_wav_stream(audio_path: Path):
+    """把流式 WAV 头中的占位大小改为实际大小"""
+    size = audio_path.stat().st_size
+    with open(audio_path, "r+b") as f:
+        f.seek(4)
+        f.write(struct.pack("<I", size - 8))
+        f.seek(40)
+        f.write(struct.pack("<I", size - 44))
+
 class CloudTTSAgent:
     """云端TTS Agent - 支持阿里云和腾讯云语音合成"""
     
     def __init__(self):
         self.temp_dir = settings.TEMP_DIR
         self.temp_dir.mkdir(exist_ok=True)
+        # 流式合成的首块延迟(秒)，键为服务名（命中缓存时为 "cache"）
+        self._stream_latencies: Dict[str, deque] = {}
     
     def _generate_aliyun_signature(self, params: Dict[str, str]) -> str:
         """生成阿里云签名"""
@@ -41,7 +132,7 @@ class CloudTTSAgent:
             query_string = "&".join([f"{k}={v}" for k, v in sorted_params])
             
             # 构建待签名字符串
-            string_to_sign = f"POST&%2F&{requests.utils.quote(query_string, safe='')}"
+            string_to_sign = f"POST&%2F&{quote(query_string, safe='')}"
             
             # 计算签名
             signing_key = settings.ALIYUN_ACCESS_KEY_SECRET + "&"
@@ -143,11 +234,12 @@ class CloudTTSAgent:
             # 发送请求
             url = f"https://nls-meta.cn-shanghai.aliyuncs.com/"
             
-            response = requests.post(url, data=params, timeout=60)
+            await get_rate_limiter("aliyun_tts").acquire()
+            response = await http_post(url, timeout_type="tts", data=params)
             response.raise_for_status()
             
             # 保存音频文件
-            output_path = self.temp_dir / f"aliyun_tts_{int(time.time())}.wav"
+            output_path = self.temp_dir / f"aliyun_tts_{int(time.time())}_{uuid.uuid4().hex[:8]}.wav"
             with open(output_path, "wb") as f:
                 f.write(response.content)
             
@@ -198,11 +290,12 @@ class CloudTTSAgent:
             # 发送请求
             url = "https://tts.tencentcloudapi.com/"
             
-            response = requests.post(
-                url, 
-                headers=headers, 
-                data=json.dumps(params),
-                timeout=60
+            await get_rate_limiter("tencent_tts").acquire()
+            response = await http_post(
+                url,
+                timeout_type="tts",
+                headers=headers,
+                content=json.dumps(params)
             )
             response.raise_for_status()
             result = response.json()
@@ -212,7 +305,7 @@ class CloudTTSAgent:
                 audio_data = base64.b64decode(result["Response"]["Audio"])
                 
                 # 保存音频文件
-                output_path = self.temp_dir / f"tencent_tts_{int(time.time())}.wav"
+                output_path = self.temp_dir / f"tencent_tts_{int(time.time())}_{uuid.uuid4().hex[:8]}.wav"
                 with open(output_path, "wb") as f:
                     f.write(audio_data)
                 
@@ -234,14 +327,19 @@ class CloudTTSAgent:
     ) -> str:
         """使用Edge-TTS合成语音（免费备用方案）"""
         try:
-            import edge_tts
-            
-            # 调整语音参数
-            communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch, volume=volume)
-            
             # 保存音频文件
-            output_path = self.temp_dir / f"edge_tts_{int(time.time())}.wav"
-            await communicate.save(str(output_path))
+            output_path = self.temp_dir / f"edge_tts_{int(time.time())}_{uuid.uuid4().hex[:8]}.wav"
+            await get_rate_limiter("edge_tts").acquire()
+            
+            pool = get_edge_tts_pool()
+            if pool is not None:
+                # 复用连接池中已握手的连接
+                await pool.save(text, str(output_path), voice, rate=rate, pitch=pitch, volume=volume)
+            else:
+                import edge_tts
+                
+                communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch, volume=volume)
+                await communicate.save(str(output_path))
             
             return str(output_path)
             
@@ -280,6 +378,81 @@ class CloudTTSAgent:
         
         return voice_mappings.get(service, {}).get(voice_style, "")
     
+    def _resolve_service(self, service: Any) -> tuple:
+        """把可用服务配置映射为 (内部服务名, 显示名称)"""
+        if isinstance(service, dict):
+            return service["name"], service.get("display_name", service["name"])
+        
+        # 字符串格式，需要映射到内部服务名
+        service_name_mapping = {
+            "阿里云TTS": "aliyun",
+            "腾讯TTS": "tencent", 
+            "Edge-TTS": "edge"
+        }
+        return service_name_mapping.get(service, service.lower()), service
+    
+    def _primary_voice(self, voice_style: str) -> tuple:
+        """按优先级第一个支持该语音风格的服务及其音色，用于合成前预测时长"""
+        for service in settings.get_available_tts_services():
+            service_name, _ = self._resolve_service(service)
+            voice = self._get_voice_mapping(service_name, voice_style)
+            if voice:
+                return service_name, voice
+        return "", ""
+    
+    def _render_text(self, service_name: str, text: str) -> str:
+        """把合并合成的分隔符替换为服务支持的停顿标记"""
+        if PACK_SEPARATOR not in text:
+            return text
+        parts = text.split(PACK_SEPARATOR)
+        if service_name in ("aliyun", "tencent"):
+            # 阿里云、腾讯云支持 SSML，段落之间插入固定时长的停顿
+            breaks = f'<break time="{PACK_BREAK_MS}ms"/>'
+            return "<speak>" + breaks.join(escape(part) for part in parts) + "</speak>"
+        # 不支持 SSML 的服务以句号断句，依靠自然停顿切分
+        return "\n".join(part if part[-1:] in "。！？.!?" else part + "。" for part in parts)
+    
+    def _pack_limit(self) -> int:
+        """合并合成的文本长度上限：取所有可用服务中最小的，保证降级到其他服务时也不超限"""
+        limits = [
+            TTS_TEXT_LIMITS.get(self._resolve_service(service)[0], min(TTS_TEXT_LIMITS.values()))
+            for service in settings.get_available_tts_services()
+        ]
+        return min(limits) if limits else min(TTS_TEXT_LIMITS.values())
+    
+    async def _cache_checkout(self, cache, cache_key: str) -> Optional[str]:
+        """在线程池中查询语音缓存，命中时返回临时目录中归调用方所有的音频副本"""
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(None, cache.checkout, cache_key, str(self.temp_dir))
+        except OSError as e:
+            logger.warning(f"读取语音缓存失败: {e}")
+            return None
+    
+    async def _cache_put(
+        self,
+        cache,
+        cache_key: str,
+        audio_path: str,
+        service_name: str,
+        voice: str,
+        text: Optional[str],
+        speed: float,
+        duration: float
+    ):
+        """在线程池中把音频复制进语音缓存，原文件仍归调用方"""
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(
+                None,
+                lambda: cache.put(
+                    cache_key, audio_path, service_name, voice,
+                    text=text, speed=speed, duration=duration
+                )
+            )
+        except OSError as e:
+            logger.warning(f"写入语音缓存失败: {e}")
+    
     async def synthesize_speech(
         self,
         text: str,
@@ -303,6 +476,21 @@ class CloudTTSAgent:
         Returns:
             音频文件路径
         """
+        audio_path, _, _ = await self._synthesize_speech(
+            text, voice_style, speed, pitch, volume, progress_callback
+        )
+        return audio_path
+    
+    async def _synthesize_speech(
+        self,
+        text: str,
+        voice_style: str = "female_gentle",
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        volume: float = 1.0,
+        progress_callback: Optional[Callable[[float, str], None]] = None
+    ) -> tuple:
+        """按优先级合成语音，返回 (音频文件路径, 内部服务名, 音色)"""
         try:
             if progress_callback:
                 progress_callback(0.0, "开始语音合成...")
@@ -322,20 +510,7 @@ class CloudTTSAgent:
             for i, service in enumerate(available_services):
                 logger.info(f"处理服务 {i}: {service}, 类型: {type(service)}")
                 
-                # 处理服务名称映射
-                if isinstance(service, dict):
-                    service_name = service["name"]
-                    display_name = service.get("display_name", service_name)
-                else:
-                    # 字符串格式，需要映射到内部服务名
-                    service_display_name = service
-                    service_name_mapping = {
-                        "阿里云TTS": "aliyun",
-                        "腾讯TTS": "tencent", 
-                        "Edge-TTS": "edge"
-                    }
-                    service_name = service_name_mapping.get(service, service.lower())
-                    display_name = service
+                service_name, display_name = self._resolve_service(service)
                 
                 try:
                     if progress_callback:
@@ -346,15 +521,30 @@ class CloudTTSAgent:
                         logger.warning(f"{service_name}不支持语音风格: {voice_style}")
                         continue
                     
+                    # 相同文本和参数的合成结果直接复用缓存
+                    cache = get_tts_cache()
+                    cache_key = tts_cache_key(
+                        text, service_name, voice, speed, pitch, volume,
+                        TTS_SAMPLE_RATES.get(service_name, 16000)
+                    )
+                    if cache is not None:
+                        cached_path = await self._cache_checkout(cache, cache_key)
+                        if cached_path:
+                            if progress_callback:
+                                progress_callback(1.0, f"语音合成完成! 使用{display_name}缓存")
+                            logger.info(f"语音合成命中缓存: {display_name}, 文件: {cached_path}")
+                            return cached_path, service_name, voice
+                    
                     audio_path = ""
+                    service_text = self._render_text(service_name, text)
                     
                     if service_name == "aliyun":
                         audio_path = await self._synthesize_with_aliyun(
-                            text, voice, speed, pitch, volume
+                            service_text, voice, speed, pitch, volume
                         )
                     elif service_name == "tencent":
                         audio_path = await self._synthesize_with_tencent(
-                            text, voice, speed, volume
+                            service_text, voice, speed, volume
                         )
                     elif service_name == "edge":
                         # Edge-TTS参数格式不同
@@ -363,15 +553,27 @@ class CloudTTSAgent:
                         vol = f"{int((volume - 1) * 100):+d}%"
                         
                         audio_path = await self._synthesize_with_edge(
-                            text, voice, rate, pitch_hz, vol
+                            service_text, voice, rate, pitch_hz, vol
                         )
                     
                     if audio_path and Path(audio_path).exists():
+                        # 实测时长用于训练语速模型，并随缓存条目持久化
+                        audio_duration = get_audio_duration(audio_path)
+                        if PACK_SEPARATOR not in text:
+                            speech_rate_model = await asyncio.get_event_loop().run_in_executor(None, get_speech_rate_model)
+                            speech_rate_model.observe(text, audio_duration, speed, service_name, voice)
+                        
+                        if cache is not None:
+                            await self._cache_put(
+                                cache, cache_key, audio_path, service_name, voice,
+                                text if PACK_SEPARATOR not in text else None, speed, audio_duration
+                            )
+                        
                         if progress_callback:
                             progress_callback(1.0, f"语音合成完成! 使用{display_name}")
                         
                         logger.info(f"语音合成成功: {display_name}, 文件: {audio_path}")
-                        return audio_path
+                        return audio_path, service_name, voice
                     
                 except Exception as e:
                     logger.warning(f"{display_name}合成失败: {e}")
@@ -385,6 +587,251 @@ class CloudTTSAgent:
                 progress_callback(1.0, f"合成失败: {str(e)}")
             raise
     
+    async def open_speech_stream(
+        self,
+        text: str,
+        voice_style: str = "female_gentle",
+        speed: float = 1.0,
+        pitch: float = 1.0,
+        volume: float = 1.0
+    ) -> SpeechStream:
+        """
+        流式合成语音
+        
+        按优先级选择服务，拿到首个音频块后返回，其余音频块在迭代时边合成边产出；
+        首块之前失败会降级到下一个服务。完整播放后的音频同时写入语音缓存，
+        命中缓存时直接分块返回缓存文件。
+        
+        Args:
+            text: 要合成的文本
+            voice_style: 语音风格
+            speed: 语速 (0.5-2.0)
+            pitch: 音调 (0.5-2.0)
+            volume: 音量 (0.5-2.0)
+            
+        Returns:
+            SpeechStream
+        """
+        started = time.perf_counter()
+        if not text.strip():
+            raise ValueError("合成文本不能为空")
+        
+        available_services = settings.get_available_tts_services()
+        if not available_services:
+            raise ValueError("没有可用的TTS服务")
+        
+        for service in available_services:
+            service_name, display_name = self._resolve_service(service)
+            voice = self._get_voice_mapping(service_name, voice_style)
+            if not voice:
+                logger.warning(f"{service_name}不支持语音风格: {voice_style}")
+                continue
+            
+            cache = get_tts_cache()
+            cache_key = tts_cache_key(
+                text, service_name, voice, speed, pitch, volume,
+                TTS_SAMPLE_RATES.get(service_name, 16000)
+            )
+            cached_path = await self._cache_checkout(cache, cache_key) if cache is not None else None
+            
+            if cached_path:
+                info = probe_audio(cached_path)
+                media_type = AUDIO_MEDIA_TYPES.get(info.format if info else "", "application/octet-stream")
+                chunks = self._stream_file(cached_path, remove=True)
+            elif service_name == "edge":
+                media_type = AUDIO_MEDIA_TYPES["mp3"]
+                chunks = self._stream_with_edge(
+                    text, voice,
+                    f"{int((speed - 1) * 100):+d}%",
+                    f"{int((pitch - 1) * 50):+d}Hz",
+                    f"{int((volume - 1) * 100):+d}%"
+                )
+            else:
+                media_type = AUDIO_MEDIA_TYPES["wav"]
+                chunks = self._stream_sentences(service_name, text, voice, speed, pitch, volume)
+            
+            try:
+                first_chunk = await chunks.__anext__()
+            except Exception as e:
+                await chunks.aclose()
+                logger.warning(f"{display_name}流式合成失败: {e}")
+                continue
+            
+            latency = time.perf_counter() - started
+            self._stream_latencies.setdefault(
+                "cache" if cached_path else service_name, deque(maxlen=STREAM_LATENCY_WINDOW)
+            ).append(latency)
+            logger.info(f"流式合成首块就绪: {display_name}{'缓存' if cached_path else ''}, 耗时{latency * 1000:.0f}ms")
+            
+            if not cached_path and cache is not None:
+                chunks = self._relay_with_cache_copy(
+                    first_chunk, chunks, cache, cache_key, text, service_name, voice, speed, media_type
+                )
+            else:
+                chunks = self._relay(first_chunk, chunks)
+            return SpeechStream(chunks, service_name, media_type, bool(cached_path), latency)
+        
+        raise ValueError("所有TTS服务都失败了")
+    
+    def stream_stats(self) -> Dict[str, Dict[str, float]]:
+        """流式合成首块延迟统计（毫秒），按服务分组"""
+        stats = {}
+        for name, latencies in self._stream_latencies.items():
+            values = sorted(latencies)
+            stats[name] = {
+                "count": len(values),
+                "mean_ms": round(sum(values) / len(values) * 1000, 1),
+                "p50_ms": round(values[len(values) // 2] * 1000, 1),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1)
+            }
+        return stats
+    
+    async def _stream_with_edge(
+        self,
+        text: str,
+        voice: str,
+        rate: str,
+        pitch: str,
+        volume: str
+    ) -> AsyncIterator[bytes]:
+        """Edge-TTS 增量输出 MP3 音频块"""
+        await get_rate_limiter("edge_tts").acquire()
+        pool = get_edge_tts_pool()
+        if pool is not None:
+            async for chunk in pool.stream(text, voice, rate=rate, pitch=pitch, volume=volume):
+                yield chunk
+            return
+        
+        import edge_tts
+        
+        communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch, volume=volume)
+        async for chunk in communicate.stream():
+            if chunk["type"] == "audio" and chunk["data"]:
+                yield chunk["data"]
+    
+    def _split_sentences(self, text: str, limit: int) -> List[str]:
+        """按句切分文本，超过服务长度上限的句子再按上限截断"""
+        sentences = []
+        for sentence in _SENTENCE_PATTERN.findall(text):
+            sentence = sentence.strip()
+            sentences.extend(sentence[i:i + limit] for i in range(0, len(sentence), limit))
+        return sentences or [text]
+    
+    async def _stream_sentences(
+        self,
+        service_name: str,
+        text: str,
+        voice: str,
+        speed: float,
+        pitch: float,
+        volume: float
+    ) -> AsyncIterator[bytes]:
+        """
+        逐句合成并输出 WAV 流（不支持增量输出的服务）
+        
+        首块为 WAV 头加首句 PCM，之后每句一块；播放当前句时预先合成下一句。
+        """
+        sentences = self._split_sentences(text, TTS_TEXT_LIMITS.get(service_name, min(TTS_TEXT_LIMITS.values())))
+        
+        async def synthesize(sentence: str) -> str:
+            if service_name == "aliyun":
+                return await self._synthesize_with_aliyun(sentence, voice, speed, pitch, volume)
+            if service_name == "tencent":
+                return await self._synthesize_with_tencent(sentence, voice, speed, volume)
+            raise ValueError(f"不支持的TTS服务: {service_name}")
+        
+        params = None
+        next_task = asyncio.ensure_future(synthesize(sentences[0]))
+        try:
+            for i in range(len(sentences)):
+                audio_path = await next_task
+                next_task = asyncio.ensure_future(synthesize(sentences[i + 1])) if i + 1 < len(sentences) else None
+                try:
+                    with wave.open(audio_path, "rb") as wav:
+                        sentence_params = (wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+                        frames = wav.readframes(wav.getnframes())
+                finally:
+                    Path(audio_path).unlink(missing_ok=True)
+                
+                if params is None:
+                    params = sentence_params
+                    yield _wav_stream_header(*params) + frames
+                elif sentence_params != params:
+                    raise ValueError(f"分句合成的音频格式不一致: {sentence_params} != {params}")
+                else:
+                    yield frames
+        finally:
+            # 中途结束时取消或清理预先合成的下一句
+            if next_task is not None:
+                if not next_task.done():
+                    next_task.cancel()
+                elif not next_task.cancelled() and next_task.exception() is None:
+                    Path(next_task.result()).unlink(missing_ok=True)
+    
+    async def _stream_file(self, audio_path: str, remove: bool = False) -> AsyncIterator[bytes]:
+        """分块读取音频文件，remove 为 True 时读完（或中途结束）后删除文件"""
+        try:
+            with open(audio_path, "rb") as f:
+                while True:
+                    chunk = f.read(STREAM_CHUNK_BYTES)
+                    if not chunk:
+                        break
+                    yield chunk
+        finally:
+            if remove:
+                Path(audio_path).unlink(missing_ok=True)
+    
+    async def _relay(self, first_chunk: bytes, chunks: AsyncIterator[bytes]) -> AsyncIterator[bytes]:
+        """先产出已取得的首块，再转发其余音频块"""
+        try:
+            yield first_chunk
+            async for chunk in chunks:
+                yield chunk
+        finally:
+            await chunks.aclose()
+    
+    async def _relay_with_cache_copy(
+        self,
+        first_chunk: bytes,
+        chunks: AsyncIterator[bytes],
+        cache,
+        cache_key: str,
+        text: str,
+        service_name: str,
+        voice: str,
+        speed: float,
+        media_type: str
+    ) -> AsyncIterator[bytes]:
+        """转发音频块的同时写入临时文件，完整结束后存入语音缓存（中途断开则丢弃）"""
+        suffix = ".mp3" if media_type == AUDIO_MEDIA_TYPES["mp3"] else ".wav"
+        copy_path = self.temp_dir / f"{service_name}_stream_{int(time.time())}_{uuid.uuid4().hex[:8]}{suffix}"
+        completed = False
+        try:
+            with open(copy_path, "wb") as copy:
+                copy.write(first_chunk)
+                yield first_chunk
+                async for chunk in chunks:
+                    copy.write(chunk)
+                    yield chunk
+            completed = True
+        finally:
+            await chunks.aclose()
+            try:
+                if completed:
+                    if suffix == ".wav":
+                        _finalize_wav_stream(copy_path)
+                    audio_duration = get_audio_duration(str(copy_path))
+                    speech_rate_model = await asyncio.get_event_loop().run_in_executor(None, get_speech_rate_model)
+                    speech_rate_model.observe(text, audio_duration, speed, service_name, voice)
+                    await self._cache_put(
+                        cache, cache_key, str(copy_path), service_name, voice, text, speed, audio_duration
+                    )
+            except OSError as e:
+                logger.warning(f"写入语音缓存失败: {e}")
+            finally:
+                copy_path.unlink(missing_ok=True)
+    
     async def synthesize_narration(
         self,
         narration_segments: List[Dict[str, Any]],
@@ -392,11 +839,19 @@ class CloudTTSAgent:
         speed: float = 1.0,
         pitch: float = 1.0,
         volume: float = 1.0,
-        progress_callback: Optional[Callable[[float, str], None]] = None
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        pack: Optional[bool] = None
     ) -> List[Dict[str, Any]]:
         """
         为解说段落批量合成语音
         
+        段落并发合成（并发数受 settings.max_concurrent_tts_requests 限制），
+        各服务商调用频率由共享令牌桶控制，单段失败时按 settings.api_retry_times 重试。
+        段落带时间槽（duration 或 start_time/end_time）时，按语速模型预测的时长
+        选择语速（只加快不放慢），使音频一次合成即放进时间槽。
+        合并模式下，已有缓存的段落直接复用，其余相邻且语速相同的短段落在服务商文本长度上限内
+        合并为一次请求，合成后按静音间隙切回各段并逐段写入缓存；合并合成或切分失败时改为逐段合成。
+        
         Args:
             narration_segments: 解说段落列表
             voice_style: 语音风格
@@ -404,9 +859,12 @@ class CloudTTSAgent:
             pitch: 音调
             volume: 音量
             progress_callback: 进度回调函数
+            pack: 是否合并短段落合成，默认使用 settings.enable_tts_packing
             
         Returns:
-            包含音频文件路径的段落列表
+            与输入顺序一致的段落列表，每段带 status 字段：
+            success（含 audio_path、audio_duration）、failed（含 error）或 skipped（内容为空）；
+            按时间槽调整语速的段落另有 speed、predicted_duration，合并合成的段落另有 packed_with（同批段落数）
         """
         try:
             if progress_callback:
@@ -415,48 +873,161 @@ class CloudTTSAgent:
             if not narration_segments:
                 raise ValueError("解说段落不能为空")
             
-            synthesized_segments = []
             total_segments = len(narration_segments)
+            semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_tts_requests))
+            attempts_allowed = max(1, settings.api_retry_times)
+            finished = 0
+            # 首次获取要扫描语音缓存，放到线程池避免阻塞事件循环
+            speech_rate_model = await asyncio.get_event_loop().run_in_executor(None, get_speech_rate_model)
+            primary_service, primary_voice = self._primary_voice(voice_style)
+            if pack is None:
+                pack = settings.enable_tts_packing
+            # 合并前先逐段查缓存，命中的段落不再参与合并（逐段合成时由 synthesize_speech 查缓存）
+            cache = get_tts_cache() if pack else None
             
-            for i, segment in enumerate(narration_segments):
-                try:
-                    if progress_callback:
-                        progress = (i / total_segments) * 0.9
-                        progress_callback(progress, f"合成第{i+1}/{total_segments}段...")
-                    
-                    # 添加调试信息
-                    logger.info(f"处理第{i+1}段: {type(segment)}, 内容: {segment}")
-                    
-                    text = segment.get("text", segment.get("content", "")).strip()
-                    if not text:
-                        logger.warning(f"第{i+1}段内容为空，跳过")
+            def report(count: int):
+                nonlocal finished
+                finished += count
+                if progress_callback:
+                    progress_callback((finished / total_segments) * 0.9, f"已合成{finished}/{total_segments}段...")
+            
+            # 准备各段文本和语速：(序号, 结果, 文本, 语速)
+            results: List[Dict[str, Any]] = []
+            pending = []
+            for index, segment in enumerate(narration_segments):
+                result = segment.copy()
+                results.append(result)
+                text = segment.get("text", segment.get("content", "")).strip()
+                if not text:
+                    logger.warning(f"第{index+1}段内容为空，跳过")
+                    result.update({"status": "skipped", "error": "内容为空"})
+                    report(1)
+                    continue
+                
+                segment_speed = speed
+                slot = self._segment_slot(segment)
+                if settings.enable_speech_rate_fit and slot:
+                    # 按预测时长选择语速，一次合成即放进时间槽
+                    segment_speed = speech_rate_model.fit_speed(
+                        text, slot, speed, primary_service, primary_voice
+                    )
+                    result.update({
+                        "speed": segment_speed,
+                        "predicted_duration": round(speech_rate_model.predict(
+                            text, segment_speed, primary_service, primary_voice
+                        ), 3)
+                    })
+                
+                if cache is not None and primary_service:
+                    cached_path = await self._cache_checkout(cache, tts_cache_key(
+                        text, primary_service, primary_voice, segment_speed, pitch, volume,
+                        TTS_SAMPLE_RATES.get(primary_service, 16000)
+                    ))
+                    if cached_path:
+                        result.update({
+                            "status": "success",
+                            "audio_path": cached_path,
+                            "audio_duration": await self._get_audio_duration(cached_path),
+                            "attempts": 1
+                        })
+                        report(1)
                         continue
-                    
-                    # 合成单段语音
-                    audio_path = await self.synthesize_speech(
-                        text, voice_style, speed, pitch, volume
+                pending.append((index, result, text, segment_speed))
+            
+            async def synthesize_with_retry(synthesize, text: str, segment_speed: float, label: str) -> tuple:
+                """合成并在失败时重试，返回 (合成结果, 尝试次数)"""
+                for attempt in range(1, attempts_allowed + 1):
+                    try:
+                        async with semaphore:
+                            synthesized = await synthesize(
+                                text, voice_style, segment_speed, pitch, volume
+                            )
+                        return synthesized, attempt
+                    except Exception as e:
+                        if attempt >= attempts_allowed:
+                            raise
+                        delay = settings.retry_delay * 2 ** (attempt - 1)
+                        logger.warning(f"{label}第{attempt}次合成失败: {e}，{delay}秒后重试")
+                        await asyncio.sleep(delay)
+            
+            async def synthesize_segment(index: int, result: Dict[str, Any], text: str, segment_speed: float):
+                try:
+                    audio_path, attempt = await synthesize_with_retry(
+                        self.synthesize_speech, text, segment_speed, f"第{index+1}段"
                     )
-                    
-                    # 添加音频路径到段落信息
-                    segment_with_audio = segment.copy()
-                    segment_with_audio["audio_path"] = audio_path
-                    segment_with_audio["audio_duration"] = await self._get_audio_duration(audio_path)
-                    
-                    synthesized_segments.append(segment_with_audio)
-                    
-                    # 避免API调用过于频繁
-                    await asyncio.sleep(0.5)
-                    
+                    result.update({
+                        "status": "success",
+                        "audio_path": audio_path,
+                        "audio_duration": await self._get_audio_duration(audio_path),
+                        "attempts": attempt
+                    })
                 except Exception as e:
-                    logger.error(f"第{i+1}段合成失败: {e}")
-                    # 继续处理下一段
-                    continue
+                    logger.error(f"第{index+1}段合成失败: {e}")
+                    result.update({"status": "failed", "error": str(e), "attempts": attempts_allowed})
+                report(1)
             
+            async def synthesize_group(group: list):
+                if len(group) > 1:
+                    label = f"第{group[0][0]+1}-{group[-1][0]+1}段"
+                    try:
+                        packed_text = PACK_SEPARATOR.join(text for _, _, text, _ in group)
+                        (audio_path, service_name, voice), attempt = await synthesize_with_retry(
+                            self._synthesize_speech, packed_text, group[0][3], label
+                        )
+                        
+                        # 按预测时长比例在静音间隙处切回各段
+                        stem = f"packed_tts_{int(time.time())}_{uuid.uuid4().hex[:8]}"
+                        output_paths = [str(self.temp_dir / f"{stem}_{n}.wav") for n in range(len(group))]
+                        weights = [
+                            speech_rate_model.predict(text, segment_speed, primary_service, primary_voice)
+                            for _, _, text, segment_speed in group
+                        ]
+                        loop = asyncio.get_event_loop()
+                        durations = await loop.run_in_executor(None, split_audio, audio_path, weights, output_paths)
+                        # 合并合成的整段音频已存入缓存，切分后不再需要
+                        Path(audio_path).unlink(missing_ok=True)
+                        if durations is None:
+                            raise ValueError("无法按静音切分合并合成的音频")
+                        
+                        # 切出的各段按单段文本写入缓存并训练语速模型，下次不必再合并合成
+                        packed_cache = get_tts_cache()
+                        for (_, result, text, segment_speed), output_path, duration in zip(group, output_paths, durations):
+                            speech_rate_model.observe(text, duration, segment_speed, service_name, voice)
+                            if packed_cache is not None:
+                                await self._cache_put(
+                                    packed_cache,
+                                    tts_cache_key(
+                                        text, service_name, voice, segment_speed, pitch, volume,
+                                        TTS_SAMPLE_RATES.get(service_name, 16000)
+                                    ),
+                                    output_path, service_name, voice, text, segment_speed, duration
+                                )
+                            result.update({
+                                "status": "success",
+                                "audio_path": output_path,
+                                "audio_duration": duration,
+                                "attempts": attempt,
+                                "packed_with": len(group)
+                            })
+                        report(len(group))
+                        return
+                    except Exception as e:
+                        logger.warning(f"{label}合并合成失败，改为逐段合成: {e}")
+                
+                await asyncio.gather(*(synthesize_segment(*item) for item in group))
+            
+            groups = self._pack_segments(pending) if pack else [[item] for item in pending]
+            await asyncio.gather(*(synthesize_group(group) for group in groups))
+            
+            success_count = sum(1 for segment in results if segment["status"] == "success")
             if progress_callback:
-                progress_callback(1.0, f"批量合成完成! 成功{len(synthesized_segments)}段")
+                progress_callback(1.0, f"批量合成完成! 成功{success_count}段")
             
-            logger.info(f"批量语音合成完成: {len(synthesized_segments)}/{total_segments}段成功")
-            return synthesized_segments
+            logger.info(
+                f"批量语音合成完成: {success_count}/{total_segments}段成功, "
+                f"{len(groups)}组请求"
+            )
+            return results
             
         except Exception as e:
             logger.error(f"批量语音合成失败: {e}")
@@ -464,15 +1035,37 @@ class CloudTTSAgent:
                 progress_callback(1.0, f"批量合成失败: {str(e)}")
             raise
     
+    def _pack_segments(self, pending: list) -> List[list]:
+        """把相邻、语速相同的段落在文本长度上限内分组"""
+        limit = self._pack_limit()
+        groups: List[list] = []
+        length = 0
+        for item in pending:
+            _, _, text, segment_speed = item
+            group = groups[-1] if groups else None
+            if (
+                group is not None
+                and len(group) < PACK_MAX_SEGMENTS
+                and group[-1][0] == item[0] - 1
+                and group[-1][3] == segment_speed
+                and length + 1 + len(text) <= limit
+            ):
+                group.append(item)
+                length += 1 + len(text)
+            else:
+                groups.append([item])
+                length = len(text)
+        return groups
+    
+    def _segment_slot(self, segment: Dict[str, Any]) -> float:
+        """段落的时间槽长度(秒)，没有时返回 0"""
+        if segment.get("start_time") is not None and segment.get("end_time") is not None:
+            return max(0.0, float(segment["end_time"]) - float(segment["start_time"]))
+        return max(0.0, float(segment.get("duration") or 0))
+    
     async def _get_audio_duration(self, audio_path: str) -> float:
-        """获取音频时长"""
-        try:
-            import librosa
-            y, sr = librosa.load(audio_path)
-            return len(y) / sr
-        except Exception as e:
-            logger.warning(f"获取音频时长失败: {e}")
-            return 0.0
+        """获取音频时长（读取文件头，不解码）"""
+        return get_audio_duration(audio_path)
     
     async def merge_narration_audio(
         self,
@@ -505,11 +1098,11 @@ class CloudTTSAgent:
             # 提取音频文件路径和时间信息
             audio_files = []
             for segment in synthesized_segments:
-                if "audio_path" in segment and Path(segment["audio_path"]).exists():
+                if segment.get("audio_path") and Path(segment["audio_path"]).exists():
                     audio_files.append({
                         "path": segment["audio_path"],
-                        "timestamp": segment.get("timestamp", 0),
-                        "duration": segment.get("duration", 5)
+                        "timestamp": segment.get("timestamp", segment.get("start_time", 0)),
+                        "volume": segment.get("volume", 1.0)
                     })
             
             if not audio_files:
@@ -518,13 +1111,18 @@ class CloudTTSAgent:
             if progress_callback:
                 progress_callback(0.5, f"合并{len(audio_files)}个音频文件...")
             
-            # 使用音频工具合并
-            merged_path = await merge_audio_files(
-                audio_files, 
+            # 按时间戳在时间轴上混音（分块处理，放到线程池避免阻塞事件循环）
+            loop = asyncio.get_event_loop()
+            merged_path = await loop.run_in_executor(
+                None,
+                merge_audio_files,
+                audio_files,
                 output_path,
                 background_music,
                 music_volume
             )
+            if not merged_path:
+                raise ValueError("音频混音失败")
             
             if progress_callback:
                 progress_callback(1.0, "音频合并完成!")
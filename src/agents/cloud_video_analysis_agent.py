@@ -1,40 +1,128 @@
 import asyncio
-import base64
+import copy
+import functools
 import json
 import logging
+import re
 import time
 from pathlib import Path
-from typing import Dict, List, Optional, Callable, Any
-import cv2
-import requests
+from typing import AsyncIterator, Awaitable, Dict, List, Optional, Callable, Any, Tuple
 from PIL import Image
 import io
 
 try:
     from ..config.cloud_settings import settings
-    from ..utils.video_utils import extract_frames_from_video, extract_audio_from_video
+    from ..utils.video_utils import extract_keyframes
+    from ..utils.video_probe import probe_video
+    from ..utils.audio_analysis import analyze_media_audio
+    from ..utils.frame_extractor import encode_frames_at
+    from ..utils.highlight_engine import generate_highlights
+    from ..utils.keyword_matcher import KeywordMatcher
+    from ..utils.frame_buffer import EncodedFrame
+    from ..utils.perceptual_hash import group_near_duplicates
+    from ..utils.scene_detection import compute_frame_signature, detect_scene_keyframes, signature_distance
+    from ..utils.vision_cache import get_vision_cache
+    from ..utils.image_prep import get_image_profile, prepare_image, summarize_payloads
+    from ..utils.rate_limiter import get_rate_limiter
+    from ..utils.http_client import http_post
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
     from pathlib import Path
     sys.path.append(str(Path(__file__).parent.parent.parent))
     from src.config.cloud_settings import settings
-    from src.utils.video_utils import extract_frames_from_video, extract_audio_from_video
+    from src.utils.video_utils import extract_keyframes
+    from src.utils.video_probe import probe_video
+    from src.utils.audio_analysis import analyze_media_audio
+    from src.utils.frame_extractor import encode_frames_at
+    from src.utils.highlight_engine import generate_highlights
+    from src.utils.keyword_matcher import KeywordMatcher
+    from src.utils.frame_buffer import EncodedFrame
+    from src.utils.perceptual_hash import group_near_duplicates
+    from src.utils.scene_detection import compute_frame_signature, detect_scene_keyframes, signature_distance
+    from src.utils.vision_cache import get_vision_cache
+    from src.utils.image_prep import get_image_profile, prepare_image, summarize_payloads
+    from src.utils.rate_limiter import get_rate_limiter
+    from src.utils.http_client import http_post
 
 logger = logging.getLogger(__name__)
 
+# 视觉服务模型与提示词版本，修改提示词或解析逻辑时递增版本号使旧缓存失效
+BAIDU_VISION_MODEL = "advanced_general"
+BAIDU_VISION_PROMPT_VERSION = "v1"
+QWEN_VL_MODEL = "qwen-vl-plus"
+QWEN_VL_PROMPT = "请详细描述这张图片中的内容，包括主要物体、场景、人物动作等。用中文回答。"
+QWEN_VL_PROMPT_VERSION = "v1"
+QWEN_VL_BATCH_PROMPT = (
+    "以上按顺序给出了{count}张视频截图。请逐张详细描述每张图片中的内容，包括主要物体、场景、人物动作等。"
+    "用中文回答，每张图片单独一段，并以“图1:”“图2:”这样的序号开头，不要合并描述。"
+)
+
+# 视觉服务失败或超时时的单帧结果
+PROVIDER_FAILED = {"objects": [], "scene_description": "分析失败", "confidence": 0}
+
+# 级联模式下参与物体集合比较的最低识别置信度
+CASCADE_MIN_OBJECT_SCORE = 0.3
+
+# 音频时间线标签对应的音频类型描述
+AUDIO_TYPE_NAMES = {"speech": "语音", "music": "音乐或强音频", "silence": "背景音或静音"}
+
+# 场景分类关键词（匹配画面描述，忽略大小写）
+SCENE_TYPE_KEYWORDS = {
+    "人物": ["人", "person"],
+    "建筑": ["建筑", "房"],
+    "自然": ["自然", "树", "山"],
+    "交通": ["车", "交通"],
+}
+
+# 解说词重要性评分词典：keyword 为重要性关键词，其余分类为标点、引号和人名等加分特征
+IMPORTANCE_KEYWORDS = {
+    "keyword": [
+        "重要", "关键", "核心", "主要", "突出", "显著", "明显",
+        "特别", "尤其", "值得注意", "需要", "必须", "应该",
+        "开始", "结束", "转折", "高潮", "精彩", "有趣", "惊喜",
+        "对话", "交流", "互动", "表情", "动作", "反应",
+        "AI", "人工智能", "技术", "学习", "成长", "发现",
+        "咖啡店", "书", "看", "说", "问", "答", "走进", "坐下",
+        "演示", "测试", "分析", "生成", "解说", "视频", "制作",
+        "神奇", "实用", "节省", "时间", "生动", "期待"
+    ],
+    # 问号或感叹号
+    "emphasis": ["？", "！", "?", "!"],
+    # 冒号（对话或解释）
+    "colon": ["：", ":"],
+    # 引号（对话）
+    "quote": ["“", "”", "\"", "'"],
+    # 人名
+    "name": ["小明", "小红"],
+}
+
+_scene_matcher = KeywordMatcher(SCENE_TYPE_KEYWORDS, ignore_case=True)
+_importance_matcher = KeywordMatcher(IMPORTANCE_KEYWORDS)
+
 class CloudVideoAnalysisAgent:
     """云端视频分析Agent - 使用百度AI和通义千问-VL"""
     
     def __init__(self):
         self.baidu_access_token = None
         self.token_expires_at = 0
+        self._token_lock = None
         
     async def _get_baidu_access_token(self) -> str:
         """获取百度AI访问令牌"""
         if self.baidu_access_token and time.time() < self.token_expires_at:
             return self.baidu_access_token
-            
+        
+        # 并发分析时只允许一个请求去刷新令牌
+        if self._token_lock is None:
+            self._token_lock = asyncio.Lock()
+        async with self._token_lock:
+            if self.baidu_access_token and time.time() < self.token_expires_at:
+                return self.baidu_access_token
+            return await self._refresh_baidu_access_token()
+    
+    async def _refresh_baidu_access_token(self) -> str:
+        """请求新的百度AI访问令牌"""
         if not settings.BAIDU_API_KEY or not settings.BAIDU_SECRET_KEY:
             raise ValueError("百度AI API密钥未配置")
             
@@ -46,7 +134,7 @@ class CloudVideoAnalysisAgent:
         }
         
         try:
-            response = requests.post(url, params=params, timeout=10)
+            response = await http_post(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -61,25 +149,78 @@ class CloudVideoAnalysisAgent:
             logger.error(f"获取百度访问令牌失败: {e}")
             raise
     
-    def _encode_image_to_base64(self, image_path: str) -> str:
-        """将图片编码为base64"""
-        with open(image_path, "rb") as f:
-            return base64.b64encode(f.read()).decode()
+    def _cache_version(self, provider: str, prompt_version: str) -> str:
+        """缓存版本包含图片预处理配置，调整尺寸或质量后不复用旧结果"""
+        return f"{prompt_version}/{get_image_profile(provider).key}"
+    
+    async def _prepare_image(self, frame: EncodedFrame, provider: str) -> EncodedFrame:
+        """按服务商配置缩放压缩图片（在线程池中执行）"""
+        loop = asyncio.get_event_loop()
+        return await loop.run_in_executor(None, prepare_image, frame, provider)
     
-    async def _analyze_image_with_baidu(self, image_path: str) -> Dict[str, Any]:
+    async def _get_cached_result(
+        self,
+        frame: EncodedFrame,
+        provider: str,
+        model: str,
+        prompt_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """查询视觉结果缓存（SQLite 查询和访问时间更新在线程池中执行）"""
+        cache = get_vision_cache()
+        if cache is None:
+            return None
+        version = self._cache_version(provider, prompt_version)
+        loop = asyncio.get_event_loop()
+        try:
+            return await loop.run_in_executor(
+                None, lambda: cache.get(frame.sha256, provider, model, version)
+            )
+        except Exception as e:
+            logger.warning(f"读取视觉缓存失败: {e}")
+            return None
+    
+    async def _cache_result(
+        self,
+        frame: EncodedFrame,
+        provider: str,
+        model: str,
+        prompt_version: str,
+        result: Dict[str, Any]
+    ):
+        """写入视觉结果缓存（仅缓存成功结果，在线程池中执行）"""
+        cache = get_vision_cache()
+        if cache is None:
+            return
+        version = self._cache_version(provider, prompt_version)
+        loop = asyncio.get_event_loop()
+        try:
+            await loop.run_in_executor(
+                None, lambda: cache.put(frame.sha256, provider, model, version, result)
+            )
+        except Exception as e:
+            logger.warning(f"写入视觉缓存失败: {e}")
+    
+    async def _analyze_image_with_baidu(self, frame: EncodedFrame) -> Dict[str, Any]:
         """使用百度AI分析图片"""
         try:
+            cached = await self._get_cached_result(
+                frame, "baidu_vision", BAIDU_VISION_MODEL, BAIDU_VISION_PROMPT_VERSION
+            )
+            if cached is not None:
+                return cached
+            
             access_token = await self._get_baidu_access_token()
             
             # 通用物体识别
             url = f"https://aip.baidubce.com/rest/2.0/image-classify/v2/advanced_general?access_token={access_token}"
             
-            image_b64 = self._encode_image_to_base64(image_path)
+            image = await self._prepare_image(frame, "baidu_vision")
             
             headers = {'Content-Type': 'application/x-www-form-urlencoded'}
-            data = {'image': image_b64}
+            data = {'image': image.b64}
             
-            response = requests.post(url, headers=headers, data=data, timeout=30)
+            await get_rate_limiter("baidu_vision").acquire()
+            response = await http_post(url, timeout_type="vision", headers=headers, data=data)
             response.raise_for_status()
             result = response.json()
             
@@ -92,11 +233,15 @@ class CloudVideoAnalysisAgent:
                         "description": item.get("root", "")
                     })
                 
-                return {
+                analysis = {
                     "objects": objects,
                     "scene_description": f"检测到{len(objects)}个物体",
                     "confidence": max([obj["confidence"] for obj in objects]) if objects else 0
                 }
+                await self._cache_result(
+                    frame, "baidu_vision", BAIDU_VISION_MODEL, BAIDU_VISION_PROMPT_VERSION, analysis
+                )
+                return analysis
             else:
                 logger.warning(f"百度AI分析结果异常: {result}")
                 return {"objects": [], "scene_description": "分析失败", "confidence": 0}
@@ -105,114 +250,606 @@ class CloudVideoAnalysisAgent:
             logger.error(f"百度AI图片分析失败: {e}")
             return {"objects": [], "scene_description": "分析失败", "confidence": 0}
     
-    async def _analyze_image_with_qwen_vl(self, image_path: str) -> Dict[str, Any]:
+    async def _request_qwen_vl(self, images: List[EncodedFrame], prompt: str) -> Optional[str]:
+        """
+        调用通义千问-VL，一条消息中可包含多张图片
+        
+        Returns:
+            模型回复文本，结果异常时返回 None
+        """
+        url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation"
+        
+        headers = {
+            "Authorization": f"Bearer {settings.QWEN_VL_API_KEY}",
+            "Content-Type": "application/json"
+        }
+        
+        content = [{"image": image.data_url} for image in images]
+        content.append({"text": prompt})
+        
+        payload = {
+            "model": QWEN_VL_MODEL,
+            "input": {
+                "messages": [
+                    {
+                        "role": "user",
+                        "content": content
+                    }
+                ]
+            },
+            "parameters": {
+                "result_format": "message"
+            }
+        }
+        
+        await get_rate_limiter("qwen_vl").acquire()
+        response = await http_post(url, timeout_type="vision", headers=headers, json=payload)
+        response.raise_for_status()
+        result = response.json()
+        
+        if "output" in result and "choices" in result["output"]:
+            message_content = result["output"]["choices"][0]["message"]["content"]
+            # 多模态接口返回的 content 可能是 [{"text": ...}] 列表
+            if isinstance(message_content, list):
+                message_content = "".join(item.get("text", "") for item in message_content)
+            return message_content
+        
+        logger.warning(f"通义千问-VL分析结果异常: {result}")
+        return None
+    
+    async def _analyze_image_with_qwen_vl(self, frame: EncodedFrame) -> Dict[str, Any]:
         """使用通义千问-VL分析图片"""
         try:
             if not settings.QWEN_VL_API_KEY:
                 return {"objects": [], "scene_description": "通义千问-VL未配置", "confidence": 0}
             
-            # 读取并编码图片
-            with open(image_path, "rb") as f:
-                image_data = base64.b64encode(f.read()).decode()
-            
-            url = "https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation"
-            
-            headers = {
-                "Authorization": f"Bearer {settings.QWEN_VL_API_KEY}",
-                "Content-Type": "application/json"
-            }
+            cached = await self._get_cached_result(frame, "qwen_vl", QWEN_VL_MODEL, QWEN_VL_PROMPT_VERSION)
+            if cached is not None:
+                return cached
             
-            payload = {
-                "model": "qwen-vl-plus",
-                "input": {
-                    "messages": [
-                        {
-                            "role": "user",
-                            "content": [
-                                {
-                                    "image": f"data:image/jpeg;base64,{image_data}"
-                                },
-                                {
-                                    "text": "请详细描述这张图片中的内容，包括主要物体、场景、人物动作等。用中文回答。"
-                                }
-                            ]
-                        }
-                    ]
-                },
-                "parameters": {
-                    "result_format": "message"
-                }
-            }
+            image = await self._prepare_image(frame, "qwen_vl")
+            description = await self._request_qwen_vl([image], QWEN_VL_PROMPT)
             
-            response = requests.post(url, headers=headers, json=payload, timeout=30)
-            response.raise_for_status()
-            result = response.json()
-            
-            if "output" in result and "choices" in result["output"]:
-                description = result["output"]["choices"][0]["message"]["content"]
-                return {
+            if description is not None:
+                analysis = {
                     "objects": [],  # 通义千问-VL主要提供描述
                     "scene_description": description,
                     "confidence": 0.8
                 }
+                await self._cache_result(frame, "qwen_vl", QWEN_VL_MODEL, QWEN_VL_PROMPT_VERSION, analysis)
+                return analysis
             else:
-                logger.warning(f"通义千问-VL分析结果异常: {result}")
                 return {"objects": [], "scene_description": "分析失败", "confidence": 0}
                 
         except Exception as e:
             logger.error(f"通义千问-VL图片分析失败: {e}")
             return {"objects": [], "scene_description": "分析失败", "confidence": 0}
     
-    async def _analyze_single_frame(self, frame_path: str, timestamp: float) -> Dict[str, Any]:
-        """分析单个视频帧"""
-        # 优先使用通义千问-VL，备用百度AI
-        qwen_result = await self._analyze_image_with_qwen_vl(frame_path)
-        baidu_result = await self._analyze_image_with_baidu(frame_path)
+    def _split_batch_descriptions(self, text: str, count: int) -> Dict[int, str]:
+        """按"图N:"标记拆分批量描述，返回 {图片序号(从0开始): 描述}"""
+        descriptions = {}
+        parts = re.split(r"(?:^|\n)\s*[*#]*\s*图\s*(\d+)\s*[*]*\s*[:：]", text)
+        # parts: [前导文本, 序号, 描述, 序号, 描述, ...]
+        for number, description in zip(parts[1::2], parts[2::2]):
+            index = int(number) - 1
+            description = description.strip().lstrip("*").strip()
+            if 0 <= index < count and description and index not in descriptions:
+                descriptions[index] = description
+        return descriptions
+    
+    async def _analyze_images_with_qwen_vl_batch(self, frames: List[EncodedFrame]) -> List[Dict[str, Any]]:
+        """
+        批量使用通义千问-VL分析多张图片（一次请求）
+        
+        回复按"图N:"拆分回各帧；未能拆分出描述的帧单独重试。
+        """
+        if not settings.QWEN_VL_API_KEY or len(frames) == 1:
+            return [await self._analyze_image_with_qwen_vl(frame) for frame in frames]
+        
+        results: List[Optional[Dict[str, Any]]] = list(await asyncio.gather(*(
+            self._get_cached_result(frame, "qwen_vl", QWEN_VL_MODEL, QWEN_VL_PROMPT_VERSION)
+            for frame in frames
+        )))
+        pending = [i for i, result in enumerate(results) if result is None]
         
-        # 合并结果
-        scene_description = qwen_result.get("scene_description", "") or baidu_result.get("scene_description", "")
+        if len(pending) > 1:
+            try:
+                images = [await self._prepare_image(frames[i], "qwen_vl") for i in pending]
+                text = await self._request_qwen_vl(images, QWEN_VL_BATCH_PROMPT.format(count=len(images)))
+                descriptions = self._split_batch_descriptions(text or "", len(images))
+                
+                for position, index in enumerate(pending):
+                    if position in descriptions:
+                        analysis = {
+                            "objects": [],
+                            "scene_description": descriptions[position],
+                            "confidence": 0.8
+                        }
+                        await self._cache_result(
+                            frames[index], "qwen_vl", QWEN_VL_MODEL, QWEN_VL_PROMPT_VERSION, analysis
+                        )
+                        results[index] = analysis
+                
+                if len(descriptions) < len(images):
+                    logger.warning(f"通义千问-VL批量结果仅解析出{len(descriptions)}/{len(images)}张，其余单独分析")
+                    
+            except Exception as e:
+                logger.error(f"通义千问-VL批量分析失败，改为逐张分析: {e}")
+        
+        for index, result in enumerate(results):
+            if result is None:
+                results[index] = await self._analyze_image_with_qwen_vl(frames[index])
+        
+        return results
+    
+    def _merge_frame_results(
+        self,
+        frame: EncodedFrame,
+        qwen_result: Dict[str, Any],
+        baidu_result: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        """合并各服务的单帧分析结果，优先采用通义千问-VL的描述，其失败时退回百度AI"""
+        if qwen_result.get("confidence", 0) <= 0 and baidu_result.get("confidence", 0) > 0:
+            scene_description = baidu_result.get("scene_description", "")
+        else:
+            scene_description = qwen_result.get("scene_description", "") or baidu_result.get("scene_description", "")
         objects = baidu_result.get("objects", [])
         confidence = max(qwen_result.get("confidence", 0), baidu_result.get("confidence", 0))
         
         return {
-            "timestamp": timestamp,
+            "timestamp": frame.timestamp,
             "scene_description": scene_description,
             "objects": objects,
             "confidence": confidence,
-            "frame_path": frame_path
+            "frame_path": frame.path
         }
     
-    async def _extract_audio_features(self, video_path: str) -> Dict[str, Any]:
-        """提取音频特征（简化版本）"""
+    async def _run_providers(
+        self,
+        frames: List[EncodedFrame],
+        qwen_call: Awaitable[List[Dict[str, Any]]],
+        baidu_call: Awaitable[List[Dict[str, Any]]]
+    ) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        并发调用通义千问-VL和百度AI
+        
+        每个服务有独立超时，失败或超时的一方按"分析失败"处理，不影响另一方。
+        开启 vision_first_description_wins 时，通义千问-VL为本批每一帧都给出有效描述后即取消百度AI；
+        百度AI先完成时不会取消通义千问-VL（检测结果不能替代场景描述）。
+        
+        Returns:
+            (通义千问-VL结果列表, 百度AI结果列表)
+        """
+        timeouts = settings.vision_provider_timeouts
+        tasks = {
+            "qwen_vl": asyncio.ensure_future(asyncio.wait_for(qwen_call, timeouts["qwen_vl"])),
+            "baidu_vision": asyncio.ensure_future(asyncio.wait_for(baidu_call, timeouts["baidu_vision"]))
+        }
+        results = {provider: [dict(PROVIDER_FAILED) for _ in frames] for provider in tasks}
+        
+        def collect(provider: str, task: asyncio.Future) -> bool:
+            """记录结果，返回是否为通义千问-VL且本批每一帧都得到了有效描述"""
+            if task.cancelled():
+                return False
+            error = task.exception()
+            if error is not None:
+                if isinstance(error, asyncio.TimeoutError):
+                    logger.warning(f"{provider}分析超时({timeouts[provider]}秒)，忽略该服务结果")
+                else:
+                    logger.error(f"{provider}分析失败: {error}")
+                return False
+            results[provider] = task.result()
+            return provider == "qwen_vl" and all(
+                r.get("confidence", 0) > 0 and r.get("scene_description", "").strip()
+                for r in results[provider]
+            )
+        
         try:
-            # 提取音频
-            audio_path = await extract_audio_from_video(video_path)
-            if not audio_path or not Path(audio_path).exists():
-                return {"has_audio": False, "duration": 0, "description": "无音频"}
-            
-            # 获取音频基本信息
-            import librosa
-            y, sr = librosa.load(audio_path, duration=30)  # 只分析前30秒
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                succeeded = [
+                    collect(provider, task) for provider, task in tasks.items() if task in done
+                ]
+                if settings.vision_first_description_wins and any(succeeded) and pending:
+                    for task in pending:
+                        task.cancel()
+                    break
+        finally:
+            for task in tasks.values():
+                if not task.done():
+                    task.cancel()
+        
+        return results["qwen_vl"], results["baidu_vision"]
+    
+    async def _analyze_single_frame(self, frame: EncodedFrame) -> Dict[str, Any]:
+        """分析单个视频帧（各服务并发调用，共用同一份编码数据）"""
+        return (await self._analyze_frame_batch([frame]))[0]
+    
+    async def _describe_frames(self, frames: List[EncodedFrame]) -> List[Dict[str, Any]]:
+        """通义千问-VL描述一组视频帧（多帧时合并为一次请求）"""
+        if len(frames) == 1:
+            return [await self._analyze_image_with_qwen_vl(frames[0])]
+        return await self._analyze_images_with_qwen_vl_batch(frames)
+    
+    async def _analyze_frame_batch(self, frames: List[EncodedFrame]) -> List[Dict[str, Any]]:
+        """分析一组视频帧：通义千问-VL一次请求，百度AI逐帧识别，两个服务并发进行"""
+        async def baidu_call():
+            return list(await asyncio.gather(*(self._analyze_image_with_baidu(frame) for frame in frames)))
+        
+        qwen_results, baidu_results = await self._run_providers(frames, self._describe_frames(frames), baidu_call())
+        
+        return [
+            self._merge_frame_results(frame, qwen_result, baidu_result)
+            for frame, qwen_result, baidu_result in zip(frames, qwen_results, baidu_results)
+        ]
+    
+    def _build_batches(self, frames: List[Dict[str, Any]], indices: List[int]) -> List[List[int]]:
+        """
+        将待分析帧分批：同一镜头的相邻帧合为一批，每批不超过 QWEN_VL_BATCH_SIZE
+        
+        没有镜头信息时按相邻帧分批
+        """
+        batch_size = max(1, settings.qwen_vl_batch_size)
+        batches: List[List[int]] = []
+        for index in indices:
+            shot_index = frames[index].get("shot_index")
+            if (
+                batches
+                and len(batches[-1]) < batch_size
+                and frames[batches[-1][-1]].get("shot_index") == shot_index
+            ):
+                batches[-1].append(index)
+            else:
+                batches.append([index])
+        return batches
+    
+    def _is_novel_frame(
+        self,
+        signature: Tuple[Any, Any],
+        reference_signature: Tuple[Any, Any],
+        result: Dict[str, Any],
+        reference_result: Dict[str, Any]
+    ) -> bool:
+        """级联模式：判断帧与上一描述帧相比是否有足够变化，需要调用通义千问-VL"""
+        visual_distance = float(signature_distance(*signature, *reference_signature))
+        if visual_distance > settings.cascade_signature_threshold:
+            return True
+        
+        names = {o["name"] for o in result.get("objects", []) if o.get("confidence", 0) >= CASCADE_MIN_OBJECT_SCORE}
+        reference_names = {
+            o["name"] for o in reference_result.get("objects", []) if o.get("confidence", 0) >= CASCADE_MIN_OBJECT_SCORE
+        }
+        # 任一帧没有可用的识别结果时只按画面特征判断
+        if names and reference_names:
+            object_distance = 1 - len(names & reference_names) / len(names | reference_names)
+            return object_distance > settings.cascade_object_threshold
+        return False
+    
+    async def _screen_frames(
+        self,
+        frames: List[Dict[str, Any]],
+        indices: List[int],
+        semaphore: asyncio.Semaphore,
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        progress_start: float = 0.0,
+        progress_span: float = 1.0
+    ) -> Tuple[Dict[int, Dict[str, Any]], Dict[int, int]]:
+        """
+        级联模式第一阶段：所有帧先经百度AI物体识别和本地画面特征筛查
+        
+        按时间顺序与上一描述帧比较，物体集合或画面特征变化超过阈值时才升级到通义千问-VL，
+        其余帧沿用上一描述帧的描述。
+        
+        Returns:
+            (各帧百度AI识别结果, 各帧描述来源帧序号)，需要升级的帧描述来源为自身
+        """
+        loop = asyncio.get_event_loop()
+        signatures = await loop.run_in_executor(
+            None,
+            lambda: [compute_frame_signature(frames[i]["frame"].to_array(4)) for i in indices]
+        )
+        
+        use_baidu = bool(settings.BAIDU_API_KEY)
+        
+        async def screen(index: int):
+            if not use_baidu:
+                return index, dict(PROVIDER_FAILED)
+            async with semaphore:
+                try:
+                    result = await asyncio.wait_for(
+                        self._analyze_image_with_baidu(frames[index]["frame"]),
+                        settings.vision_provider_timeouts["baidu_vision"]
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"baidu_vision筛查超时，帧{frames[index]['frame'].timestamp:.1f}s只按画面特征判断")
+                    result = dict(PROVIDER_FAILED)
+            return index, result
+        
+        screening: Dict[int, Dict[str, Any]] = {}
+        tasks = [asyncio.ensure_future(screen(index)) for index in indices]
+        try:
+            for future in asyncio.as_completed(tasks):
+                index, result = await future
+                screening[index] = result
+                if progress_callback:
+                    progress = progress_start + (len(screening) / len(indices)) * progress_span
+                    progress_callback(progress, f"已筛查{len(screening)}/{len(indices)}帧...")
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        sources: Dict[int, int] = {}
+        reference = None
+        for position, index in enumerate(indices):
+            if reference is None or self._is_novel_frame(
+                signatures[position], signatures[reference[0]], screening[index], screening[reference[1]]
+            ):
+                reference = (position, index)
+            sources[index] = reference[1]
+        
+        escalated = sum(1 for index, source in sources.items() if index == source)
+        logger.info(f"级联筛查: {len(indices)}帧中{escalated}帧需要通义千问-VL描述")
+        return screening, sources
+    
+    async def _analyze_frames_stream(
+        self,
+        frames: List[Dict[str, Any]],
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        progress_start: float = 0.0,
+        progress_span: float = 1.0
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        并发分析多个视频帧，每完成一批立即产出结果（产出顺序为完成顺序）
+        
+        并发数受 settings.max_concurrent_vision_requests 限制，
+        各服务商的调用频率由共享令牌桶控制。
+        开启去重时，与已分析帧感知哈希相近的帧直接复用其结果（标记 reused_from），
+        随代表帧一同产出。
+        通义千问-VL按镜头（或相邻帧）每 QWEN_VL_BATCH_SIZE 帧合并为一次请求。
+        级联模式下先对全部帧做低成本筛查，只有画面或物体明显变化的帧调用通义千问-VL（标记 escalated），
+        其余帧沿用上一描述帧的描述（标记 description_from）。
+        
+        Args:
+            frames: 帧信息列表，每项包含已编码帧 frame，其余字段原样合并到结果中
+            progress_callback: 进度回调函数
+            progress_start: 本阶段起始进度
+            progress_span: 本阶段占用的进度区间
             
-            # 计算基本特征
-            duration = len(y) / sr
-            rms_energy = float(librosa.feature.rms(y=y).mean())
-            zero_crossing_rate = float(librosa.feature.zero_crossing_rate(y).mean())
+        Yields:
+            单帧分析结果
+        """
+        if not frames:
+            return
+        
+        # 按时间顺序归组近似重复帧，只有代表帧会调用视觉服务
+        frames = sorted(frames, key=lambda x: x["frame"].timestamp)
+        if settings.enable_frame_dedup:
+            groups = group_near_duplicates(
+                [frame_info["frame"].dhash for frame_info in frames],
+                settings.frame_dedup_threshold,
+                colors=[frame_info["frame"].mean_color for frame_info in frames]
+            )
+        else:
+            groups = list(range(len(frames)))
+        representatives = sorted(set(groups))
+        
+        duplicates: Dict[int, List[int]] = {}
+        for index, representative in enumerate(groups):
+            if representative != index:
+                duplicates.setdefault(representative, []).append(index)
+                # 复用结果的帧不会上传，不再需要为其生成预处理版本
+                frames[index]["frame"].release_source()
+        
+        semaphore = asyncio.Semaphore(max(1, settings.max_concurrent_vision_requests))
+        
+        # 级联模式：先筛查，只有新画面升级到通义千问-VL，其余帧跟随其描述来源帧产出
+        cascade = settings.vision_cascade_mode
+        screening: Dict[int, Dict[str, Any]] = {}
+        followers: Dict[int, List[int]] = {}
+        work = representatives
+        if cascade:
+            screening, sources = await self._screen_frames(
+                frames, representatives, semaphore,
+                progress_callback, progress_start, progress_span / 2
+            )
+            progress_start += progress_span / 2
+            progress_span /= 2
+            work = [index for index in representatives if sources[index] == index]
+            for index in representatives:
+                if sources[index] != index:
+                    followers.setdefault(sources[index], []).append(index)
+                    frames[index]["frame"].release_source()
+        
+        # 通义千问-VL按镜头或相邻帧批量请求
+        batches = self._build_batches(frames, work)
+        total = len(work)
+        
+        descriptions: Dict[int, Dict[str, Any]] = {}
+        
+        async def analyze(batch: List[int]):
+            batch_frames = [frames[i]["frame"] for i in batch]
+            async with semaphore:
+                if not cascade:
+                    return batch, await self._analyze_frame_batch(batch_frames)
+                try:
+                    batch_descriptions = await asyncio.wait_for(
+                        self._describe_frames(batch_frames), settings.vision_provider_timeouts["qwen_vl"]
+                    )
+                except asyncio.TimeoutError:
+                    logger.warning(f"qwen_vl分析超时({settings.vision_provider_timeouts['qwen_vl']}秒)，忽略该服务结果")
+                    batch_descriptions = [dict(PROVIDER_FAILED) for _ in batch]
             
-            # 简单判断音频类型
-            if rms_energy > 0.02:
-                audio_type = "音乐或强音频"
-            elif zero_crossing_rate > 0.1:
-                audio_type = "语音"
+            descriptions.update(zip(batch, batch_descriptions))
+            batch_analyses = []
+            for index, frame, description in zip(batch, batch_frames, batch_descriptions):
+                analysis = self._merge_frame_results(frame, description, screening[index])
+                analysis["escalated"] = True
+                batch_analyses.append(analysis)
+            return batch, batch_analyses
+        
+        def follow(index: int, source: int) -> Dict[str, Any]:
+            """沿用描述来源帧的通义千问-VL描述，物体识别使用本帧结果"""
+            description = descriptions[source]
+            if description.get("confidence", 0) <= 0:
+                description = PROVIDER_FAILED
+            analysis = self._merge_frame_results(frames[index]["frame"], description, screening[index])
+            analysis["escalated"] = False
+            if description is not PROVIDER_FAILED:
+                analysis["description_from"] = frames[source]["frame"].timestamp
+            return analysis
+        
+        analyses: Dict[int, Dict[str, Any]] = {}
+        
+        def build_result(index: int) -> Dict[str, Any]:
+            frame_info = frames[index]
+            representative = groups[index]
+            if representative == index:
+                analysis = dict(analyses[index])
             else:
-                audio_type = "背景音或静音"
+                # 复用代表帧的分析结果，时间戳和帧路径使用本帧
+                frame = frame_info["frame"]
+                analysis = copy.deepcopy(analyses[representative])
+                analysis["timestamp"] = frame.timestamp
+                analysis["frame_path"] = frame.path
+                analysis["reused_from"] = analyses[representative]["timestamp"]
+            
+            extra = {k: v for k, v in frame_info.items() if k != "frame" and k not in analysis}
+            analysis.update(extra)
+            return analysis
+        
+        tasks = [asyncio.ensure_future(analyze(batch)) for batch in batches]
+        
+        try:
+            done = 0
+            for future in asyncio.as_completed(tasks):
+                batch, batch_analyses = await future
+                analyses.update(zip(batch, batch_analyses))
+                done += len(batch)
+                
+                if progress_callback:
+                    progress = progress_start + (done / total) * progress_span
+                    progress_callback(progress, f"已分析{done}/{total}帧...")
+                
+                for index in batch:
+                    for member in [index] + followers.get(index, []):
+                        if member != index:
+                            analyses[member] = follow(member, index)
+                        yield build_result(member)
+                        for duplicate in duplicates.get(member, []):
+                            yield build_result(duplicate)
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+        
+        if len(representatives) < len(frames):
+            logger.info(f"近似重复帧去重: {len(frames)}帧中{len(frames) - len(representatives)}帧复用已有结果")
+    
+    async def _analyze_frames(
+        self,
+        frames: List[Dict[str, Any]],
+        progress_callback: Optional[Callable[[float, str], None]] = None,
+        progress_start: float = 0.0,
+        progress_span: float = 1.0
+    ) -> List[Dict[str, Any]]:
+        """
+        并发分析多个视频帧，全部完成后返回
+        
+        Returns:
+            按时间戳排序的帧分析结果列表
+        """
+        results = [
+            analysis async for analysis in self._analyze_frames_stream(
+                frames, progress_callback, progress_start, progress_span
+            )
+        ]
+        return sorted(results, key=lambda x: x["timestamp"])
+    
+    def _log_payload_summary(self, frames: List[EncodedFrame]) -> Dict[str, Any]:
+        """统计并记录各服务商上传的图片体积"""
+        summary = summarize_payloads(frames)
+        for provider, item in summary.items():
+            ratio = item["sent_bytes"] / item["original_bytes"] if item["original_bytes"] else 0
+            logger.info(
+                f"{provider}上传图片: {item['frames']}张, 平均{item['avg_kb']}KB "
+                f"(原图的{ratio:.0%}, 配置{item['profile']})"
+            )
+        return summary
+    
+    def _get_cache_stats(self) -> Dict[str, Any]:
+        """视觉结果缓存统计"""
+        cache = get_vision_cache()
+        if cache is None:
+            return {"enabled": False}
+        return {"enabled": True, **cache.stats()}
+    
+    def _get_dedup_stats(self, frame_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """统计去重节省的视觉API调用次数"""
+        reused = sum(1 for frame in frame_analyses if "reused_from" in frame)
+        providers = int(bool(settings.QWEN_VL_API_KEY)) + int(bool(settings.BAIDU_API_KEY))
+        return {
+            "enabled": settings.enable_frame_dedup,
+            "threshold": settings.frame_dedup_threshold,
+            "frames_reused": reused,
+            "api_calls_saved": reused * providers
+        }
+    
+    def _get_cascade_stats(self, frame_analyses: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """统计级联模式下升级到通义千问-VL的帧数"""
+        if not settings.vision_cascade_mode:
+            return {"enabled": False}
+        screened = [frame for frame in frame_analyses if "reused_from" not in frame]
+        escalated = sum(1 for frame in screened if frame.get("escalated"))
+        return {
+            "enabled": True,
+            "signature_threshold": settings.cascade_signature_threshold,
+            "object_threshold": settings.cascade_object_threshold,
+            "frames_screened": len(screened),
+            "frames_escalated": escalated,
+            "vlm_calls_saved": len(screened) - escalated
+        }
+    
+    async def _extract_audio_features(self, video_path: str) -> Dict[str, Any]:
+        """
+        提取音频特征
+        
+        流式读取完整音轨，按窗口计算能量、过零率并标注语音/音乐/静音，
+        返回全片时间线及合并后的片段。
+        """
+        try:
+            loop = asyncio.get_event_loop()
+            timeline = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    analyze_media_audio,
+                    video_path,
+                    sample_rate=settings.audio_analysis_sample_rate,
+                    window_seconds=settings.audio_analysis_window,
+                    silence_db=settings.audio_silence_db
+                )
+            )
+            if timeline.duration <= 0:
+                return {"has_audio": False, "duration": 0, "description": "无音频"}
+            
+            ratios = timeline.label_ratios()
+            dominant = max(ratios, key=ratios.get)
+            audio_type = AUDIO_TYPE_NAMES[dominant]
             
             return {
                 "has_audio": True,
-                "duration": duration,
-                "energy": rms_energy,
+                "duration": timeline.duration,
+                "energy": float(timeline.rms.mean()),
+                "zero_crossing_rate": float(timeline.zcr.mean()),
                 "type": audio_type,
-                "description": f"音频时长{duration:.1f}秒，类型：{audio_type}"
+                "label_ratios": {name: round(ratio, 3) for name, ratio in ratios.items()},
+                "segments": timeline.segments(min_duration=settings.audio_analysis_window * 2),
+                "timeline": timeline.to_dict(),
+                "description": (
+                    f"音频时长{timeline.duration:.1f}秒，类型：{audio_type}"
+                    f"（语音{ratios['speech']:.0%}，音乐{ratios['music']:.0%}，静音{ratios['silence']:.0%}）"
+                )
             }
             
         except Exception as e:
@@ -234,6 +871,31 @@ class CloudVideoAnalysisAgent:
         Returns:
             分析结果字典
         """
+        result = None
+        async for event in self.analyze_video_stream(video_path, progress_callback):
+            if event["event"] == "result":
+                result = event["data"]
+        return result
+    
+    async def analyze_video_stream(
+        self,
+        video_path: str,
+        progress_callback: Optional[Callable[[float, str], None]] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        流式云端视频分析，每完成一帧即产出结果
+        
+        依次产出以下事件（{"event": 名称, "data": 数据}）：
+        video_info 视频基本信息；shots 镜头检测结果；
+        frame 单帧分析结果（按完成顺序）；result 完整分析结果（与 analyze_video 返回值相同）。
+        
+        Args:
+            video_path: 视频文件路径
+            progress_callback: 进度回调函数
+            
+        Yields:
+            分析事件字典
+        """
         try:
             if progress_callback:
                 progress_callback(0.0, "开始视频分析...")
@@ -242,49 +904,80 @@ class CloudVideoAnalysisAgent:
             if not video_path.exists():
                 raise FileNotFoundError(f"视频文件不存在: {video_path}")
             
-            # 获取视频基本信息
-            cap = cv2.VideoCapture(str(video_path))
-            if not cap.isOpened():
-                raise ValueError("无法打开视频文件")
-            
-            fps = cap.get(cv2.CAP_PROP_FPS)
-            frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-            duration = frame_count / fps if fps > 0 else 0
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-            cap.release()
+            # 获取视频基本信息（上传时通常已探测并缓存）
+            loop = asyncio.get_event_loop()
+            probe = await loop.run_in_executor(None, probe_video, str(video_path))
             
             if progress_callback:
-                progress_callback(0.1, f"视频信息: {duration:.1f}秒, {width}x{height}")
+                progress_callback(0.1, f"视频信息: {probe.duration:.1f}秒, {probe.width}x{probe.height}")
+            
+            video_info = {
+                "duration": probe.duration,
+                "fps": probe.fps,
+                "resolution": probe.resolution,
+                "frame_count": probe.frame_count,
+                "file_size": probe.size,
+                "codec": probe.codec,
+                "has_audio": probe.has_audio
+            }
+            yield {"event": "video_info", "data": video_info}
             
             # 提取关键帧
             if progress_callback:
                 progress_callback(0.2, "提取关键帧...")
             
-            frames = await extract_frames_from_video(
-                str(video_path),
-                interval=settings.FRAME_SAMPLE_INTERVAL,
-                max_frames=settings.MAX_FRAMES_PER_VIDEO
+            # 镜头检测和解码比较耗CPU，放到线程池中执行
+            extraction = await loop.run_in_executor(
+                None,
+                functools.partial(
+                    extract_keyframes,
+                    str(video_path),
+                    interval=settings.FRAME_SAMPLE_INTERVAL,
+                    max_frames=settings.MAX_FRAMES_PER_VIDEO,
+                    use_scene_detection=settings.enable_scene_detection,
+                    scene_threshold=settings.scene_change_threshold,
+                    analysis_fps=settings.scene_analysis_fps,
+                    min_shot_duration=settings.scene_min_shot_duration,
+                    max_keyframe_gap=settings.scene_max_keyframe_gap,
+                    output_dir=str(settings.TEMP_DIR / f"frames_{int(time.time())}"),
+                    persist=settings.save_intermediate_files
+                )
             )
+            frames = extraction["frames"]
+            shots = extraction["shots"]
             
             if not frames:
                 raise ValueError("无法提取视频帧")
             
             if progress_callback:
-                progress_callback(0.4, f"提取了{len(frames)}个关键帧")
+                if shots:
+                    progress_callback(0.4, f"检测到{len(shots)}个镜头，提取了{len(frames)}个关键帧")
+                else:
+                    progress_callback(0.4, f"提取了{len(frames)}个关键帧")
             
-            # 分析每个关键帧
+            yield {
+                "event": "shots",
+                "data": {
+                    "frame_selection": extraction["method"],
+                    "total_keyframes": len(frames),
+                    "shots": shots
+                }
+            }
+            
+            # 并发分析关键帧（限流由各服务商的令牌桶控制），每完成一帧立即推送
             frame_analyses = []
-            for i, (frame_path, timestamp) in enumerate(frames):
-                if progress_callback:
-                    progress = 0.4 + (i / len(frames)) * 0.4
-                    progress_callback(progress, f"分析第{i+1}/{len(frames)}帧...")
-                
-                frame_analysis = await self._analyze_single_frame(frame_path, timestamp)
-                frame_analyses.append(frame_analysis)
-                
-                # 避免API调用过于频繁
-                await asyncio.sleep(0.5)
+            async for analysis in self._analyze_frames_stream(
+                [
+                    {"frame": frame, "shot_index": shot_index}
+                    for frame, shot_index in zip(frames, extraction["frame_shots"])
+                ],
+                progress_callback,
+                progress_start=0.4,
+                progress_span=0.4
+            ):
+                frame_analyses.append(analysis)
+                yield {"event": "frame", "data": analysis}
+            frame_analyses.sort(key=lambda x: x["timestamp"])
             
             # 分析音频
             if progress_callback:
@@ -300,21 +993,16 @@ class CloudVideoAnalysisAgent:
             scene_types = {}
             all_objects = []
             
-            for frame in frame_analyses:
+            descriptions = [frame.get("scene_description", "") for frame in frame_analyses]
+            for frame, counts in zip(frame_analyses, _scene_matcher.count_batch(descriptions)):
                 # 统计物体
                 for obj in frame.get("objects", []):
                     all_objects.append(obj["name"])
                 
                 # 简单场景分类
-                description = frame.get("scene_description", "").lower()
-                if "人" in description or "person" in description:
-                    scene_types["人物"] = scene_types.get("人物", 0) + 1
-                if "建筑" in description or "房" in description:
-                    scene_types["建筑"] = scene_types.get("建筑", 0) + 1
-                if "自然" in description or "树" in description or "山" in description:
-                    scene_types["自然"] = scene_types.get("自然", 0) + 1
-                if "车" in description or "交通" in description:
-                    scene_types["交通"] = scene_types.get("交通", 0) + 1
+                for scene_type, hits in counts.items():
+                    if hits:
+                        scene_types[scene_type] = scene_types.get(scene_type, 0) + 1
             
             # 统计最常见的物体
             from collections import Counter
@@ -336,17 +1024,13 @@ class CloudVideoAnalysisAgent:
             key_moments = key_moments[:10]  # 取前10个
             
             result = {
-                "video_info": {
-                    "duration": duration,
-                    "fps": fps,
-                    "resolution": (width, height),
-                    "frame_count": frame_count,
-                    "file_size": video_path.stat().st_size
-                },
+                "video_info": video_info,
                 "frame_analysis": frame_analyses,
+                "shots": shots,
                 "audio_analysis": audio_analysis,
                 "summary": {
                     "total_frames_analyzed": len(frame_analyses),
+                    "total_shots": len(shots),
                     "scene_types": scene_types,
                     "top_objects": [{"name": name, "count": count} for name, count in top_objects],
                     "key_moments": key_moments,
@@ -357,6 +1041,12 @@ class CloudVideoAnalysisAgent:
                     "analysis_time": time.time(),
                     "frame_interval": settings.FRAME_SAMPLE_INTERVAL,
                     "max_frames": settings.MAX_FRAMES_PER_VIDEO,
+                    "frame_selection": extraction["method"],
+                    "qwen_vl_batch_size": settings.qwen_vl_batch_size,
+                    "dedup": self._get_dedup_stats(frame_analyses),
+                    "cascade": self._get_cascade_stats(frame_analyses),
+                    "vision_cache": self._get_cache_stats(),
+                    "image_payload": self._log_payload_summary(frames),
                     "services_used": []
                 }
             }
@@ -371,7 +1061,7 @@ class CloudVideoAnalysisAgent:
                 progress_callback(1.0, "视频分析完成!")
             
             logger.info(f"云端视频分析完成: {len(frame_analyses)}帧, {len(key_moments)}个关键时刻")
-            return result
+            yield {"event": "result", "data": result}
             
         except Exception as e:
             logger.error(f"云端视频分析失败: {e}")
@@ -437,72 +1127,69 @@ class CloudVideoAnalysisAgent:
             
             # 根据解说词确定关键时间点
             key_timestamps = []
-            for segment in narration_segments:
+            importances = self._calculate_importances([segment.get("text", "") for segment in narration_segments])
+            for segment, importance in zip(narration_segments, importances):
                 start_time = segment.get("start_time", 0)
                 end_time = segment.get("end_time", start_time + 5)
                 mid_time = (start_time + end_time) / 2
                 key_timestamps.append({
                     "timestamp": mid_time,
                     "narration": segment.get("text", ""),
-                    "importance": self._calculate_importance(segment.get("text", ""))
+                    "importance": importance
                 })
             
             if progress_callback:
                 progress_callback(0.3, "提取关键帧...")
             
-            # 提取关键帧
-            frames_dir = settings.TEMP_DIR / f"guided_frames_{int(time.time())}"
-            frames_dir.mkdir(exist_ok=True)
+            # 提取关键帧：时间点排序后单次顺序遍历，避免逐个随机定位
+            loop = asyncio.get_event_loop()
+            probe = await loop.run_in_executor(None, probe_video, video_path)
+            # 镜头检测与关键帧解码互不依赖，并行执行；镜头边界用于重点片段吸附
+            frames, shots = await asyncio.gather(
+                loop.run_in_executor(
+                    None,
+                    encode_frames_at,
+                    video_path,
+                    [key_point["timestamp"] for key_point in key_timestamps],
+                    probe.keyframe_indices
+                ),
+                self._detect_shots(video_path)
+            )
             
-            key_frames = []
-            cap = cv2.VideoCapture(video_path)
+            # 仅在需要保留中间文件时写入磁盘
+            if settings.save_intermediate_files:
+                frames_dir = settings.TEMP_DIR / f"guided_frames_{int(time.time())}"
+                for i, frame in enumerate(frames):
+                    if frame is not None:
+                        frame.save(str(frames_dir), i)
             
-            for i, key_point in enumerate(key_timestamps):
-                timestamp = key_point["timestamp"]
-                frame_path = frames_dir / f"frame_{i:04d}.jpg"
-                
-                # 提取指定时间点的帧
-                cap.set(cv2.CAP_PROP_POS_MSEC, timestamp * 1000)
-                ret, frame = cap.read()
-                if ret:
-                    cv2.imwrite(str(frame_path), frame)
+            key_frames = []
+            for key_point, frame in zip(key_timestamps, frames):
+                if frame is not None:
                     key_frames.append({
-                        "timestamp": timestamp,
-                        "frame_path": str(frame_path),
+                        "frame": frame,
                         "narration": key_point["narration"],
                         "importance": key_point["importance"]
                     })
             
-            cap.release()
-            
             if progress_callback:
                 progress_callback(0.6, "分析关键帧内容...")
             
-            # 分析关键帧
-            analyzed_frames = []
-            for i, frame_info in enumerate(key_frames):
-                if progress_callback:
-                    progress = 0.6 + (i / len(key_frames)) * 0.3
-                    progress_callback(progress, f"分析第{i+1}帧...")
-                
-                frame_analysis = await self._analyze_single_frame(
-                    frame_info["frame_path"],
-                    frame_info["timestamp"]
-                )
-                frame_analysis.update({
-                    "narration": frame_info["narration"],
-                    "importance": frame_info["importance"]
-                })
-                analyzed_frames.append(frame_analysis)
-                
-                # 避免API调用过于频繁
-                await asyncio.sleep(0.5)
+            # 并发分析关键帧，解说词和重要性随结果一并返回
+            analyzed_frames = await self._analyze_frames(
+                key_frames,
+                progress_callback,
+                progress_start=0.6,
+                progress_span=0.3
+            )
             
             if progress_callback:
                 progress_callback(0.9, "生成视频重点片段...")
             
             # 生成重点片段
-            highlights = self._generate_highlights(analyzed_frames, narration_segments)
+            highlights = self._generate_highlights(
+                analyzed_frames, narration_segments, duration=probe.duration, shots=shots
+            )
             
             if progress_callback:
                 progress_callback(1.0, "基于解说词的视频分析完成")
@@ -512,6 +1199,9 @@ class CloudVideoAnalysisAgent:
                 "key_frames": analyzed_frames,
                 "highlights": highlights,
                 "total_segments": len(narration_segments),
+                "dedup": self._get_dedup_stats(analyzed_frames),
+                "cascade": self._get_cascade_stats(analyzed_frames),
+                "image_payload": self._log_payload_summary([frame for frame in frames if frame is not None]),
                 "processing_time": time.time()
             }
             
@@ -521,125 +1211,105 @@ class CloudVideoAnalysisAgent:
     
     def _calculate_importance(self, text: str) -> float:
         """计算文本重要性"""
-        if not text:
-            return 0.5
-        
-        # 扩展重要性关键词
-        important_keywords = [
-            "重要", "关键", "核心", "主要", "突出", "显著", "明显",
-            "特别", "尤其", "值得注意", "需要", "必须", "应该",
-            "开始", "结束", "转折", "高潮", "精彩", "有趣", "惊喜",
-            "对话", "交流", "互动", "表情", "动作", "反应",
-            "AI", "人工智能", "技术", "学习", "成长", "发现",
-            "咖啡店", "书", "看", "说", "问", "答", "走进", "坐下",
-            "演示", "测试", "分析", "生成", "解说", "视频", "制作",
-            "神奇", "实用", "节省", "时间", "生动", "有趣", "期待"
-        ]
-        
-        importance = 0.7  # 进一步提高基础重要性
-        
-        # 关键词匹配
-        keyword_count = 0
-        for keyword in important_keywords:
-            if keyword in text:
+        return self._calculate_importances([text])[0]
+
+    def _calculate_importances(self, texts: List[str]) -> List[float]:
+        """批量计算文本重要性，所有评分特征由关键词自动机单次扫描得到"""
+        importances = []
+        for text, counts in zip(texts, _importance_matcher.count_batch(texts)):
+            if not text:
+                importances.append(0.5)
+                continue
+            
+            importance = 0.7  # 进一步提高基础重要性
+            
+            # 关键词匹配
+            importance += 0.1 * counts["keyword"]
+            
+            # 多个关键词额外加分
+            if counts["keyword"] >= 2:
                 importance += 0.1
-                keyword_count += 1
-        
-        # 多个关键词额外加分
-        if keyword_count >= 2:
-            importance += 0.1
-        
-        # 根据文本长度调整
-        text_length = len(text)
-        if text_length > 20:
-            importance += 0.05
-        if text_length > 40:
-            importance += 0.05
-        
-        # 包含问号或感叹号的文本通常更重要
-        if "？" in text or "！" in text or "?" in text or "!" in text:
-            importance += 0.1
-        
-        # 包含冒号的文本（对话或解释）通常更重要
-        if "：" in text or ":" in text:
-            importance += 0.1
-        
-        # 包含引号的文本（对话）通常更重要
-        if """ in text or """ in text or "\"" in text or "'" in text:
-            importance += 0.1
-        
-        # 包含人名的文本更重要
-        if "小明" in text or "小红" in text:
-            importance += 0.1
-        
-        return min(importance, 1.0)
+            
+            # 根据文本长度调整
+            text_length = len(text)
+            if text_length > 20:
+                importance += 0.05
+            if text_length > 40:
+                importance += 0.05
+            
+            # 包含问号或感叹号、冒号、引号或人名的文本通常更重要
+            for feature in ("emphasis", "colon", "quote", "name"):
+                if counts[feature]:
+                    importance += 0.1
+            
+            importances.append(min(importance, 1.0))
+        return importances
     
-    def _generate_highlights(self, analyzed_frames: List[Dict[str, Any]], narration_segments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-        """生成视频重点片段"""
-        highlights = []
-        
+    async def _detect_shots(self, video_path: str) -> Optional[List[Dict[str, Any]]]:
+        """在线程池中检测镜头边界，未启用或失败时返回 None"""
+        if not settings.enable_scene_detection:
+            return None
+        try:
+            detection = await asyncio.get_event_loop().run_in_executor(
+                None,
+                functools.partial(
+                    detect_scene_keyframes,
+                    video_path,
+                    max_frames=settings.MAX_FRAMES_PER_VIDEO,
+                    analysis_fps=settings.scene_analysis_fps,
+                    threshold=settings.scene_change_threshold,
+                    min_shot_duration=settings.scene_min_shot_duration,
+                    max_keyframe_gap=settings.scene_max_keyframe_gap
+                )
+            )
+        except Exception as e:
+            logger.warning(f"镜头检测失败，重点片段不做边界吸附: {e}")
+            return None
+        return detection["shots"]
+
+    def _generate_highlights(
+        self,
+        analyzed_frames: List[Dict[str, Any]],
+        narration_segments: List[Dict[str, Any]],
+        duration: Optional[float] = None,
+        shots: Optional[List[Dict[str, Any]]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        生成视频重点片段
+
+        以分析帧为关键时刻生成窗口，吸附到镜头边界并合并重叠窗口，
+        在 settings.highlight_target_duration 预算内选出总重要性最高的片段组合。
+        """
         if not analyzed_frames:
             logger.warning("没有分析帧数据，无法生成重点片段")
-            return highlights
-        
-        # 根据重要性排序
-        sorted_frames = sorted(analyzed_frames, key=lambda x: x.get("importance", 0), reverse=True)
-        
-        # 确保至少生成一些片段，即使重要性不高
-        min_highlights = min(3, len(sorted_frames))  # 至少3个片段
-        max_highlights = min(6, len(sorted_frames))  # 最多6个片段
-        
-        # 降低重要性阈值，确保能生成片段
-        importance_threshold = 0.6  # 降低阈值
-        
-        # 选择重要片段
-        selected_count = 0
-        for i, frame in enumerate(sorted_frames):
-            # 如果重要性足够高，或者还没有达到最小数量要求
-            if frame.get("importance", 0) >= importance_threshold or selected_count < min_highlights:
-                highlight = {
-                    "start": max(0, frame["timestamp"] - 2),  # 片段开始时间
-                    "end": frame["timestamp"] + 3,  # 片段结束时间
-                    "importance": frame.get("importance", 0),
-                    "description": frame.get("scene_description", "视频片段"),
-                    "narration": frame.get("narration", ""),
-                    "rank": selected_count + 1,
-                    "timestamp": frame["timestamp"]
-                }
-                highlights.append(highlight)
-                selected_count += 1
-                
-                if selected_count >= max_highlights:
-                    break
-        
-        # 如果还是没有足够的片段，降低标准继续选择
-        if selected_count < min_highlights:
-            logger.info(f"重要性阈值{importance_threshold}只选出{selected_count}个片段，降低标准继续选择")
-            for i, frame in enumerate(sorted_frames):
-                if selected_count >= min_highlights:
-                    break
-                    
-                # 检查是否已经选择过
-                already_selected = any(h["timestamp"] == frame["timestamp"] for h in highlights)
-                if not already_selected:
-                    highlight = {
-                        "start": max(0, frame["timestamp"] - 2),
-                        "end": frame["timestamp"] + 3,
-                        "importance": frame.get("importance", 0),
-                        "description": frame.get("scene_description", "视频片段"),
-                        "narration": frame.get("narration", ""),
-                        "rank": selected_count + 1,
-                        "timestamp": frame["timestamp"]
-                    }
-                    highlights.append(highlight)
-                    selected_count += 1
-        
-        # 按时间顺序排序
-        highlights.sort(key=lambda x: x["start"])
-        
-        # 重新分配排名
-        for i, highlight in enumerate(highlights):
-            highlight["rank"] = i + 1
-        
-        logger.info(f"生成了{len(highlights)}个重点片段，重要性范围: {min([h['importance'] for h in highlights]):.2f} - {max([h['importance'] for h in highlights]):.2f}")
-        return highlights
\ No newline at end of file
+            return []
+
+        windows = generate_highlights(
+            analyzed_frames,
+            target_duration=settings.highlight_target_duration,
+            before=settings.highlight_pre_seconds,
+            after=settings.highlight_post_seconds,
+            duration=duration,
+            shots=shots
+        )
+
+        highlights = []
+        for rank, window in enumerate(windows, start=1):
+            best = window.best
+            highlights.append({
+                "start": window.start,
+                "end": window.end,
+                "importance": best.get("importance", 0),
+                "description": best.get("scene_description", "视频片段"),
+                "narration": best.get("narration", ""),
+                "rank": rank,
+                "timestamp": best["timestamp"],
+                "moment_count": len(window.moments)
+            })
+
+        if highlights:
+            logger.info(
+                f"生成了{len(highlights)}个重点片段，总时长{sum(h['end'] - h['start'] for h in highlights):.1f}秒，"
+                f"重要性范围: {min(h['importance'] for h in highlights):.2f} - {max(h['importance'] for h in highlights):.2f}"
+            )
+        return highlights
@@ -5,8 +5,42 @@ import logging
 from typing import List, Dict, Any, Optional, Callable
 import chardet
 
+try:
+    from ..utils.keyword_matcher import KeywordMatcher
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.keyword_matcher import KeywordMatcher
+
 logger = logging.getLogger(__name__)
 
+# 主题关键词
+THEME_KEYWORDS = {
+    "爱情": ["爱情", "恋爱", "喜欢", "爱", "情侣", "约会", "表白", "心动"],
+    "友情": ["朋友", "友谊", "友情", "伙伴", "同伴", "兄弟", "姐妹", "闺蜜"],
+    "家庭": ["家庭", "父母", "孩子", "家人", "亲情", "家", "爸爸", "妈妈"],
+    "工作": ["工作", "职业", "事业", "公司", "老板", "同事", "项目", "会议"],
+    "学习": ["学习", "学校", "老师", "学生", "考试", "知识", "课程", "作业"],
+    "冒险": ["冒险", "探险", "旅行", "发现", "挑战", "勇气", "未知", "探索"],
+    "悬疑": ["秘密", "谜团", "调查", "真相", "线索", "推理", "神秘", "隐藏"],
+    "成长": ["成长", "改变", "学会", "明白", "成熟", "经历", "感悟", "蜕变"]
+}
+
+# 情感关键词
+EMOTION_KEYWORDS = {
+    "开心": ["开心", "高兴", "快乐", "兴奋", "愉快", "欢乐", "笑", "哈哈"],
+    "悲伤": ["悲伤", "难过", "伤心", "痛苦", "哭", "眼泪", "失落", "沮丧"],
+    "愤怒": ["愤怒", "生气", "恼火", "暴怒", "气愤", "讨厌", "烦躁", "愤慨"],
+    "惊讶": ["惊讶", "震惊", "吃惊", "意外", "惊奇", "不敢相信", "天哪", "哇"],
+    "恐惧": ["害怕", "恐惧", "担心", "紧张", "焦虑", "恐慌", "可怕", "吓人"],
+    "感动": ["感动", "温暖", "感激", "谢谢", "温馨", "暖心", "触动", "感谢"]
+}
+
+_theme_matcher = KeywordMatcher(THEME_KEYWORDS)
+_emotion_matcher = KeywordMatcher(EMOTION_KEYWORDS)
+
 class SubtitleAgent:
     """字幕处理代理"""
     
@@ -406,47 +440,11 @@ class SubtitleAgent:
     
     def _extract_themes(self, text: str) -> List[str]:
         """提取主题"""
-        themes = []
-        
-        theme_keywords = {
-            "爱情": ["爱情", "恋爱", "喜欢", "爱", "情侣", "约会", "表白", "心动"],
-            "友情": ["朋友", "友谊", "友情", "伙伴", "同伴", "兄弟", "姐妹", "闺蜜"],
-            "家庭": ["家庭", "父母", "孩子", "家人", "亲情", "家", "爸爸", "妈妈"],
-            "工作": ["工作", "职业", "事业", "公司", "老板", "同事", "项目", "会议"],
-            "学习": ["学习", "学校", "老师", "学生", "考试", "知识", "课程", "作业"],
-            "冒险": ["冒险", "探险", "旅行", "发现", "挑战", "勇气", "未知", "探索"],
-            "悬疑": ["秘密", "谜团", "调查", "真相", "线索", "推理", "神秘", "隐藏"],
-            "成长": ["成长", "改变", "学会", "明白", "成熟", "经历", "感悟", "蜕变"]
-        }
-        
-        for theme, keywords in theme_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    themes.append(theme)
-                    break
-        
-        return themes
+        return _theme_matcher.match_categories(text)
     
     def _analyze_emotions(self, text: str) -> List[str]:
         """分析情感"""
-        emotions = []
-        
-        emotion_keywords = {
-            "开心": ["开心", "高兴", "快乐", "兴奋", "愉快", "欢乐", "笑", "哈哈"],
-            "悲伤": ["悲伤", "难过", "伤心", "痛苦", "哭", "眼泪", "失落", "沮丧"],
-            "愤怒": ["愤怒", "生气", "恼火", "暴怒", "气愤", "讨厌", "烦躁", "愤慨"],
-            "惊讶": ["惊讶", "震惊", "吃惊", "意外", "惊奇", "不敢相信", "天哪", "哇"],
-            "恐惧": ["害怕", "恐惧", "担心", "紧张", "焦虑", "恐慌", "可怕", "吓人"],
-            "感动": ["感动", "温暖", "感激", "谢谢", "温馨", "暖心", "触动", "感谢"]
-        }
-        
-        for emotion, keywords in emotion_keywords.items():
-            for keyword in keywords:
-                if keyword in text:
-                    emotions.append(emotion)
-                    break
-        
-        return list(set(emotions))
+        return _emotion_matcher.match_categories(text)
     
     def _extract_key_phrases(self, text: str) -> List[str]:
         """提取关键短语"""
@@ -1,9 +1,11 @@
+import asyncio
 import time
 import logging
 import re
 from typing import Dict, Any, List, Optional, Callable
-import requests
 from src.config.cloud_settings import settings
+from src.utils.http_client import http_post
+from src.utils.speech_rate import get_speech_rate_model
 
 logger = logging.getLogger(__name__)
 
@@ -71,6 +73,7 @@ class SubtitleNarrationAgent:
             
             # 解析解说文本为段落
             narration_segments = self._parse_narration_segments(narration_text, subtitle_segments)
+            speech_rate_model = await asyncio.get_event_loop().run_in_executor(None, get_speech_rate_model)
             
             # 生成结果
             result = {
@@ -86,7 +89,9 @@ class SubtitleNarrationAgent:
                     "total_narration_segments": len(narration_segments),
                     "total_subtitle_segments": len(subtitle_segments),
                     "narration_word_count": len(narration_text),
-                    "estimated_speech_time": len(narration_text) * 0.5
+                    "estimated_speech_time": round(sum(
+                        speech_rate_model.predict(segment["text"]) for segment in narration_segments
+                    ), 1)
                 }
             }
             
@@ -313,7 +318,7 @@ class SubtitleNarrationAgent:
                 }
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -353,7 +358,7 @@ class SubtitleNarrationAgent:
                 "max_output_tokens": 2000
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -395,7 +400,7 @@ class SubtitleNarrationAgent:
                 "temperature": 0.7
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -433,7 +438,7 @@ class SubtitleNarrationAgent:
                 ]
             }
             
-            response = requests.post(url, headers=headers, json=payload, timeout=60)
+            response = await http_post(url, timeout_type="llm", headers=headers, json=payload)
             response.raise_for_status()
             result = response.json()
             
@@ -532,7 +537,7 @@ class SubtitleNarrationAgent:
                 "client_secret": settings.BAIDU_SECRET_KEY
             }
             
-            response = requests.post(url, params=params, timeout=30)
+            response = await http_post(url, params=params)
             response.raise_for_status()
             result = response.json()
             
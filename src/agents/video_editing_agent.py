@@ -5,6 +5,14 @@ from typing import Dict, List, Any, Tuple
 import logging
 from pathlib import Path
 
+try:
+    from ..utils.highlight_engine import build_windows, select_highlights
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.highlight_engine import build_windows, select_highlights
+
 class VideoEditingAgent:
     """视频剪辑Agent"""
     
@@ -66,61 +74,41 @@ class VideoEditingAgent:
             raise
     
     def _select_key_segments(self, analysis: Dict, narration: Dict, target_duration: int) -> List[Dict]:
-        """选择关键视频片段"""
-        key_moments = analysis.get('key_moments', [])
-        scenes = analysis.get('scenes', [])
-        narration_segments = narration.get('narration', [])
-        
+        """
+        选择关键视频片段
+
+        关键时刻与多物体场景一起作为候选，吸附到镜头边界、合并重叠窗口后，
+        在目标时长内选出总重要性最高且互不重叠的片段组合。
+        """
+        duration = analysis.get('duration') or None
+        shots = analysis.get('shots')
+
+        key_moments = [
+            {'timestamp': moment['timestamp'], 'importance': moment['importance'], 'type': 'key_moment'}
+            for moment in analysis.get('key_moments', [])
+        ]
+        # 有多个对象的场景作为补充候选
+        scenes = [
+            {'timestamp': scene['timestamp'], 'importance': 0.5, 'type': 'scene'}
+            for scene in analysis.get('scenes', [])
+            if len(scene.get('objects', [])) >= 2
+        ]
+
+        windows = build_windows(key_moments, before=2, after=3, duration=duration, shots=shots)
+        windows += build_windows(scenes, before=0, after=4, duration=duration, shots=shots)
+
         segments = []
-        total_duration = 0
-        
-        # 基于关键时刻选择片段
-        for moment in sorted(key_moments, key=lambda x: x['importance'], reverse=True):
-            if total_duration >= target_duration:
-                break
-                
-            start_time = max(0, moment['timestamp'] - 2)
-            end_time = min(analysis.get('duration', 0), moment['timestamp'] + 3)
-            duration = end_time - start_time
-            
-            if total_duration + duration <= target_duration:
-                segments.append({
-                    'start': start_time,
-                    'end': end_time,
-                    'importance': moment['importance'],
-                    'type': 'key_moment'
-                })
-                total_duration += duration
-        
-        # 如果时长不够，添加其他有趣片段
-        if total_duration < target_duration * 0.8:
-            for scene in scenes:
-                if total_duration >= target_duration:
-                    break
-                    
-                # 选择有多个对象的场景
-                if len(scene.get('objects', [])) >= 2:
-                    start_time = scene['timestamp']
-                    end_time = min(analysis.get('duration', 0), start_time + 4)
-                    duration = end_time - start_time
-                    
-                    # 避免重叠
-                    overlap = any(
-                        seg['start'] <= start_time <= seg['end'] or 
-                        seg['start'] <= end_time <= seg['end']
-                        for seg in segments
-                    )
-                    
-                    if not overlap and total_duration + duration <= target_duration:
-                        segments.append({
-                            'start': start_time,
-                            'end': end_time,
-                            'importance': 0.5,
-                            'type': 'scene'
-                        })
-                        total_duration += duration
-        
-        return sorted(segments, key=lambda x: x['start'])
+        for window in select_highlights(windows, target_duration):
+            best = window.best
+            segments.append({
+                'start': window.start,
+                'end': window.end,
+                'importance': best['importance'],
+                'type': best['type']
+            })
+
+        self.logger.info(f"选择了{len(segments)}个关键片段，总时长{sum(s['end'] - s['start'] for s in segments):.1f}秒")
+        return segments
     
     def _edit_video_segments(self, video_clip: VideoFileClip, segments: List[Dict]) -> List[VideoFileClip]:
         """剪辑视频片段"""
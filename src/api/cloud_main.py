@@ -1,4 +1,5 @@
 import asyncio
+import json
 import logging
 import time
 from pathlib import Path
@@ -6,7 +7,7 @@ from typing import Dict, List, Optional, Any
 import uvicorn
 from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, Form
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel
 
@@ -19,6 +20,12 @@ try:
     from ..agents.subtitle_narration_agent import SubtitleNarrationAgent
     from ..utils.file_utils import save_uploaded_file, cleanup_temp_files
     from ..utils.video_utils import create_narrated_video
+    from ..utils.http_client import close_http_clients
+    from ..utils.edge_tts_pool import close_edge_tts_pools
+    from ..utils.vision_cache import get_vision_cache
+    from ..utils.tts_cache import get_tts_cache
+    from ..utils.speech_rate import get_speech_rate_model
+    from ..utils.video_probe import probe_video
 except ImportError:
     # 如果相对导入失败，尝试绝对导入
     import sys
@@ -32,6 +39,12 @@ except ImportError:
     from src.agents.subtitle_narration_agent import SubtitleNarrationAgent
     from src.utils.file_utils import save_uploaded_file, cleanup_temp_files
     from src.utils.video_utils import create_narrated_video
+    from src.utils.http_client import close_http_clients
+    from src.utils.edge_tts_pool import close_edge_tts_pools
+    from src.utils.vision_cache import get_vision_cache
+    from src.utils.tts_cache import get_tts_cache
+    from src.utils.speech_rate import get_speech_rate_model
+    from src.utils.video_probe import probe_video
 
 # 配置日志
 logging.basicConfig(
@@ -75,6 +88,18 @@ subtitle_narration_agent = SubtitleNarrationAgent()
 # 存储任务状态
 task_status = {}
 
+@app.on_event("startup")
+async def startup_event():
+    """服务启动时在线程池中预先加载语速模型（需扫描语音缓存的实测记录）"""
+    loop = asyncio.get_event_loop()
+    await loop.run_in_executor(None, get_speech_rate_model)
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """服务停止时释放共享HTTP连接和Edge-TTS连接"""
+    await close_http_clients()
+    await close_edge_tts_pools()
+
 # Pydantic模型
 class VideoAnalysisRequest(BaseModel):
     video_path: str
@@ -248,6 +273,35 @@ async def get_cost_stats():
             "error": str(e)
         }
 
+@app.get("/cache/stats")
+async def get_cache_stats():
+    """获取缓存统计"""
+    vision_cache = get_vision_cache()
+    tts_cache = get_tts_cache()
+    return {
+        "enabled": settings.enable_cache,
+        "vision": vision_cache.stats() if vision_cache else None,
+        "tts": tts_cache.stats() if tts_cache else None
+    }
+
+@app.delete("/cache/vision")
+async def clear_vision_cache():
+    """清空视觉分析结果缓存"""
+    vision_cache = get_vision_cache()
+    if vision_cache:
+        vision_cache.clear()
+    return {"message": "视觉缓存已清空"}
+
+@app.delete("/cache/tts")
+async def clear_tts_cache():
+    """清空语音合成结果缓存"""
+    tts_cache = get_tts_cache()
+    if tts_cache:
+        # 逐个删除音频文件，放到线程池避免阻塞事件循环
+        loop = asyncio.get_event_loop()
+        await loop.run_in_executor(None, tts_cache.clear)
+    return {"message": "语音缓存已清空"}
+
 @app.get("/cost/estimate")
 async def estimate_cost(
     text_length: int = 500,
@@ -275,8 +329,15 @@ async def estimate_cost(
 # 文件上传和管理
 # ==========================================
 
+def _prefetch_video_probe(file_path: str):
+    """上传后预先探测视频元数据"""
+    try:
+        probe_video(file_path)
+    except Exception as e:
+        logger.warning(f"预先探测视频元数据失败: {e}")
+
 @app.post("/upload/video")
-async def upload_video(file: UploadFile = File(...)):
+async def upload_video(background_tasks: BackgroundTasks, file: UploadFile = File(...)):
     """上传视频文件"""
     try:
         logger.info(f"开始上传视频文件: {file.filename}, 大小: {file.size}")
@@ -306,6 +367,10 @@ async def upload_video(file: UploadFile = File(...)):
         file_path = await save_uploaded_file(file, str(settings.UPLOAD_DIR))
         
         logger.info(f"视频上传成功: {file_path}")
+        
+        # 预先探测视频元数据（含关键帧索引），后续分析直接读取缓存
+        background_tasks.add_task(_prefetch_video_probe, str(file_path))
+        
         return {
             "message": "视频上传成功",
             "file_path": str(file_path),
@@ -548,6 +613,51 @@ async def analyze_video(request: VideoAnalysisRequest, background_tasks: Backgro
     
     return {"task_id": task_id, "message": "视频分析任务已启动"}
 
+def _sse_event(event: str, data: Any) -> str:
+    """格式化为 Server-Sent Events 消息"""
+    payload = json.dumps(data, ensure_ascii=False, default=str)
+    return f"event: {event}\ndata: {payload}\n\n"
+
+@app.post("/analyze/video/stream")
+async def analyze_video_stream(request: VideoAnalysisRequest):
+    """流式分析视频（SSE），每完成一帧即推送结果"""
+    async def event_stream():
+        # 进度和分析事件进入同一个队列，进度回调触发后立即推送，不必等下一个分析事件
+        queue: asyncio.Queue = asyncio.Queue()
+        
+        def progress_callback(progress: float, message: str):
+            queue.put_nowait(("progress", {"progress": progress, "message": message}))
+        
+        async def produce():
+            try:
+                async for event in video_agent.analyze_video_stream(
+                    request.video_path,
+                    progress_callback=progress_callback
+                ):
+                    queue.put_nowait((event["event"], event["data"]))
+            except Exception as e:
+                logger.error(f"流式视频分析失败: {e}")
+                queue.put_nowait(("error", {"message": str(e)}))
+            finally:
+                queue.put_nowait(None)
+        
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                item = await queue.get()
+                if item is None:
+                    break
+                yield _sse_event(*item)
+        finally:
+            # 客户端断开时停止分析
+            producer.cancel()
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
 @app.get("/analyze/video/summary")
 async def get_video_summary(video_path: str):
     """获取视频摘要"""
@@ -821,19 +931,14 @@ async def complete_subtitle_process(
             progress_callback(0.7, "合成语音...")
             narration_segments = narration_result["narration_segments"]
             
-            audio_segments = []
-            for segment in narration_segments:
-                audio_result = await tts_agent.synthesize_speech(
-                    segment["text"],
-                    voice_style,
-                    speed,
-                    pitch,
-                    volume
-                )
-                audio_segments.append({
-                    **segment,
-                    "audio_path": audio_result["audio_path"]
-                })
+            audio_segments = await tts_agent.synthesize_narration(
+                narration_segments,
+                voice_style,
+                speed,
+                pitch,
+                volume,
+                progress_callback=lambda p, m: progress_callback(0.7 + p * 0.3, m)
+            )
             
             # 5. 完成
             progress_callback(1.0, "处理完成!")
@@ -970,11 +1075,16 @@ async def batch_synthesize(request: BatchTTSRequest, background_tasks: Backgroun
                 progress_callback=progress_callback
             )
             
+            failed_count = sum(1 for segment in result if segment["status"] == "failed")
             task_status[task_id].update({
                 "status": "completed",
                 "progress": 1.0,
-                "message": "批量语音合成完成",
-                "result": {"segments": result}
+                "message": f"批量语音合成完成，{failed_count}段失败" if failed_count else "批量语音合成完成",
+                "result": {
+                    "segments": result,
+                    "success_count": sum(1 for segment in result if segment["status"] == "success"),
+                    "failed_count": failed_count
+                }
             })
             
         except Exception as e:
@@ -1014,6 +1124,55 @@ async def test_voice(
         logger.error(f"语音测试失败: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
+async def _stream_speech_response(request: TTSRequest) -> StreamingResponse:
+    """边合成边返回音频，响应头附带首块延迟"""
+    try:
+        stream = await tts_agent.open_speech_stream(
+            request.text,
+            request.voice_style,
+            request.speed,
+            request.pitch,
+            request.volume
+        )
+    except Exception as e:
+        logger.error(f"流式语音合成失败: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+    
+    return StreamingResponse(
+        stream.chunks,
+        media_type=stream.media_type,
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-TTS-Service": stream.service,
+            "X-TTS-Cache": "hit" if stream.cached else "miss",
+            "X-TTS-First-Chunk-Ms": f"{stream.first_chunk_latency * 1000:.0f}"
+        }
+    )
+
+@app.get("/tts/stream")
+async def stream_speech_get(
+    text: str,
+    voice_style: str = "female_gentle",
+    speed: float = 1.0,
+    pitch: float = 1.0,
+    volume: float = 1.0
+):
+    """流式语音合成（GET，可直接作为 <audio> 的地址边下边播）"""
+    return await _stream_speech_response(
+        TTSRequest(text=text, voice_style=voice_style, speed=speed, pitch=pitch, volume=volume)
+    )
+
+@app.post("/tts/stream")
+async def stream_speech_post(request: TTSRequest):
+    """流式语音合成"""
+    return await _stream_speech_response(request)
+
+@app.get("/tts/stream/stats")
+async def get_stream_stats():
+    """流式语音合成的首块延迟统计"""
+    return tts_agent.stream_stats()
+
 # ==========================================
 # 视频生成
 # ==========================================
@@ -97,6 +97,49 @@ class CloudSettings:
         self.frame_sample_interval = self._parse_int_env("FRAME_SAMPLE_INTERVAL", "3")
         self.max_frames_per_video = self._parse_int_env("MAX_FRAMES_PER_VIDEO", "50")
         self.max_concurrent_tasks = self._parse_int_env("MAX_CONCURRENT_TASKS", "3")
+
+        # 视频元数据缓存（上传时预先探测，按路径、大小、修改时间缓存）
+        self.video_probe_cache_size = self._parse_int_env("VIDEO_PROBE_CACHE_SIZE", "64")
+        self.video_probe_keyframes = os.getenv("VIDEO_PROBE_KEYFRAMES", "true").lower() == "true"
+
+        # 镜头检测配置（按镜头选取关键帧）
+        self.enable_scene_detection = os.getenv("ENABLE_SCENE_DETECTION", "true").lower() == "true"
+        self.scene_change_threshold = self._parse_float_env("SCENE_CHANGE_THRESHOLD", "0.35")
+        self.scene_analysis_fps = self._parse_float_env("SCENE_ANALYSIS_FPS", "4")
+        self.scene_min_shot_duration = self._parse_float_env("SCENE_MIN_SHOT_DURATION", "0.5")
+        self.scene_max_keyframe_gap = self._parse_float_env("SCENE_MAX_KEYFRAME_GAP", "30")
+
+        # 近似重复帧去重（感知哈希汉明距离不超过阈值时复用已有分析结果）
+        self.enable_frame_dedup = os.getenv("ENABLE_FRAME_DEDUP", "true").lower() == "true"
+        self.frame_dedup_threshold = self._parse_int_env("FRAME_DEDUP_THRESHOLD", "6")
+
+        # 音频特征分析（流式读取完整音轨，逐窗口标注语音/音乐/静音）
+        self.audio_analysis_sample_rate = self._parse_int_env("AUDIO_ANALYSIS_SAMPLE_RATE", "16000")
+        self.audio_analysis_window = self._parse_float_env("AUDIO_ANALYSIS_WINDOW", "0.5")
+        self.audio_silence_db = self._parse_float_env("AUDIO_SILENCE_DB", "-45")
+
+        # 重点片段（关键时刻前后保留的秒数，以及重点片段总时长预算）
+        self.highlight_pre_seconds = self._parse_float_env("HIGHLIGHT_PRE_SECONDS", "2")
+        self.highlight_post_seconds = self._parse_float_env("HIGHLIGHT_POST_SECONDS", "3")
+        self.highlight_target_duration = self._parse_float_env("HIGHLIGHT_TARGET_DURATION", "30")
+
+        # 解说混音（按时间轴分块混音，背景音乐在解说期间自动压低）
+        self.mix_sample_rate = self._parse_int_env("MIX_SAMPLE_RATE", "44100")
+        self.mix_block_seconds = self._parse_float_env("MIX_BLOCK_SECONDS", "1.0")
+        self.mix_duck_ratio = self._parse_float_env("MIX_DUCK_RATIO", "0.3")
+        self.mix_duck_fade = self._parse_float_env("MIX_DUCK_FADE", "0.3")
+
+        # 解说语速适配（合成前预测时长，加快语速使音频放进时间槽）
+        self.enable_speech_rate_fit = os.getenv("ENABLE_SPEECH_RATE_FIT", "true").lower() == "true"
+        self.tts_max_speed = self._parse_float_env("TTS_MAX_SPEED", "1.5")
+        self.tts_slot_fill = self._parse_float_env("TTS_SLOT_FILL", "0.95")
+        # 相邻短段落合并为一次合成请求，合成后按静音切回各段
+        self.enable_tts_packing = os.getenv("ENABLE_TTS_PACKING", "true").lower() == "true"
+        # Edge-TTS 连接池：复用已握手的 websocket 连接，连接数即最大并发合成数
+        self.enable_edge_tts_pool = os.getenv("ENABLE_EDGE_TTS_POOL", "true").lower() == "true"
+        self.edge_tts_pool_size = self._parse_int_env("EDGE_TTS_POOL_SIZE", "3")
+        self.edge_tts_idle_timeout = self._parse_float_env("EDGE_TTS_IDLE_TIMEOUT", "60")
+        self.edge_tts_heartbeat = self._parse_float_env("EDGE_TTS_HEARTBEAT", "20")
         
         # 质量配置
         self.video_quality = os.getenv("VIDEO_QUALITY", "medium")
@@ -108,7 +151,13 @@ class CloudSettings:
         self.llm_timeout = self._parse_int_env("LLM_TIMEOUT", "120")
         self.tts_timeout = self._parse_int_env("TTS_TIMEOUT", "180")
         self.vision_timeout = self._parse_int_env("VISION_TIMEOUT", "90")
-        
+        self.http_connect_timeout = self._parse_int_env("HTTP_CONNECT_TIMEOUT", "10")
+
+        # HTTP连接池配置
+        self.http_max_connections_per_host = self._parse_int_env("HTTP_MAX_CONNECTIONS_PER_HOST", "10")
+        self.http_max_keepalive_connections = self._parse_int_env("HTTP_MAX_KEEPALIVE_CONNECTIONS", "5")
+        self.http_keepalive_expiry = self._parse_float_env("HTTP_KEEPALIVE_EXPIRY", "30")
+
         # 重试配置
         self.api_retry_times = self._parse_int_env("API_RETRY_TIMES", "3")
         self.retry_delay = self._parse_int_env("RETRY_DELAY", "1")
@@ -117,7 +166,65 @@ class CloudSettings:
         self.max_concurrent_llm_requests = self._parse_int_env("MAX_CONCURRENT_LLM_REQUESTS", "5")
         self.max_concurrent_tts_requests = self._parse_int_env("MAX_CONCURRENT_TTS_REQUESTS", "3")
         self.max_concurrent_vision_requests = self._parse_int_env("MAX_CONCURRENT_VISION_REQUESTS", "2")
-        
+        # 通义千问-VL每次请求包含的最大图片数（同一镜头的相邻帧合并请求，1为逐帧请求）
+        self.qwen_vl_batch_size = self._parse_int_env("QWEN_VL_BATCH_SIZE", "4")
+
+        # 服务商限流（QPS, 突发容量）
+        self.default_provider_rate_limit = (
+            self._parse_float_env("DEFAULT_PROVIDER_QPS", "2.0"),
+            self._parse_int_env("DEFAULT_PROVIDER_BURST", "2")
+        )
+        self.provider_rate_limits = {
+            "baidu_vision": (
+                self._parse_float_env("BAIDU_VISION_QPS", "2.0"),
+                self._parse_int_env("BAIDU_VISION_BURST", "2")
+            ),
+            "qwen_vl": (
+                self._parse_float_env("QWEN_VL_QPS", "2.0"),
+                self._parse_int_env("QWEN_VL_BURST", "3")
+            ),
+            "aliyun_tts": (
+                self._parse_float_env("ALIYUN_TTS_QPS", "2.0"),
+                self._parse_int_env("ALIYUN_TTS_BURST", "2")
+            ),
+            "tencent_tts": (
+                self._parse_float_env("TENCENT_TTS_QPS", "2.0"),
+                self._parse_int_env("TENCENT_TTS_BURST", "2")
+            ),
+            "edge_tts": (
+                self._parse_float_env("EDGE_TTS_QPS", "3.0"),
+                self._parse_int_env("EDGE_TTS_BURST", "3")
+            ),
+        }
+
+        # 视觉服务单次调用超时（秒，含限流等待），超时后该服务结果按失败处理
+        self.vision_provider_timeouts = {
+            "baidu_vision": self._parse_float_env("BAIDU_VISION_TIMEOUT", "20"),
+            "qwen_vl": self._parse_float_env("QWEN_VL_TIMEOUT", "60"),
+        }
+        # 先得到有效描述的服务胜出，取消仍在进行的另一服务
+        self.vision_first_description_wins = os.getenv("VISION_FIRST_DESCRIPTION_WINS", "false").lower() == "true"
+
+        # 级联模式：全部帧先做百度AI物体识别和本地画面特征筛查，
+        # 与上一描述帧相比画面差异或物体集合差异(Jaccard距离)超过阈值时才调用通义千问-VL
+        self.vision_cascade_mode = os.getenv("VISION_CASCADE_MODE", "false").lower() == "true"
+        self.cascade_signature_threshold = self._parse_float_env("CASCADE_SIGNATURE_THRESHOLD", "0.25")
+        self.cascade_object_threshold = self._parse_float_env("CASCADE_OBJECT_THRESHOLD", "0.6")
+
+        # 视觉服务图片预处理（最长边像素, JPEG质量, 字节上限KB）
+        self.vision_image_profiles = {
+            "baidu_vision": (
+                self._parse_int_env("BAIDU_VISION_MAX_EDGE", "1024"),
+                self._parse_int_env("BAIDU_VISION_JPEG_QUALITY", "85"),
+                self._parse_int_env("BAIDU_VISION_MAX_KB", "1024")
+            ),
+            "qwen_vl": (
+                self._parse_int_env("QWEN_VL_MAX_EDGE", "1280"),
+                self._parse_int_env("QWEN_VL_JPEG_QUALITY", "85"),
+                self._parse_int_env("QWEN_VL_MAX_KB", "1024")
+            ),
+        }
+
         # 成本控制
         self.cost_tracker.daily_limit = self._parse_float_env("DAILY_COST_LIMIT", "50.0")
         self.cost_tracker.monthly_limit = self._parse_float_env("MONTHLY_COST_LIMIT", "500.0")
@@ -133,6 +240,12 @@ class CloudSettings:
         # 缓存配置
         self.enable_cache = os.getenv("ENABLE_CACHE", "true").lower() == "true"
         self.cache_ttl = self._parse_int_env("CACHE_TTL", "3600")
+        self.vision_cache_path = os.getenv("VISION_CACHE_PATH", "data/cache/vision_cache.db")
+        self.vision_cache_max_mb = self._parse_int_env("VISION_CACHE_MAX_MB", "200")
+        self.audio_cache_dir = os.getenv("AUDIO_CACHE_DIR", "data/cache/audio")
+        self.audio_cache_max_mb = self._parse_int_env("AUDIO_CACHE_MAX_MB", "2048")
+        self.tts_cache_dir = os.getenv("TTS_CACHE_DIR", "data/cache/tts")
+        self.tts_cache_max_mb = self._parse_int_env("TTS_CACHE_MAX_MB", "1024")
         
         # 安全配置
         self.api_rate_limit = self._parse_int_env("API_RATE_LIMIT", "100")
@@ -184,7 +297,9 @@ class CloudSettings:
         self.API_HOST = self.api_host
         self.API_PORT = self.api_port
         self.DEBUG = self.debug
-    
+        self.FRAME_SAMPLE_INTERVAL = self.frame_sample_interval
+        self.MAX_FRAMES_PER_VIDEO = self.max_frames_per_video
+
     def _parse_cors_origins(self) -> List[str]:
         """解析CORS源"""
         origins_str = os.getenv("CORS_ORIGINS", '["http://localhost:8501", "http://127.0.0.1:8501"]')
@@ -0,0 +1,219 @@
+"""
+流式音频特征分析
+按固定大小的块处理 PCM，逐窗口计算 RMS、过零率并标注语音/音乐/静音，
+内存占用与视频时长无关，输出覆盖全片的紧凑时间线
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+try:
+    from .audio_extraction import DEFAULT_CHUNK_SECONDS, extract_audio
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.audio_extraction import DEFAULT_CHUNK_SECONDS, extract_audio
+
+logger = logging.getLogger(__name__)
+
+# 窗口标签
+LABEL_SILENCE = 0
+LABEL_SPEECH = 1
+LABEL_MUSIC = 2
+LABEL_NAMES = ("silence", "speech", "music")
+
+# 窗口内再切分的子帧时长(秒)，用于估计能量起伏
+SUBFRAME_SECONDS = 0.02
+
+# 子帧能量低于窗口平均能量该比例时记为低能量子帧
+LOW_ENERGY_RATIO = 0.5
+
+# 低能量子帧占比超过该值判为语音（语音有音节停顿，音乐能量较平稳）
+SPEECH_LOW_ENERGY_FRACTION = 0.2
+
+
+@dataclass
+class AudioTimeline:
+    """全片音频特征时间线，每个窗口一个点"""
+    sample_rate: int
+    window_seconds: float
+    rms: np.ndarray
+    zcr: np.ndarray
+    labels: np.ndarray
+    duration: float
+
+    @property
+    def times(self) -> np.ndarray:
+        """各窗口起始时间"""
+        return np.arange(len(self.labels)) * self.window_seconds
+
+    def segments(self, min_duration: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        合并相邻同标签窗口为片段
+
+        Args:
+            min_duration: 短于该时长的片段并入前一片段
+
+        Returns:
+            [{"start", "end", "label"}]
+        """
+        if not len(self.labels):
+            return []
+
+        changes = np.flatnonzero(np.diff(self.labels)) + 1
+        starts = np.concatenate(([0], changes))
+        ends = np.concatenate((changes, [len(self.labels)]))
+
+        segments: List[Dict[str, Any]] = []
+        for start, end in zip(starts, ends):
+            segment = {
+                "start": round(float(start * self.window_seconds), 3),
+                "end": round(float(min(end * self.window_seconds, self.duration)), 3),
+                "label": LABEL_NAMES[self.labels[start]]
+            }
+            if segments and (
+                segment["end"] - segment["start"] < min_duration
+                or segments[-1]["label"] == segment["label"]
+            ):
+                segments[-1]["end"] = segment["end"]
+            else:
+                segments.append(segment)
+        return segments
+
+    def label_ratios(self) -> Dict[str, float]:
+        """各标签所占时长比例"""
+        if not len(self.labels):
+            return {name: 0.0 for name in LABEL_NAMES}
+        counts = np.bincount(self.labels, minlength=len(LABEL_NAMES))
+        return {name: float(count) / len(self.labels) for name, count in zip(LABEL_NAMES, counts)}
+
+    def to_dict(self) -> Dict[str, Any]:
+        """可 JSON 序列化的紧凑表示"""
+        return {
+            "sample_rate": self.sample_rate,
+            "window_seconds": self.window_seconds,
+            "duration": round(self.duration, 3),
+            "rms": np.round(self.rms, 4).tolist(),
+            "zcr": np.round(self.zcr, 4).tolist(),
+            "labels": self.labels.tolist(),
+            "label_names": list(LABEL_NAMES)
+        }
+
+
+class StreamingAudioAnalyzer:
+    """
+    流式音频分析器
+
+    通过 feed() 按块送入单声道 PCM，不足一个窗口的尾部样本留到下一块，
+    finish() 时输出时间线。
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        window_seconds: float = 0.5,
+        silence_db: float = -45.0
+    ):
+        """
+        Args:
+            sample_rate: 采样率
+            window_seconds: 分析窗口时长(秒)
+            silence_db: 窗口 RMS 低于该值 (dBFS) 时判为静音
+        """
+        self.sample_rate = sample_rate
+        self.window_seconds = window_seconds
+        self.silence_rms = 10 ** (silence_db / 20)
+
+        self._subframe = max(1, int(round(sample_rate * SUBFRAME_SECONDS)))
+        self._window = max(self._subframe, int(round(sample_rate * window_seconds)) // self._subframe * self._subframe)
+        self._remainder = np.zeros(0, dtype=np.float32)
+        self._total_samples = 0
+        self._rms: List[np.ndarray] = []
+        self._zcr: List[np.ndarray] = []
+        self._labels: List[np.ndarray] = []
+
+    def feed(self, samples: np.ndarray):
+        """送入一块 PCM（int16 或 -1~1 浮点）"""
+        if samples.dtype == np.int16:
+            samples = samples.astype(np.float32) / 32768.0
+        else:
+            samples = samples.astype(np.float32, copy=False)
+
+        self._total_samples += len(samples)
+        if len(self._remainder):
+            samples = np.concatenate((self._remainder, samples))
+
+        count = len(samples) // self._window
+        self._remainder = samples[count * self._window:].copy()
+        if count:
+            self._analyze_windows(samples[:count * self._window].reshape(count, self._window))
+
+    def _analyze_windows(self, windows: np.ndarray):
+        """批量计算一组完整窗口的特征"""
+        rms = np.sqrt(np.mean(windows ** 2, axis=1))
+
+        signs = np.signbit(windows)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (self._window - 1)
+
+        # 子帧能量起伏：语音中音节间停顿形成较多低能量子帧
+        subframes = windows.reshape(len(windows), -1, self._subframe)
+        sub_rms = np.sqrt(np.mean(subframes ** 2, axis=2))
+        low_fraction = np.mean(sub_rms < LOW_ENERGY_RATIO * sub_rms.mean(axis=1, keepdims=True), axis=1)
+
+        labels = np.where(low_fraction > SPEECH_LOW_ENERGY_FRACTION, LABEL_SPEECH, LABEL_MUSIC)
+        labels = np.where(rms < self.silence_rms, LABEL_SILENCE, labels)
+
+        self._rms.append(rms.astype(np.float32))
+        self._zcr.append(zcr.astype(np.float32))
+        self._labels.append(labels.astype(np.uint8))
+
+    def finish(self) -> AudioTimeline:
+        """处理剩余样本并输出时间线"""
+        if len(self._remainder):
+            # 尾部不足一个窗口时补零，避免丢失结尾内容
+            padded = np.zeros(self._window, dtype=np.float32)
+            padded[:len(self._remainder)] = self._remainder
+            self._remainder = np.zeros(0, dtype=np.float32)
+            self._analyze_windows(padded[np.newaxis])
+
+        def concat(parts, dtype):
+            return np.concatenate(parts) if parts else np.zeros(0, dtype=dtype)
+
+        return AudioTimeline(
+            sample_rate=self.sample_rate,
+            window_seconds=self._window / self.sample_rate,
+            rms=concat(self._rms, np.float32),
+            zcr=concat(self._zcr, np.float32),
+            labels=concat(self._labels, np.uint8),
+            duration=self._total_samples / self.sample_rate
+        )
+
+
+def analyze_pcm_chunks(
+    chunks: Iterable[np.ndarray],
+    sample_rate: int,
+    window_seconds: float = 0.5,
+    silence_db: float = -45.0
+) -> AudioTimeline:
+    """分析 PCM 块序列，返回全片时间线"""
+    analyzer = StreamingAudioAnalyzer(sample_rate, window_seconds, silence_db)
+    for chunk in chunks:
+        analyzer.feed(chunk)
+    return analyzer.finish()
+
+
+def analyze_media_audio(
+    media_path: str,
+    sample_rate: int = 16000,
+    window_seconds: float = 0.5,
+    silence_db: float = -45.0
+) -> AudioTimeline:
+    """流式分析音视频文件的完整音轨（音频经提取服务解码并缓存）"""
+    audio = extract_audio(media_path, sample_rate)
+    chunks = audio.iter_chunks(DEFAULT_CHUNK_SECONDS) if audio is not None else []
+    return analyze_pcm_chunks(chunks, sample_rate, window_seconds, silence_db)
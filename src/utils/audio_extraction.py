@@ -0,0 +1,270 @@
+"""
+音频提取服务
+通过 ffmpeg 管道把视频音轨解码为单声道 s16le PCM，直接写入缓存 WAV 并以内存映射方式读取；
+按 (视频指纹, 采样率) 缓存，同一视频在分析、台词提取等环节只解码一次
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import wave
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 每次从管道读取的时长(秒)
+DEFAULT_CHUNK_SECONDS = 30.0
+
+# 计算视频指纹时读取的首尾字节数
+FINGERPRINT_BYTES = 1024 * 1024
+
+# 进程内保留的已打开音频数量
+MAX_OPEN_AUDIO = 8
+
+
+class ExtractedAudio:
+    """已提取的单声道 16 位音频，样本以内存映射方式读取"""
+
+    def __init__(self, path: str, sample_rate: int):
+        self.path = path
+        self.sample_rate = sample_rate
+        with wave.open(path, "rb") as wav:
+            frame_count = wav.getnframes()
+        # wave 模块写出的文件 data 块位于末尾，据此定位样本起始位置
+        offset = os.path.getsize(path) - frame_count * 2
+        if frame_count:
+            self.samples = np.memmap(path, dtype=np.int16, mode="r", offset=offset, shape=(frame_count,))
+        else:
+            self.samples = np.zeros(0, dtype=np.int16)
+
+    @property
+    def duration(self) -> float:
+        """时长(秒)"""
+        return len(self.samples) / self.sample_rate
+
+    def iter_chunks(self, chunk_seconds: float = DEFAULT_CHUNK_SECONDS) -> Iterator[np.ndarray]:
+        """按块遍历样本（内存映射视图，不复制数据）"""
+        step = max(1, int(self.sample_rate * chunk_seconds))
+        for start in range(0, len(self.samples), step):
+            yield self.samples[start:start + step]
+
+    def read_wav_bytes(self) -> bytes:
+        """读取完整 WAV 文件内容，供需要上传音频的识别服务使用"""
+        with open(self.path, "rb") as f:
+            return f.read()
+
+
+def iter_pcm_chunks(
+    media_path: str,
+    sample_rate: int = 16000,
+    chunk_seconds: float = DEFAULT_CHUNK_SECONDS,
+    ffmpeg: Optional[str] = None
+) -> Iterator[np.ndarray]:
+    """
+    通过 ffmpeg 管道按块读取单声道 s16le PCM
+
+    Args:
+        media_path: 音频或视频文件路径
+        sample_rate: 输出采样率
+        chunk_seconds: 每块时长(秒)
+        ffmpeg: ffmpeg 可执行文件路径，默认从 PATH 查找
+
+    Yields:
+        int16 样本数组；没有音轨时不产出任何数据
+    """
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    if not ffmpeg:
+        raise RuntimeError("未找到ffmpeg，无法读取音频")
+
+    cmd = [
+        ffmpeg, "-nostdin", "-v", "error",
+        "-i", str(media_path),
+        "-vn", "-ac", "1", "-ar", str(sample_rate),
+        "-f", "s16le", "pipe:1"
+    ]
+    chunk_bytes = int(sample_rate * chunk_seconds) * 2
+    # stderr 写入临时文件而非管道：读取 stdout 期间无人读取 stderr，管道写满会使 ffmpeg 阻塞
+    stderr_file = tempfile.TemporaryFile()
+    process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=stderr_file)
+    try:
+        pending = b""
+        while True:
+            data = process.stdout.read(chunk_bytes)
+            if not data:
+                break
+            data = pending + data
+            # 保证按完整样本切分
+            usable = len(data) - len(data) % 2
+            pending = data[usable:]
+            if usable:
+                yield np.frombuffer(data[:usable], dtype=np.int16)
+    finally:
+        process.stdout.close()
+        returncode = process.wait()
+        stderr_file.seek(0)
+        stderr = stderr_file.read().decode(errors="ignore").strip()
+        stderr_file.close()
+
+    if returncode != 0:
+        if "does not contain any stream" in stderr or "matches no streams" in stderr:
+            # 没有音轨
+            return
+        raise RuntimeError(f"ffmpeg读取音频失败: {stderr[-200:]}")
+
+
+def video_fingerprint(video_path: str) -> str:
+    """
+    视频文件指纹
+
+    对文件大小、修改时间和首尾各 1MB 内容取 SHA-256，避免为大文件计算完整哈希；
+    修改时间使中间部分被改写的文件也能得到新指纹。
+    """
+    path = Path(video_path)
+    stat = path.stat()
+    size = stat.st_size
+    digest = hashlib.sha256(f"{size}:{stat.st_mtime_ns}".encode())
+    with open(path, "rb") as f:
+        digest.update(f.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            f.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(f.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+class AudioExtractionService:
+    """带磁盘缓存的音频提取服务"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: 缓存目录
+            max_bytes: 缓存总字节数上限，超出后删除最久未使用的文件
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.decodes = 0
+        self._lock = threading.Lock()
+        self._key_locks: Dict[Tuple[str, int], threading.Lock] = {}
+        self._opened: "OrderedDict[Tuple[str, int], Optional[ExtractedAudio]]" = OrderedDict()
+
+    def _cache_path(self, fingerprint: str, sample_rate: int) -> Path:
+        return self.cache_dir / f"{fingerprint[:32]}_{sample_rate}.wav"
+
+    def extract(self, video_path: str, sample_rate: int = 16000) -> Optional[ExtractedAudio]:
+        """
+        提取视频音轨
+
+        Args:
+            video_path: 视频文件路径
+            sample_rate: 采样率
+
+        Returns:
+            提取的音频，视频没有音轨时返回 None
+        """
+        key = (video_fingerprint(video_path), sample_rate)
+        with self._lock:
+            if key in self._opened:
+                self._opened.move_to_end(key)
+                return self._opened[key]
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+
+        # 同一视频并发请求时只解码一次
+        with key_lock:
+            with self._lock:
+                if key in self._opened:
+                    return self._opened[key]
+
+            path = self._cache_path(*key)
+            if path.exists():
+                os.utime(path)
+            else:
+                self._decode(video_path, path, sample_rate)
+
+            audio = ExtractedAudio(str(path), sample_rate) if path.exists() else None
+
+            with self._lock:
+                self._opened[key] = audio
+                while len(self._opened) > MAX_OPEN_AUDIO:
+                    self._opened.popitem(last=False)
+                self._key_locks.pop(key, None)
+
+        return audio
+
+    def _decode(self, video_path: str, path: Path, sample_rate: int):
+        """ffmpeg 输出的 PCM 直接写入缓存 WAV"""
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        partial = path.with_suffix(".part")
+        frame_count = 0
+        try:
+            with wave.open(str(partial), "wb") as wav:
+                wav.setnchannels(1)
+                wav.setsampwidth(2)
+                wav.setframerate(sample_rate)
+                for chunk in iter_pcm_chunks(video_path, sample_rate):
+                    wav.writeframes(chunk.tobytes())
+                    frame_count += len(chunk)
+        except Exception:
+            partial.unlink(missing_ok=True)
+            raise
+
+        self.decodes += 1
+        if not frame_count:
+            partial.unlink(missing_ok=True)
+            logger.info(f"视频没有音轨: {video_path}")
+            return
+
+        os.replace(partial, path)
+        logger.info(f"音频提取完成: {video_path} -> {path.name} ({frame_count / sample_rate:.1f}秒)")
+        self._evict(keep=path)
+
+    def _evict(self, keep: Path):
+        """按最近使用时间淘汰缓存文件，直到总大小不超过上限"""
+        files = sorted(self.cache_dir.glob("*.wav"), key=lambda p: p.stat().st_mtime)
+        total = sum(p.stat().st_size for p in files)
+        for file in files:
+            if total <= self.max_bytes:
+                break
+            if file == keep:
+                continue
+            total -= file.stat().st_size
+            # 只删除文件，已打开的内存映射在 POSIX 上仍然可用
+            file.unlink(missing_ok=True)
+            with self._lock:
+                for key in [k for k, v in self._opened.items() if v is not None and Path(v.path) == file]:
+                    del self._opened[key]
+            logger.debug(f"音频缓存淘汰: {file.name}")
+
+
+_audio_service: Optional[AudioExtractionService] = None
+
+
+def get_audio_service() -> AudioExtractionService:
+    """获取全局音频提取服务"""
+    global _audio_service
+    if _audio_service is None:
+        _audio_service = AudioExtractionService(
+            settings.audio_cache_dir,
+            settings.audio_cache_max_mb * 1024 * 1024
+        )
+    return _audio_service
+
+
+def extract_audio(video_path: str, sample_rate: int = 16000) -> Optional[ExtractedAudio]:
+    """提取视频音轨（带缓存），没有音轨时返回 None"""
+    return get_audio_service().extract(video_path, sample_rate)
@@ -0,0 +1,337 @@
+"""
+时间轴音频混音引擎
+把各段解说音频按时间戳放到采样级精确的时间轴上，统一采样率、施加增益，
+可选混入背景音乐并在解说期间自动压低（闪避）；按固定长度的块处理并流式写出 WAV/AAC，
+内存占用与视频时长无关
+"""
+
+import bisect
+import logging
+import os
+import shutil
+import subprocess
+import wave
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional
+
+import numpy as np
+
+try:
+    from ..config.cloud_settings import settings
+    from .audio_extraction import iter_pcm_chunks
+    from .audio_probe import get_audio_duration
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+    from src.utils.audio_extraction import iter_pcm_chunks
+    from src.utils.audio_probe import get_audio_duration
+
+logger = logging.getLogger(__name__)
+
+# int16 与浮点样本之间的换算系数
+INT16_SCALE = 32768.0
+
+# 流式读取背景音乐时每次从文件或管道读取的时长(秒)
+READ_CHUNK_SECONDS = 10.0
+
+# 输出 AAC 时的扩展名 -> ffmpeg 容器格式
+AAC_CONTAINERS = {".aac": "adts", ".m4a": "mp4", ".mp4": "mp4"}
+AAC_BITRATE = "192k"
+
+
+@dataclass
+class AudioTrack:
+    """时间轴上的一段音频"""
+    path: str
+    start: float
+    gain: float = 1.0
+
+
+def resample(samples: np.ndarray, source_rate: int, target_rate: int) -> np.ndarray:
+    """线性插值重采样"""
+    if source_rate == target_rate or len(samples) == 0:
+        return samples
+    target_length = int(round(len(samples) * target_rate / source_rate))
+    positions = np.arange(target_length, dtype=np.float64) * (source_rate / target_rate)
+    return np.interp(positions, np.arange(len(samples)), samples).astype(np.float32)
+
+
+def _open_pcm_wav(path: str) -> Optional[wave.Wave_read]:
+    """打开 16 位 PCM WAV，其他格式返回 None（交给 ffmpeg 解码）"""
+    try:
+        wav = wave.open(path, "rb")
+    except (wave.Error, EOFError):
+        return None
+    if wav.getsampwidth() != 2:
+        wav.close()
+        return None
+    return wav
+
+
+def _frames_to_mono(data: bytes, channels: int) -> np.ndarray:
+    samples = np.frombuffer(data, dtype=np.int16).astype(np.float32) / INT16_SCALE
+    if channels > 1:
+        samples = samples[:len(samples) - len(samples) % channels].reshape(-1, channels).mean(axis=1)
+    return samples
+
+
+def iter_audio(path: str, sample_rate: int, chunk_seconds: float = READ_CHUNK_SECONDS) -> Iterator[np.ndarray]:
+    """
+    按块读取单声道浮点样本（-1~1）
+
+    采样率一致的 16 位 WAV 直接读取，其他格式或采样率通过 ffmpeg 管道解码并重采样。
+    """
+    wav = _open_pcm_wav(path)
+    if wav is not None and wav.getframerate() == sample_rate:
+        with wav:
+            step = max(1, int(sample_rate * chunk_seconds))
+            while True:
+                data = wav.readframes(step)
+                if not data:
+                    break
+                yield _frames_to_mono(data, wav.getnchannels())
+        return
+    if wav is not None:
+        wav.close()
+
+    for chunk in iter_pcm_chunks(path, sample_rate, chunk_seconds):
+        yield chunk.astype(np.float32) / INT16_SCALE
+
+
+def load_audio(path: str, sample_rate: int) -> np.ndarray:
+    """
+    读取整段音频为单声道浮点样本，用于解说片段等短音频
+
+    16 位 WAV 直接读取并用 NumPy 重采样，不依赖 ffmpeg；其他格式通过 ffmpeg 解码。
+    """
+    wav = _open_pcm_wav(path)
+    if wav is not None:
+        with wav:
+            samples = _frames_to_mono(wav.readframes(wav.getnframes()), wav.getnchannels())
+            return resample(samples, wav.getframerate(), sample_rate)
+
+    chunks = list(iter_audio(path, sample_rate))
+    return np.concatenate(chunks) if chunks else np.zeros(0, dtype=np.float32)
+
+
+class _BlockReader:
+    """从流式音频中按精确长度取块，可循环播放"""
+
+    def __init__(self, path: str, sample_rate: int, loop: bool):
+        self.path = path
+        self.sample_rate = sample_rate
+        self.loop = loop
+        self._chunks = iter_audio(path, sample_rate)
+        self._buffer = np.zeros(0, dtype=np.float32)
+        self._exhausted = False
+
+    def read(self, count: int) -> np.ndarray:
+        parts = [self._buffer]
+        available = len(self._buffer)
+        restarted_empty = False
+        while available < count and not self._exhausted:
+            chunk = next(self._chunks, None)
+            if chunk is None:
+                # 空文件循环会陷入死循环，读到末尾且本轮没有数据时停止
+                if not self.loop or restarted_empty:
+                    self._exhausted = True
+                    break
+                self._chunks = iter_audio(self.path, self.sample_rate)
+                restarted_empty = True
+                continue
+            restarted_empty = False
+            parts.append(chunk)
+            available += len(chunk)
+
+        data = np.concatenate(parts) if len(parts) > 1 else parts[0]
+        block, self._buffer = data[:count], data[count:]
+        if len(block) < count:
+            block = np.concatenate([block, np.zeros(count - len(block), dtype=np.float32)])
+        return block
+
+
+class _AudioWriter:
+    """流式写出 int16 单声道音频：.wav 直接写文件，其他格式（.m4a/.aac/.mp3 等）经 ffmpeg 编码"""
+
+    def __init__(self, output_path: str, sample_rate: int):
+        self.output_path = Path(output_path)
+        self.output_path.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件，完成后改名，失败时不留下残缺的输出
+        self._partial = self.output_path.with_name(f".{self.output_path.name}.part")
+        self._wav = None
+        self._process = None
+
+        if self.output_path.suffix.lower() == ".wav":
+            self._wav = wave.open(str(self._partial), "wb")
+            self._wav.setnchannels(1)
+            self._wav.setsampwidth(2)
+            self._wav.setframerate(sample_rate)
+            return
+
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise RuntimeError(f"未找到ffmpeg，无法输出{self.output_path.suffix}格式")
+        suffix = self.output_path.suffix.lower()
+        # 临时文件没有可识别的扩展名，需显式指定容器格式
+        container = AAC_CONTAINERS.get(suffix, suffix.lstrip("."))
+        codec = ["-c:a", "aac", "-b:a", AAC_BITRATE] if suffix in AAC_CONTAINERS else []
+        self._process = subprocess.Popen(
+            [
+                ffmpeg, "-nostdin", "-v", "error", "-y",
+                "-f", "s16le", "-ar", str(sample_rate), "-ac", "1", "-i", "pipe:0",
+                *codec, "-f", container, str(self._partial)
+            ],
+            stdin=subprocess.PIPE, stderr=subprocess.PIPE
+        )
+
+    def write(self, samples: np.ndarray):
+        data = samples.astype("<i2").tobytes()
+        if self._wav is not None:
+            self._wav.writeframes(data)
+        else:
+            self._process.stdin.write(data)
+
+    def close(self):
+        if self._wav is not None:
+            self._wav.close()
+        else:
+            self._process.stdin.close()
+            stderr = self._process.stderr.read().decode(errors="ignore").strip()
+            self._process.stderr.close()
+            if self._process.wait() != 0:
+                raise RuntimeError(f"ffmpeg编码音频失败: {stderr[-200:]}")
+        os.replace(self._partial, self.output_path)
+
+    def abort(self):
+        try:
+            if self._wav is not None:
+                self._wav.close()
+            else:
+                self._process.kill()
+                self._process.wait()
+        finally:
+            self._partial.unlink(missing_ok=True)
+
+
+def _duck_envelope(
+    block_start: int,
+    block_end: int,
+    intervals: List[tuple],
+    fade: int
+) -> np.ndarray:
+    """
+    解说覆盖程度（0~1）：解说区间内为 1，区间前后 fade 个样本内线性过渡
+    """
+    envelope = np.zeros(block_end - block_start, dtype=np.float32)
+    positions = np.arange(block_start, block_end, dtype=np.float64)
+    for start, end in intervals:
+        if end + fade <= block_start or start - fade >= block_end:
+            continue
+        if fade:
+            ramp = np.minimum(positions - (start - fade), (end + fade) - positions) / fade
+            np.maximum(envelope, np.clip(ramp, 0.0, 1.0, out=ramp), out=envelope)
+        else:
+            envelope[max(start, block_start) - block_start:min(end, block_end) - block_start] = 1.0
+    return envelope
+
+
+def mix_tracks(
+    tracks: List[AudioTrack],
+    output_path: str,
+    sample_rate: Optional[int] = None,
+    background_music: Optional[str] = None,
+    music_volume: float = 0.3,
+    duck_ratio: Optional[float] = None,
+    duck_fade: Optional[float] = None,
+    duration: Optional[float] = None,
+    loop_music: bool = True,
+    block_seconds: Optional[float] = None
+) -> str:
+    """
+    按时间轴混音并写出音频
+
+    Args:
+        tracks: 音频段（文件路径、开始时间、增益）
+        output_path: 输出路径，.wav 直接写出，其他扩展名经 ffmpeg 编码（如 .m4a 为 AAC）
+        sample_rate: 输出采样率，默认使用配置
+        background_music: 背景音乐文件路径
+        music_volume: 背景音乐音量
+        duck_ratio: 解说期间背景音乐再乘以的系数（1 表示不闪避），默认使用配置
+        duck_fade: 闪避的渐变时长(秒)，默认使用配置
+        duration: 输出时长(秒)，默认到最后一段音频结束
+        loop_music: 背景音乐短于时间轴时是否循环
+        block_seconds: 每次处理的块时长(秒)，默认使用配置
+
+    Returns:
+        输出文件路径
+    """
+    sample_rate = sample_rate or settings.mix_sample_rate
+    duck_ratio = settings.mix_duck_ratio if duck_ratio is None else duck_ratio
+    duck_fade = settings.mix_duck_fade if duck_fade is None else duck_fade
+    block_size = max(1, int(sample_rate * (block_seconds or settings.mix_block_seconds)))
+
+    # 片段起止样本（长度只读文件头获得，音频本身在时间轴走到时才加载）
+    placed = sorted(
+        [
+            (
+                int(round(max(0.0, track.start) * sample_rate)),
+                int(round(get_audio_duration(track.path) * sample_rate)),
+                track
+            )
+            for track in tracks
+        ],
+        key=lambda item: item[:2]
+    )
+    intervals = [(start, start + length) for start, length, _ in placed]
+    total = int(round(duration * sample_rate)) if duration is not None else max((end for _, end in intervals), default=0)
+
+    music = _BlockReader(background_music, sample_rate, loop_music) if background_music else None
+    fade = int(duck_fade * sample_rate)
+    writer = _AudioWriter(output_path, sample_rate)
+    try:
+        next_track = 0
+        # 正在播放的片段: (起始样本, 样本)
+        active: List[tuple] = []
+        duck_from = 0
+        starts = [start for start, _ in intervals]
+        for block_start in range(0, total, block_size):
+            block_end = min(block_start + block_size, total)
+            block = np.zeros(block_end - block_start, dtype=np.float32)
+
+            while next_track < len(placed) and placed[next_track][0] < block_end:
+                start, _, track = placed[next_track]
+                samples = load_audio(track.path, sample_rate)
+                if track.gain != 1.0:
+                    samples = samples * track.gain
+                active.append((start, samples))
+                next_track += 1
+
+            for start, samples in active:
+                low, high = max(start, block_start), min(start + len(samples), block_end)
+                if low < high:
+                    block[low - block_start:high - block_start] += samples[low - start:high - start]
+            active = [(start, samples) for start, samples in active if start + len(samples) > block_end]
+
+            if music is not None:
+                music_block = music.read(len(block)) * music_volume
+                if duck_ratio < 1.0 and intervals:
+                    while duck_from < len(intervals) and intervals[duck_from][1] + fade <= block_start:
+                        duck_from += 1
+                    nearby = intervals[duck_from:bisect.bisect_left(starts, block_end + fade)]
+                    if nearby:
+                        envelope = _duck_envelope(block_start, block_end, nearby, fade)
+                        music_block *= 1.0 - (1.0 - duck_ratio) * envelope
+                block += music_block
+
+            np.clip(block, -1.0, 1.0, out=block)
+            writer.write(np.round(block * (INT16_SCALE - 1)).astype(np.int16))
+        writer.close()
+    except Exception:
+        writer.abort()
+        raise
+
+    logger.info(f"混音完成: {len(tracks)}段音频, {total / sample_rate:.1f}秒 -> {output_path}")
+    return str(output_path)
@@ -0,0 +1,237 @@
+"""
+音频时长探测
+只读取文件头，不解码音频：WAV 解析 RIFF 的 fmt/data 块，
+MP3 解析首个帧头及 Xing/Info/VBRI 标签（无标签时按恒定码率估算），
+其他格式回退到 ffprobe（无 ffprobe 时解析 ffmpeg -i 输出）
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import struct
+import subprocess
+from dataclasses import dataclass
+from typing import BinaryIO, Optional
+
+logger = logging.getLogger(__name__)
+
+# ffprobe/ffmpeg 探测超时(秒)
+PROBE_TIMEOUT = 30
+
+# 查找 MP3 首帧时最多扫描的字节数（跳过 ID3v2 标签之后）
+MP3_SYNC_SEARCH_BYTES = 64 * 1024
+
+# MPEG 版本 -> 采样率表（索引 0-2）
+_MP3_SAMPLE_RATES = {
+    3: (44100, 48000, 32000),   # MPEG-1
+    2: (22050, 24000, 16000),   # MPEG-2
+    0: (11025, 12000, 8000),    # MPEG-2.5
+}
+
+# (是否 MPEG-1, 层) -> 码率表(kbps)，索引 1-14
+_MP3_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+
+_FFMPEG_DURATION_PATTERN = re.compile(r"Duration: (\d+):(\d+):(\d+(?:\.\d+)?)")
+
+
+@dataclass
+class AudioInfo:
+    """音频基本信息"""
+    duration: float
+    sample_rate: int
+    channels: int
+    format: str
+
+
+def _probe_wav(f: BinaryIO, file_size: int) -> Optional[AudioInfo]:
+    """解析 RIFF/WAVE 文件头"""
+    header = f.read(12)
+    if len(header) < 12 or header[:4] != b"RIFF" or header[8:12] != b"WAVE":
+        return None
+
+    channels = sample_rate = byte_rate = 0
+    while True:
+        chunk = f.read(8)
+        if len(chunk) < 8:
+            return None
+        chunk_id, chunk_size = chunk[:4], struct.unpack("<I", chunk[4:])[0]
+        if chunk_id == b"fmt ":
+            fmt = f.read(chunk_size)
+            if len(fmt) < 16:
+                return None
+            _, channels, sample_rate, byte_rate = struct.unpack("<HHII", fmt[:12])
+            if chunk_size % 2:
+                f.seek(1, os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            # 流式写出的文件 data 大小可能为 0 或 0xFFFFFFFF，以实际剩余字节为准
+            data_size = min(chunk_size, file_size - f.tell()) if chunk_size else file_size - f.tell()
+            return AudioInfo(data_size / byte_rate, sample_rate, channels, "wav")
+        else:
+            # 跳过其他块（LIST 等），块按偶数字节对齐
+            f.seek(chunk_size + chunk_size % 2, os.SEEK_CUR)
+
+
+def _parse_mp3_header(header: bytes) -> Optional[dict]:
+    """解析 4 字节 MPEG 音频帧头，无效时返回 None"""
+    if len(header) < 4 or header[0] != 0xFF or header[1] & 0xE0 != 0xE0:
+        return None
+    version = (header[1] >> 3) & 0x03
+    layer = 4 - ((header[1] >> 1) & 0x03)
+    bitrate_index = header[2] >> 4
+    rate_index = (header[2] >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or rate_index == 3:
+        return None
+
+    mpeg1 = version == 3
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    padding = (header[2] >> 1) & 0x01
+    mono = header[3] >> 6 == 3
+    if layer == 1:
+        samples_per_frame = 384
+        frame_size = (12 * bitrate // sample_rate + padding) * 4
+    else:
+        samples_per_frame = 1152 if mpeg1 or layer == 2 else 576
+        frame_size = samples_per_frame // 8 * bitrate // sample_rate + padding
+
+    return {
+        "mpeg1": mpeg1,
+        "layer": layer,
+        "sample_rate": sample_rate,
+        "bitrate": bitrate,
+        "channels": 1 if mono else 2,
+        "samples_per_frame": samples_per_frame,
+        "frame_size": frame_size,
+    }
+
+
+def _probe_mp3(f: BinaryIO, file_size: int) -> Optional[AudioInfo]:
+    """解析 MP3 首帧及 VBR 标签"""
+    f.seek(0)
+    start = 0
+    head = f.read(10)
+    if head[:3] == b"ID3" and len(head) == 10:
+        # ID3v2 标签大小为 4 个 7 位字节（syncsafe），另加 10 字节标签头和可选的 10 字节尾
+        tag_size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        start = 10 + tag_size + (10 if head[5] & 0x10 else 0)
+
+    f.seek(start)
+    buffer = f.read(MP3_SYNC_SEARCH_BYTES)
+    position = buffer.find(b"\xff")
+    frame = None
+    while 0 <= position < len(buffer) - 4:
+        frame = _parse_mp3_header(buffer[position:position + 4])
+        if frame is not None:
+            # 要求下一帧头也有效，避免把数据中偶然出现的同步字当作帧头
+            following = buffer[position + frame["frame_size"]:position + frame["frame_size"] + 4]
+            if len(following) < 4 or _parse_mp3_header(following) is not None:
+                break
+            frame = None
+        position = buffer.find(b"\xff", position + 1)
+    if frame is None:
+        return None
+
+    frame_bytes = buffer[position:position + frame["frame_size"]]
+    audio_start = start + position
+    audio_end = file_size
+    f.seek(max(0, file_size - 128))
+    if f.read(3) == b"TAG":
+        audio_end -= 128
+
+    # Xing/Info 标签位于边信息之后
+    if frame["mpeg1"]:
+        side_info = 17 if frame["channels"] == 1 else 32
+    else:
+        side_info = 9 if frame["channels"] == 1 else 17
+    frames = None
+    xing = frame_bytes[4 + side_info:4 + side_info + 12]
+    if xing[:4] in (b"Xing", b"Info") and len(xing) == 12:
+        flags = struct.unpack(">I", xing[4:8])[0]
+        if flags & 0x01:
+            frames = struct.unpack(">I", xing[8:12])[0]
+    vbri = frame_bytes[36:54]
+    if frames is None and vbri[:4] == b"VBRI" and len(vbri) == 18:
+        frames = struct.unpack(">I", vbri[14:18])[0]
+
+    if frames:
+        duration = frames * frame["samples_per_frame"] / frame["sample_rate"]
+    else:
+        # 恒定码率：按音频数据字节数估算
+        duration = (audio_end - audio_start) * 8 / frame["bitrate"]
+
+    return AudioInfo(duration, frame["sample_rate"], frame["channels"], "mp3")
+
+
+def _probe_with_ffmpeg(audio_path: str) -> Optional[float]:
+    """调用 ffprobe（或 ffmpeg -i）读取容器时长"""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe:
+        output = subprocess.run(
+            [ffprobe, "-v", "error", "-show_entries", "format=duration", "-of", "json", audio_path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT
+        ).stdout
+        duration = json.loads(output or "{}").get("format", {}).get("duration")
+        return float(duration) if duration not in (None, "N/A") else None
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        stderr = subprocess.run(
+            [ffmpeg, "-hide_banner", "-nostdin", "-i", audio_path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT
+        ).stderr
+        match = _FFMPEG_DURATION_PATTERN.search(stderr)
+        if match:
+            hours, minutes, seconds = match.groups()
+            return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
+
+    return None
+
+
+def probe_audio(audio_path: str) -> Optional[AudioInfo]:
+    """
+    读取 WAV/MP3 文件头得到音频信息（不解码）
+
+    Returns:
+        AudioInfo，不是可解析的 WAV/MP3 时返回 None
+    """
+    file_size = os.path.getsize(audio_path)
+    with open(audio_path, "rb") as f:
+        # Edge-TTS 输出的 MP3 也以 .wav 命名，按文件内容而不是扩展名判断格式
+        info = _probe_wav(f, file_size)
+        if info is None:
+            info = _probe_mp3(f, file_size)
+    return info
+
+
+def get_audio_duration(audio_path: str) -> float:
+    """
+    获取音频时长
+
+    Args:
+        audio_path: 音频文件路径
+
+    Returns:
+        音频时长（秒），失败返回 0.0
+    """
+    try:
+        info = probe_audio(audio_path)
+        if info is not None:
+            return info.duration
+        duration = _probe_with_ffmpeg(audio_path)
+        if duration is not None:
+            return duration
+        logger.warning(f"无法识别音频格式: {audio_path}")
+    except (OSError, struct.error, ValueError, subprocess.SubprocessError) as e:
+        logger.warning(f"获取音频时长失败: {audio_path}, {e}")
+    return 0.0
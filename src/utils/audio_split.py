@@ -0,0 +1,172 @@
+"""
+合并合成音频的切分
+多段解说合并成一次请求合成后，按静音间隙把音频切回各段：
+以各段预测时长的比例估计边界位置，用动态规划在边界附近选择较长的静音间隙作为切点
+"""
+
+import logging
+import wave
+from pathlib import Path
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from .audio_mixer import INT16_SCALE, load_audio
+    from .audio_probe import probe_audio
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.audio_mixer import INT16_SCALE, load_audio
+    from src.utils.audio_probe import probe_audio
+
+logger = logging.getLogger(__name__)
+
+# 能量分析帧长(秒)
+FRAME_SECONDS = 0.01
+
+# 低于峰值该分贝数的帧视为静音
+SILENCE_DB = -40.0
+
+# 可作为切点的最短静音间隙(秒)
+MIN_GAP_SECONDS = 0.12
+
+# 切分后每段首尾保留的静音(秒)
+EDGE_PAD_SECONDS = 0.05
+
+
+def find_silent_gaps(
+    samples: np.ndarray,
+    sample_rate: int,
+    silence_db: float = SILENCE_DB,
+    min_gap: float = MIN_GAP_SECONDS
+) -> List[Tuple[int, int]]:
+    """
+    查找语音之间的静音间隙（不含开头和结尾的静音）
+
+    Returns:
+        [(起始样本, 结束样本)]
+    """
+    frame = max(1, int(sample_rate * FRAME_SECONDS))
+    count = len(samples) // frame
+    if count == 0:
+        return []
+
+    frames = samples[:count * frame].astype(np.float64).reshape(count, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return []
+    silent = 20 * np.log10(rms / peak + 1e-12) < silence_db
+
+    # 静音区间的起止帧
+    edges = np.diff(np.concatenate([[0], silent.astype(np.int8), [0]]))
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    min_frames = max(1, int(round(min_gap / FRAME_SECONDS)))
+    return [
+        (int(start) * frame, int(end) * frame)
+        for start, end in zip(starts, ends)
+        if end - start >= min_frames and start > 0 and end < count
+    ]
+
+
+def plan_cuts(
+    samples: np.ndarray,
+    sample_rate: int,
+    weights: Sequence[float]
+) -> Optional[List[Tuple[int, int]]]:
+    """
+    规划各段的起止样本
+
+    Args:
+        samples: 合并合成的音频样本
+        sample_rate: 采样率
+        weights: 各段预测时长（只用其比例估计边界位置）
+
+    Returns:
+        [(起始样本, 结束样本)]，静音间隙不足以切出全部段落时返回 None
+    """
+    total = len(samples)
+    if len(weights) <= 1:
+        return [(0, total)]
+
+    gaps = find_silent_gaps(samples, sample_rate)
+    boundaries = len(weights) - 1
+    if len(gaps) < boundaries:
+        return None
+
+    # 预期边界位置
+    cumulative = np.cumsum(np.asarray(weights, dtype=np.float64))
+    expected = cumulative[:-1] / cumulative[-1] * total
+    middles = np.array([(start + end) / 2 for start, end in gaps])
+    lengths = np.array([end - start for start, end in gaps], dtype=np.float64)
+
+    # cost[j, g]：第 j 个边界放在第 g 个间隙的代价（偏离预期位置越远越大，间隙越长越小）
+    cost = np.abs(middles[None, :] - expected[:, None]) - lengths[None, :]
+    # 边界按顺序落在严格递增的间隙上
+    best = cost[0].copy()
+    choice = np.zeros((boundaries, len(gaps)), dtype=np.int64)
+    for j in range(1, boundaries):
+        # 前一个边界只能落在当前间隙之前，取其中代价最小者
+        previous = np.full(len(gaps), np.inf)
+        running = 0
+        for g in range(1, len(gaps)):
+            if best[g - 1] < best[running]:
+                running = g - 1
+            choice[j, g] = running
+            previous[g] = best[running]
+        best = cost[j] + previous
+
+    selected = [int(np.argmin(best))]
+    for j in range(boundaries - 1, 0, -1):
+        selected.append(int(choice[j][selected[-1]]))
+    selected.reverse()
+
+    pad = int(EDGE_PAD_SECONDS * sample_rate)
+    cuts = []
+    start = 0
+    for index in selected:
+        gap_start, gap_end = gaps[index]
+        cuts.append((start, min(gap_start + pad, gap_end)))
+        start = max(gap_end - pad, gap_start)
+    cuts.append((start, total))
+    return cuts
+
+
+def split_audio(
+    audio_path: str,
+    weights: Sequence[float],
+    output_paths: Sequence[str]
+) -> Optional[List[float]]:
+    """
+    把合并合成的音频切分为各段 WAV 文件
+
+    Args:
+        audio_path: 合并合成的音频（WAV 直接读取，其他格式经 ffmpeg 解码）
+        weights: 各段预测时长
+        output_paths: 各段输出路径
+
+    Returns:
+        各段时长(秒)，无法切分时返回 None
+    """
+    info = probe_audio(audio_path)
+    sample_rate = info.sample_rate if info else 16000
+    samples = load_audio(audio_path, sample_rate)
+
+    cuts = plan_cuts(samples, sample_rate, weights)
+    if cuts is None:
+        logger.warning(f"静音间隙不足，无法切分为{len(weights)}段: {audio_path}")
+        return None
+
+    durations = []
+    for (start, end), output_path in zip(cuts, output_paths):
+        with wave.open(str(output_path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(sample_rate)
+            wav.writeframes(
+                np.round(np.clip(samples[start:end], -1.0, 1.0) * (INT16_SCALE - 1)).astype("<i2").tobytes()
+            )
+        durations.append((end - start) / sample_rate)
+    return durations
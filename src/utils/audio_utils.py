@@ -4,19 +4,41 @@
 
 import os
 import logging
+import shutil
+import subprocess
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Union
 import tempfile
 
+try:
+    from .audio_mixer import AudioTrack, mix_tracks
+    from .audio_probe import get_audio_duration as probe_audio_duration
+    from .audio_probe import probe_audio
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.audio_mixer import AudioTrack, mix_tracks
+    from src.utils.audio_probe import get_audio_duration as probe_audio_duration
+    from src.utils.audio_probe import probe_audio
+
 logger = logging.getLogger(__name__)
 
-def merge_audio_files(audio_files: List[str], output_path: str = None) -> Optional[str]:
+def merge_audio_files(
+    audio_files: List[Union[str, Dict[str, Any]]],
+    output_path: str = None,
+    background_music: Optional[str] = None,
+    music_volume: float = 0.3
+) -> Optional[str]:
     """
     合并多个音频文件
     
     Args:
-        audio_files: 音频文件路径列表
+        audio_files: 音频文件路径列表（依次首尾相接），
+            或 {"path", "timestamp", "volume"} 字典列表（按时间戳放置到时间轴上）
         output_path: 输出文件路径，如果为None则自动生成
+        background_music: 背景音乐文件路径（解说期间自动压低）
+        music_volume: 背景音乐音量
     
     Returns:
         合并后的音频文件路径，失败返回None
@@ -29,27 +51,23 @@ def merge_audio_files(audio_files: List[str], output_path: str = None) -> Option
         if output_path is None:
             output_path = os.path.join(tempfile.gettempdir(), "merged_audio.wav")
         
-        # 这里是一个简化的实现
-        # 在实际项目中，需要使用pydub或ffmpeg来合并音频
-        
         logger.info(f"开始合并 {len(audio_files)} 个音频文件")
         
-        # 如果只有一个文件，直接复制
-        if len(audio_files) == 1:
-            import shutil
-            shutil.copy2(audio_files[0], output_path)
-            logger.info(f"单个音频文件已复制到: {output_path}")
-            return output_path
-        
-        # 创建一个占位符文件
-        with open(output_path, 'w') as f:
-            f.write("# 合并音频占位符\n")
-            f.write(f"# 原始文件: {', '.join(audio_files)}\n")
-        
-        logger.info(f"音频合并占位符已创建: {output_path}")
-        logger.warning("完整的音频合并功能需要安装pydub或ffmpeg")
-        
-        return output_path
+        tracks = []
+        position = 0.0
+        for item in audio_files:
+            if isinstance(item, dict):
+                tracks.append(AudioTrack(item["path"], item.get("timestamp", 0), item.get("volume", 1.0)))
+            else:
+                tracks.append(AudioTrack(item, position))
+                position += probe_audio_duration(item)
+        
+        return mix_tracks(
+            tracks,
+            output_path,
+            background_music=background_music,
+            music_volume=music_volume
+        )
         
     except Exception as e:
         logger.error(f"合并音频文件失败: {e}")
@@ -70,15 +88,19 @@ def convert_audio_format(input_path: str, output_path: str, format: str = "wav")
     try:
         logger.info(f"转换音频格式: {input_path} -> {output_path} ({format})")
         
-        # 这里是一个简化的实现
-        # 在实际项目中，需要使用pydub或ffmpeg来转换音频格式
+        ffmpeg = shutil.which("ffmpeg")
+        if not ffmpeg:
+            raise RuntimeError("未找到ffmpeg，无法转换音频格式")
         
-        import shutil
-        shutil.copy2(input_path, output_path)
-        
-        logger.info(f"音频格式转换完成（简化版本）: {output_path}")
-        logger.warning("完整的音频格式转换功能需要安装pydub或ffmpeg")
+        container = {"aac": "adts", "m4a": "mp4"}.get(format, format)
+        result = subprocess.run(
+            [ffmpeg, "-nostdin", "-v", "error", "-y", "-i", input_path, "-vn", "-f", container, output_path],
+            capture_output=True, text=True
+        )
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip()[-200:])
         
+        logger.info(f"音频格式转换完成: {output_path}")
         return True
         
     except Exception as e:
@@ -95,30 +117,16 @@ def get_audio_duration(audio_path: str) -> float:
     Returns:
         音频时长（秒），失败返回0
     """
-    try:
-        # 这里是一个简化的实现
-        # 在实际项目中，需要使用librosa或pydub来获取音频时长
-        
-        if not os.path.exists(audio_path):
-            logger.error(f"音频文件不存在: {audio_path}")
-            return 0
-        
-        # 返回一个估算值
-        file_size = os.path.getsize(audio_path)
-        estimated_duration = file_size / (44100 * 2 * 2)  # 假设44.1kHz, 16bit, 立体声
-        
-        logger.info(f"估算音频时长: {estimated_duration:.2f}秒")
-        logger.warning("准确的音频时长获取功能需要安装librosa或pydub")
-        
-        return estimated_duration
-        
-    except Exception as e:
-        logger.error(f"获取音频时长失败: {e}")
+    if not os.path.exists(audio_path):
+        logger.error(f"音频文件不存在: {audio_path}")
         return 0
+    
+    # 读取文件头获取时长，不解码音频
+    return probe_audio_duration(audio_path)
 
 def adjust_audio_volume(input_path: str, output_path: str, volume_factor: float = 1.0) -> bool:
     """
-    调整音频音量
+    调整音频音量（输出为单声道，保持原采样率）
     
     Args:
         input_path: 输入音频文件路径
@@ -131,15 +139,14 @@ def adjust_audio_volume(input_path: str, output_path: str, volume_factor: float
     try:
         logger.info(f"调整音频音量: {input_path} -> {output_path} (倍数: {volume_factor})")
         
-        # 这里是一个简化的实现
-        # 在实际项目中，需要使用pydub或ffmpeg来调整音量
-        
-        import shutil
-        shutil.copy2(input_path, output_path)
-        
-        logger.info(f"音频音量调整完成（简化版本）: {output_path}")
-        logger.warning("完整的音频音量调整功能需要安装pydub或ffmpeg")
+        info = probe_audio(input_path)
+        mix_tracks(
+            [AudioTrack(input_path, 0.0, volume_factor)],
+            output_path,
+            sample_rate=info.sample_rate if info else None
+        )
         
+        logger.info(f"音频音量调整完成: {output_path}")
         return True
         
     except Exception as e:
@@ -163,15 +170,8 @@ def create_silence(duration: float, output_path: str = None) -> Optional[str]:
         
         logger.info(f"创建 {duration} 秒静音音频: {output_path}")
         
-        # 创建一个占位符文件
-        with open(output_path, 'w') as f:
-            f.write(f"# 静音音频占位符 - {duration}秒\n")
-        
-        logger.info(f"静音音频占位符已创建: {output_path}")
-        logger.warning("完整的静音音频生成功能需要安装pydub或numpy")
-        
-        return output_path
+        return mix_tracks([], output_path, duration=duration)
         
     except Exception as e:
         logger.error(f"创建静音音频失败: {e}")
-        return None 
\ No newline at end of file
+        return None 
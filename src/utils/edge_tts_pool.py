@@ -0,0 +1,386 @@
+"""
+Edge-TTS 连接池
+edge_tts.Communicate 每次合成都新建会话并完成一次 websocket 握手（含 TLS），短句合成时握手耗时占大头。
+连接池保持若干条已握手的 websocket 连接，每条连接依次处理多次合成（每次一个 turn），
+并发数受池大小限制；取用连接前检查健康状态（心跳、空闲时长），复用的连接失效时自动重连重试
+"""
+
+import asyncio
+import logging
+import re
+import time
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape
+
+try:
+    import aiohttp
+except ImportError:
+    # aiohttp 随 edge-tts 安装，未安装时连接池不可用
+    aiohttp = None
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 输出格式与 edge_tts.Communicate 一致
+OUTPUT_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+# 单个 turn 的最大文本长度（字符），更长的文本在同一连接上分多个 turn 合成
+MAX_TURN_CHARS = 4000
+
+# 与 Edge 浏览器朗读功能一致的请求头
+EDGE_HEADERS = {
+    "Pragma": "no-cache",
+    "Cache-Control": "no-cache",
+    "Origin": "chrome-extension://jdiccldimpdaibmpdkjnbmckianbfold",
+    "Accept-Encoding": "gzip, deflate, br",
+    "Accept-Language": "en-US,en;q=0.9",
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36"
+                  " (KHTML, like Gecko) Chrome/91.0.4472.77 Safari/537.36 Edg/91.0.864.41",
+}
+
+# 服务不接受的控制字符
+_CONTROL_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+# 分段时优先在这些字符之后断开
+_BREAK_CHARS = "。！？；!?;\n，,、 "
+
+
+def _edge_url() -> str:
+    """Edge-TTS 服务地址（新版 edge-tts 需要附带 Sec-MS-GEC 令牌）"""
+    from edge_tts.constants import WSS_URL
+
+    url = WSS_URL
+    try:
+        from edge_tts.constants import SEC_MS_GEC_VERSION
+        from edge_tts.drm import DRM
+        url += f"&Sec-MS-GEC={DRM.generate_sec_ms_gec()}&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}"
+    except ImportError:
+        pass
+    return url
+
+
+def _timestamp() -> str:
+    """JavaScript 风格的时间字符串"""
+    return time.strftime("%a %b %d %Y %H:%M:%S GMT+0000 (Coordinated Universal Time)", time.gmtime())
+
+
+def _split_text(text: str, limit: int = MAX_TURN_CHARS) -> List[str]:
+    """按长度上限切分文本，尽量在标点或空白处断开"""
+    text = _CONTROL_CHARS.sub(" ", text).strip()
+    parts = []
+    while len(text) > limit:
+        cut = max(text.rfind(char, 0, limit) for char in _BREAK_CHARS)
+        cut = cut + 1 if cut > 0 else limit
+        parts.append(text[:cut].strip())
+        text = text[cut:].strip()
+    if text:
+        parts.append(text)
+    return parts
+
+
+def _voice_settings(voice: str, rate: str, pitch: str, volume: str) -> Tuple[str, str, str, str]:
+    """
+    借 edge_tts.Communicate 校验参数并规范化音色名
+
+    短音色名（如 zh-CN-XiaoxiaoNeural）转为服务要求的全名，
+    rate/volume/pitch 格式不合法时抛出 ValueError，与直接使用 Communicate 时一致
+
+    Returns:
+        (音色全名, rate, pitch, volume)
+    """
+    from edge_tts import Communicate
+
+    communicate = Communicate("", voice, rate=rate, volume=volume, pitch=pitch)
+    # 新版 edge-tts 把校验后的参数放在 tts_config 中
+    checked = getattr(communicate, "tts_config", communicate)
+    return checked.voice, checked.rate, checked.pitch, checked.volume
+
+
+def _parse_headers(data: bytes) -> Dict[bytes, bytes]:
+    """解析消息头（"名称:值" 行，以空行结束）"""
+    headers = {}
+    for line in data.split(b"\r\n"):
+        if not line:
+            break
+        key, _, value = line.partition(b":")
+        headers[key] = value
+    return headers
+
+
+class EdgeTTSConnection:
+    """一条已握手的 Edge-TTS websocket 连接"""
+
+    def __init__(self, websocket):
+        self.websocket = websocket
+        self.created = self.last_used = time.monotonic()
+        self.requests = 0
+        self._configured = False
+
+    def healthy(self, idle_timeout: float) -> bool:
+        """连接未关闭、心跳未超时且空闲时间未超过上限（服务端会关闭长时间空闲的连接）"""
+        return (
+            not self.websocket.closed
+            and self.websocket.exception() is None
+            and time.monotonic() - self.last_used < idle_timeout
+        )
+
+    async def synthesize(self, ssml: str, timeout: float) -> AsyncIterator[bytes]:
+        """
+        在该连接上完成一次合成，边接收边产出 MP3 音频块
+
+        Args:
+            ssml: SSML 文本
+            timeout: 等待单条消息的超时(秒)
+        """
+        self.requests += 1
+        timestamp = _timestamp()
+        if not self._configured:
+            # 输出格式按连接配置，只需发送一次
+            await self.websocket.send_str(
+                f"X-Timestamp:{timestamp}\r\n"
+                "Content-Type:application/json; charset=utf-8\r\n"
+                "Path:speech.config\r\n\r\n"
+                '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+                '"sentenceBoundaryEnabled":false,"wordBoundaryEnabled":false},'
+                f'"outputFormat":"{OUTPUT_FORMAT}"'
+                "}}}}\r\n"
+            )
+            self._configured = True
+
+        await self.websocket.send_str(
+            f"X-RequestId:{uuid.uuid4().hex}\r\n"
+            "Content-Type:application/ssml+xml\r\n"
+            f"X-Timestamp:{timestamp}Z\r\n"
+            "Path:ssml\r\n\r\n"
+            f"{ssml}"
+        )
+
+        started = received = False
+        while True:
+            message = await self.websocket.receive(timeout=timeout)
+            if message.type == aiohttp.WSMsgType.TEXT:
+                path = _parse_headers(message.data.encode("utf-8")).get(b"Path")
+                if path == b"turn.start":
+                    started = True
+                elif path == b"turn.end":
+                    break
+            elif message.type == aiohttp.WSMsgType.BINARY:
+                if not started or len(message.data) < 2:
+                    raise ConnectionError("Edge-TTS返回了意外的二进制消息")
+                # 二进制消息：2 字节大端头长度 + 消息头 + 音频数据
+                header_length = int.from_bytes(message.data[:2], "big")
+                headers = _parse_headers(message.data[2:2 + header_length])
+                audio = message.data[2 + header_length:]
+                if headers.get(b"Path") == b"audio" and audio:
+                    received = True
+                    yield audio
+            elif message.type == aiohttp.WSMsgType.ERROR:
+                raise ConnectionError(f"Edge-TTS连接错误: {self.websocket.exception()}")
+            else:
+                raise ConnectionError("Edge-TTS连接已关闭")
+
+        if not received:
+            raise ValueError("Edge-TTS未返回音频，请检查语音参数")
+        self.last_used = time.monotonic()
+
+    async def close(self):
+        try:
+            await self.websocket.close()
+        except Exception as e:
+            logger.debug(f"关闭Edge-TTS连接失败: {e}")
+
+
+class EdgeTTSPool:
+    """Edge-TTS websocket 连接池"""
+
+    def __init__(
+        self,
+        size: Optional[int] = None,
+        url: Optional[str] = None,
+        idle_timeout: Optional[float] = None,
+        heartbeat: Optional[float] = None,
+        timeout: Optional[float] = None
+    ):
+        """
+        Args:
+            size: 最大连接数（即最大并发合成数）
+            url: 服务地址，默认使用 edge-tts 的地址
+            idle_timeout: 连接空闲超过该时长(秒)后不再复用
+            heartbeat: 心跳间隔(秒)，未按时收到响应的连接视为失效
+            timeout: 等待单条消息的超时(秒)
+        """
+        if aiohttp is None:
+            raise ImportError("Edge-TTS连接池需要 aiohttp（随 edge-tts 安装）")
+        self.size = max(1, size or settings.edge_tts_pool_size)
+        self.url = url
+        self.idle_timeout = settings.edge_tts_idle_timeout if idle_timeout is None else idle_timeout
+        self.heartbeat = settings.edge_tts_heartbeat if heartbeat is None else heartbeat
+        self.timeout = settings.tts_timeout if timeout is None else timeout
+
+        self._semaphore = asyncio.Semaphore(self.size)
+        self._idle: List[EdgeTTSConnection] = []
+        self._session = None
+        self._closed = False
+        self.connects = 0
+        self.reuses = 0
+        self.discarded = 0
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def _connect(self) -> EdgeTTSConnection:
+        """新建连接（完成 websocket 握手）"""
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(trust_env=True)
+
+        url = self.url or _edge_url()
+        url += f"{'&' if '?' in url else '?'}ConnectionId={uuid.uuid4().hex}"
+        kwargs = {}
+        if url.startswith("wss://"):
+            import ssl
+            import certifi
+            kwargs["ssl"] = ssl.create_default_context(cafile=certifi.where())
+
+        websocket = await self._session.ws_connect(
+            url,
+            compress=15,
+            heartbeat=self.heartbeat or None,
+            headers=EDGE_HEADERS,
+            **kwargs
+        )
+        self.connects += 1
+        return EdgeTTSConnection(websocket)
+
+    async def _acquire(self) -> EdgeTTSConnection:
+        """取得一条连接：优先复用最近使用的健康连接，否则新建"""
+        await self._semaphore.acquire()
+        try:
+            while self._idle:
+                connection = self._idle.pop()
+                if connection.healthy(self.idle_timeout):
+                    self.reuses += 1
+                    return connection
+                self.discarded += 1
+                await connection.close()
+            return await self._connect()
+        except BaseException:
+            self._semaphore.release()
+            raise
+
+    async def _release(self, connection: EdgeTTSConnection, reusable: bool):
+        """归还连接；合成未正常结束的连接状态未知，直接关闭"""
+        try:
+            if reusable and not self._closed and connection.healthy(self.idle_timeout):
+                self._idle.append(connection)
+            else:
+                await connection.close()
+        finally:
+            self._semaphore.release()
+
+    async def stream(
+        self,
+        text: str,
+        voice: str = "zh-CN-XiaoxiaoNeural",
+        rate: str = "+0%",
+        pitch: str = "+0Hz",
+        volume: str = "+0%"
+    ) -> AsyncIterator[bytes]:
+        """
+        合成语音，边接收边产出 MP3 音频块（参数格式同 edge_tts.Communicate）
+        """
+        if self._closed:
+            raise RuntimeError("Edge-TTS连接池已关闭")
+        voice, rate, pitch, volume = _voice_settings(voice, rate, pitch, volume)
+        for part in _split_text(text):
+            ssml = (
+                "<speak version='1.0' xmlns='http://www.w3.org/2001/10/synthesis' xml:lang='en-US'>"
+                f"<voice name='{voice}'><prosody pitch='{pitch}' rate='{rate}' volume='{volume}'>"
+                f"{escape(part)}</prosody></voice></speak>"
+            )
+            for attempt in range(2):
+                connection = await self._acquire()
+                reused = connection.requests > 0
+                received = reusable = False
+                try:
+                    async for chunk in connection.synthesize(ssml, self.timeout):
+                        received = True
+                        yield chunk
+                    reusable = True
+                    break
+                except (aiohttp.ClientError, ConnectionError, asyncio.TimeoutError) as e:
+                    # 复用的连接可能已被服务端关闭，未收到音频时换新连接重试一次
+                    if received or not reused or attempt:
+                        raise
+                    logger.info(f"复用的Edge-TTS连接已失效，重新连接: {e}")
+                finally:
+                    await self._release(connection, reusable)
+
+    async def synthesize(self, text: str, voice: str = "zh-CN-XiaoxiaoNeural", **kwargs) -> bytes:
+        """合成语音，返回完整的 MP3 数据"""
+        return b"".join([chunk async for chunk in self.stream(text, voice, **kwargs)])
+
+    async def save(self, text: str, output_path: str, voice: str = "zh-CN-XiaoxiaoNeural", **kwargs):
+        """合成语音并保存到文件"""
+        audio = await self.synthesize(text, voice, **kwargs)
+        with open(output_path, "wb") as f:
+            f.write(audio)
+
+    def stats(self) -> Dict[str, int]:
+        """连接池统计"""
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "connects": self.connects,
+            "reuses": self.reuses,
+            "discarded": self.discarded
+        }
+
+    async def close(self):
+        """关闭全部空闲连接和会话"""
+        self._closed = True
+        idle, self._idle = self._idle, []
+        for connection in idle:
+            await connection.close()
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+
+# 键为事件循环id，连接不能跨事件循环复用
+_pools: Dict[int, Tuple[asyncio.AbstractEventLoop, EdgeTTSPool]] = {}
+
+
+def get_edge_tts_pool() -> Optional[EdgeTTSPool]:
+    """获取当前事件循环的全局连接池，未启用或未安装 aiohttp 时返回 None"""
+    if not settings.enable_edge_tts_pool or aiohttp is None:
+        return None
+    loop = asyncio.get_running_loop()
+    entry = _pools.get(id(loop))
+    if entry is None or entry[0] is not loop or entry[1]._closed:
+        # 已结束的事件循环上的连接无法再关闭，直接丢弃
+        for key, (other_loop, _) in list(_pools.items()):
+            if other_loop.is_closed():
+                del _pools[key]
+        entry = (loop, EdgeTTSPool())
+        _pools[id(loop)] = entry
+    return entry[1]
+
+
+async def close_edge_tts_pools():
+    """关闭当前事件循环的连接池（服务停止时调用）"""
+    loop = asyncio.get_running_loop()
+    entry = _pools.pop(id(loop), None)
+    if entry is not None and entry[0] is loop:
+        await entry[1].close()
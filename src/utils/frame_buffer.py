@@ -0,0 +1,149 @@
+"""
+内存帧缓冲
+视频帧只编码一次为JPEG，各视觉服务共享同一份字节数据和base64结果，按需才写入磁盘
+"""
+
+import base64
+import hashlib
+import logging
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .perceptual_hash import dhash as compute_dhash, mean_color as compute_mean_color
+
+logger = logging.getLogger(__name__)
+
+# 与 cv2.imwrite 默认质量一致
+DEFAULT_JPEG_QUALITY = 95
+
+
+class EncodedFrame:
+    """已编码的视频帧"""
+
+    __slots__ = ("timestamp", "data", "width", "height", "path", "variants", "source", "_b64", "_sha256", "_dhash", "_mean_color")
+
+    def __init__(
+        self,
+        data: bytes,
+        timestamp: float,
+        width: int = 0,
+        height: int = 0,
+        path: Optional[str] = None
+    ):
+        self.data = data
+        self.timestamp = timestamp
+        self.width = width
+        self.height = height
+        self.path = path
+        # 按服务商预处理后的版本，键为预处理配置
+        self.variants = {}
+        # 生成预处理版本用的原始图像（已缩小），全部版本生成后或不再需要时释放
+        self.source: Optional[np.ndarray] = None
+        self._b64 = None
+        self._sha256 = None
+        self._dhash = None
+        self._mean_color = None
+
+    @classmethod
+    def from_array(
+        cls,
+        frame: np.ndarray,
+        timestamp: float,
+        quality: int = DEFAULT_JPEG_QUALITY,
+        perceptual_hash: bool = True
+    ) -> "EncodedFrame":
+        """
+        从 BGR 图像编码
+
+        Args:
+            frame: BGR 图像
+            timestamp: 时间戳（秒）
+            quality: JPEG 质量
+            perceptual_hash: 是否顺便计算感知哈希（按服务商预处理的版本不参与去重，无需计算）
+        """
+        ret, buffer = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+        if not ret:
+            raise ValueError(f"帧编码失败: {timestamp:.2f}s")
+        height, width = frame.shape[:2]
+        encoded = cls(buffer.tobytes(), timestamp, width, height)
+        if perceptual_hash:
+            # 原图已在内存中，顺便计算感知哈希，避免之后再解码
+            encoded._dhash = compute_dhash(frame)
+            encoded._mean_color = compute_mean_color(frame)
+        return encoded
+
+    @classmethod
+    def from_file(cls, image_path: str, timestamp: float = 0.0) -> "EncodedFrame":
+        """从已有图片文件读取（不重新编码）"""
+        with open(image_path, "rb") as f:
+            data = f.read()
+        return cls(data, timestamp, path=image_path)
+
+    @property
+    def b64(self) -> str:
+        """base64编码结果（首次访问时计算并缓存）"""
+        if self._b64 is None:
+            self._b64 = base64.b64encode(self.data).decode()
+        return self._b64
+
+    @property
+    def data_url(self) -> str:
+        """data URL 形式，供多模态大模型使用"""
+        return f"data:image/jpeg;base64,{self.b64}"
+
+    @property
+    def sha256(self) -> str:
+        """编码数据的 SHA-256，作为内容寻址缓存的键"""
+        if self._sha256 is None:
+            self._sha256 = hashlib.sha256(self.data).hexdigest()
+        return self._sha256
+
+    @property
+    def dhash(self) -> int:
+        """感知哈希 (dHash)"""
+        if self._dhash is None:
+            self._dhash = compute_dhash(self.to_array())
+        return self._dhash
+
+    @property
+    def mean_color(self) -> np.ndarray:
+        """各通道平均颜色 (0-1)"""
+        if self._mean_color is None:
+            self._mean_color = compute_mean_color(self.to_array())
+        return self._mean_color
+
+    @property
+    def size(self) -> int:
+        """编码后字节数"""
+        return len(self.data)
+
+    def to_array(self, reduce: int = 1) -> np.ndarray:
+        """
+        解码为 BGR 图像
+
+        Args:
+            reduce: 解码时缩小倍数 (1/2/4/8)，利用 JPEG 的 DCT 缩放，比解码后再缩放更快
+        """
+        flags = {
+            1: cv2.IMREAD_COLOR,
+            2: cv2.IMREAD_REDUCED_COLOR_2,
+            4: cv2.IMREAD_REDUCED_COLOR_4,
+            8: cv2.IMREAD_REDUCED_COLOR_8,
+        }
+        return cv2.imdecode(np.frombuffer(self.data, dtype=np.uint8), flags[reduce])
+
+    def release_source(self):
+        """释放原始图像，之后的预处理改为解码已编码的 JPEG"""
+        self.source = None
+
+    def save(self, output_dir: str, index: int) -> str:
+        """写入磁盘，返回文件路径"""
+        os.makedirs(output_dir, exist_ok=True)
+        frame_path = os.path.join(output_dir, f"frame_{index:04d}_{self.timestamp:.2f}s.jpg")
+        with open(frame_path, "wb") as f:
+            f.write(self.data)
+        self.path = frame_path
+        return frame_path
@@ -0,0 +1,179 @@
+"""
+视频帧提取引擎
+按时间戳批量取帧：时间戳排序后单次顺序遍历，跳过的帧只 grab 不解码到内存，
+间隔较大（或跨过关键帧）时直接定位
+"""
+
+import bisect
+import logging
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+import cv2
+import numpy as np
+
+from .frame_buffer import EncodedFrame
+from .image_prep import encode_frame
+
+logger = logging.getLogger(__name__)
+
+# 未提供关键帧索引时，间隔超过该秒数就直接定位
+DEFAULT_SEEK_THRESHOLD = 2.0
+
+
+class FrameExtractor:
+    """视频帧提取器"""
+
+    def __init__(
+        self,
+        video_path: str,
+        keyframe_indices: Optional[Sequence[int]] = None,
+        seek_threshold: float = DEFAULT_SEEK_THRESHOLD
+    ):
+        """
+        Args:
+            video_path: 视频文件路径
+            keyframe_indices: 关键帧（I帧）序号，已知时据此判断是否定位
+            seek_threshold: 无关键帧索引时，间隔超过该秒数则定位
+        """
+        self.video_path = video_path
+        self.keyframe_indices = sorted(keyframe_indices) if keyframe_indices else None
+        self.seek_threshold = seek_threshold
+
+        self.cap = cv2.VideoCapture(video_path)
+        if not self.cap.isOpened():
+            raise ValueError(f"无法打开视频文件: {video_path}")
+
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 0.0
+        self.frame_count = int(self.cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.position = 0
+
+        # 统计信息
+        self.seeks = 0
+        self.grabs = 0
+        self.decodes = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def close(self):
+        """释放视频资源"""
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _should_seek(self, target: int) -> bool:
+        """判断跳到目标帧时定位是否比顺序 grab 更快"""
+        gap = target - self.position
+        if gap <= 0:
+            return gap < 0
+        if self.keyframe_indices is not None:
+            # 目标前存在位于当前位置之后的关键帧，定位后只需从该关键帧解码
+            i = bisect.bisect_right(self.keyframe_indices, target) - 1
+            return i >= 0 and self.keyframe_indices[i] > self.position
+        return self.fps > 0 and gap > self.fps * self.seek_threshold
+
+    def read_at_indices(self, frame_indices: Sequence[int]) -> Iterator[Tuple[int, np.ndarray]]:
+        """
+        按帧序号读取帧（内部排序去重，单次顺序遍历）
+
+        Yields:
+            (帧序号, BGR图像)，按帧序号升序
+        """
+        for target in sorted(set(int(i) for i in frame_indices)):
+            if target < 0 or (self.frame_count > 0 and target >= self.frame_count):
+                continue
+
+            if self._should_seek(target):
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, target)
+                self.position = target
+                self.seeks += 1
+
+            while self.position < target:
+                if not self.cap.grab():
+                    return
+                self.position += 1
+                self.grabs += 1
+
+            ret, frame = self.cap.read()
+            if not ret:
+                return
+            self.position += 1
+            self.decodes += 1
+            yield target, frame
+
+    def read_at_timestamps(self, timestamps: Sequence[float]) -> List[Tuple[float, Optional[np.ndarray]]]:
+        """
+        按时间戳读取帧
+
+        Args:
+            timestamps: 时间戳列表（秒），顺序任意，可重复
+
+        Returns:
+            与输入顺序一致的 (时间戳, BGR图像) 列表，读取失败的帧为 None
+        """
+        if self.fps <= 0:
+            raise ValueError("无法获取视频帧率")
+
+        targets = [int(round(t * self.fps)) for t in timestamps]
+        if self.frame_count > 0:
+            targets = [min(max(i, 0), self.frame_count - 1) for i in targets]
+
+        frames = dict(self.read_at_indices(targets))
+        return [(t, frames.get(i)) for t, i in zip(timestamps, targets)]
+
+
+def encode_frames_at(
+    video_path: str,
+    timestamps: Sequence[float],
+    keyframe_indices: Optional[Sequence[int]] = None
+) -> List[Optional[EncodedFrame]]:
+    """
+    提取指定时间点的帧并编码为内存JPEG（保留缩小后的原图，各服务商的预处理版本按需生成）
+
+    Args:
+        video_path: 视频文件路径
+        timestamps: 时间戳列表（秒）
+        keyframe_indices: 关键帧序号（可选）
+
+    Returns:
+        与输入顺序一致的已编码帧列表，读取失败的为 None
+    """
+    with FrameExtractor(video_path, keyframe_indices=keyframe_indices) as extractor:
+        frames = extractor.read_at_timestamps(timestamps)
+        logger.debug(
+            f"提取{len(timestamps)}帧: 定位{extractor.seeks}次, "
+            f"跳过{extractor.grabs}帧, 解码{extractor.decodes}帧"
+        )
+
+    return [
+        encode_frame(frame, timestamp) if frame is not None else None
+        for timestamp, frame in frames
+    ]
+
+
+def extract_frames_at(
+    video_path: str,
+    timestamps: Sequence[float],
+    output_dir: str,
+    keyframe_indices: Optional[Sequence[int]] = None
+) -> List[Optional[str]]:
+    """
+    提取指定时间点的帧并保存为图片
+
+    Args:
+        video_path: 视频文件路径
+        timestamps: 时间戳列表（秒）
+        output_dir: 输出目录
+        keyframe_indices: 关键帧序号（可选）
+
+    Returns:
+        与输入顺序一致的帧文件路径列表，读取失败的为 None
+    """
+    frames = encode_frames_at(video_path, timestamps, keyframe_indices)
+    return [
+        frame.save(output_dir, i) if frame is not None else None
+        for i, frame in enumerate(frames)
+    ]
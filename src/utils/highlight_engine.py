@@ -0,0 +1,290 @@
+"""
+重点片段引擎
+围绕关键时刻生成候选窗口，吸附到镜头边界并合并重叠窗口，
+再在总时长预算内用带权区间调度动态规划选出最优片段组合
+"""
+
+import bisect
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 窗口端点与镜头边界相距不超过该秒数时吸附到边界
+DEFAULT_SNAP_TOLERANCE = 1.0
+
+# 拉格朗日乘子二分搜索次数
+LAMBDA_ITERATIONS = 40
+
+# 时长比较容差(秒)
+DURATION_EPSILON = 1e-6
+
+
+@dataclass
+class HighlightWindow:
+    """候选片段"""
+    start: float
+    end: float
+    score: float
+    moments: List[Dict[str, Any]] = field(default_factory=list)
+
+    @property
+    def duration(self) -> float:
+        return self.end - self.start
+
+    @property
+    def best(self) -> Dict[str, Any]:
+        """窗口内得分最高的关键时刻"""
+        return max(self.moments, key=lambda m: m["score"])
+
+
+class IntervalSet:
+    """
+    有序不相交区间集合
+
+    区间按起点排序保存，插入时用二分查找定位并合并重叠区间。
+    重叠查询为 O(log n)；插入需要搬移列表元素，最坏 O(n)，
+    按起点顺序插入时只改动末尾，均摊 O(1)。
+    """
+
+    def __init__(self):
+        self._starts: List[float] = []
+        self._ends: List[float] = []
+        self._items: List[List[Any]] = []
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def overlaps(self, start: float, end: float) -> bool:
+        """是否与已有区间重叠（端点相接不算重叠）"""
+        i = bisect.bisect_right(self._ends, start)
+        return i < len(self._starts) and self._starts[i] < end
+
+    def add(self, start: float, end: float, item: Any = None):
+        """插入区间，与之重叠或相接的区间合并为一个"""
+        lo = bisect.bisect_left(self._ends, start)
+        hi = bisect.bisect_right(self._starts, end)
+        if lo < hi:
+            start = min(start, self._starts[lo])
+            end = max(end, self._ends[hi - 1])
+            # 复用第一个区间的条目列表，避免连续合并时反复整体复制
+            items = self._items[lo]
+            for group in self._items[lo + 1:hi]:
+                items.extend(group)
+        else:
+            items = []
+        if item is not None:
+            items.append(item)
+        self._starts[lo:hi] = [start]
+        self._ends[lo:hi] = [end]
+        self._items[lo:hi] = [items]
+
+    def intervals(self) -> List[Tuple[float, float, List[Any]]]:
+        """按时间顺序返回 (起点, 终点, 区间内条目)"""
+        return list(zip(self._starts, self._ends, self._items))
+
+
+def _snap(value: float, boundaries: Sequence[float], tolerance: float) -> float:
+    """吸附到最近的镜头边界"""
+    if not boundaries:
+        return value
+    i = bisect.bisect_left(boundaries, value)
+    nearest = min(
+        (boundaries[j] for j in (i - 1, i) if 0 <= j < len(boundaries)),
+        key=lambda b: abs(b - value)
+    )
+    return nearest if abs(nearest - value) <= tolerance else value
+
+
+def build_windows(
+    moments: Iterable[Dict[str, Any]],
+    before: float = 2.0,
+    after: float = 3.0,
+    duration: Optional[float] = None,
+    shots: Optional[Sequence[Dict[str, Any]]] = None,
+    snap_tolerance: float = DEFAULT_SNAP_TOLERANCE,
+    score_key: str = "importance"
+) -> List[HighlightWindow]:
+    """
+    围绕关键时刻生成候选窗口
+
+    Args:
+        moments: 关键时刻列表，需包含 timestamp 和得分字段
+        before: 时刻之前保留的秒数
+        after: 时刻之后保留的秒数
+        duration: 视频总时长，已知时据此截断窗口
+        shots: 镜头列表（含 start/end），提供时窗口端点吸附到镜头边界
+        snap_tolerance: 吸附距离(秒)
+        score_key: 得分字段名
+
+    Returns:
+        候选窗口列表，每个窗口包含一个关键时刻（附加 score 字段）
+    """
+    boundaries = sorted({b for shot in shots or [] for b in (shot["start"], shot["end"])})
+    windows = []
+    for moment in moments:
+        timestamp = moment["timestamp"]
+        # 吸附不能让窗口丢掉关键时刻本身
+        start = min(_snap(max(0.0, timestamp - before), boundaries, snap_tolerance), timestamp)
+        end = max(_snap(timestamp + after, boundaries, snap_tolerance), timestamp)
+        if duration:
+            end = min(end, duration)
+        if end <= start:
+            continue
+        score = float(moment.get(score_key, 0) or 0)
+        windows.append(HighlightWindow(start, end, score, [dict(moment, score=score)]))
+    return windows
+
+
+def merge_windows(windows: Iterable[HighlightWindow]) -> List[HighlightWindow]:
+    """合并重叠窗口，合并后的得分为其中关键时刻得分之和"""
+    interval_set = IntervalSet()
+    # 按起点顺序插入，合并只发生在集合末尾
+    for window in sorted(windows, key=lambda w: w.start):
+        interval_set.add(window.start, window.end, window)
+
+    merged = []
+    for start, end, members in interval_set.intervals():
+        moments = sorted((m for w in members for m in w.moments), key=lambda m: m["timestamp"])
+        merged.append(HighlightWindow(start, end, sum(m["score"] for m in moments), moments))
+    return merged
+
+
+def _schedule(
+    starts: Sequence[float],
+    ends: Sequence[float],
+    weights: Sequence[float],
+    predecessors: Sequence[int],
+    penalty: float
+) -> Tuple[float, List[int]]:
+    """
+    带权区间调度：选出互不重叠且 Σ(得分 - penalty × 时长) 最大的候选
+
+    候选已按终点排序，predecessors[j] 为终点不晚于 j 起点的最后一个候选序号（无则为 -1）。
+    """
+    count = len(starts)
+    best = [0.0] * (count + 1)
+    take = [False] * count
+    for j in range(count):
+        value = weights[j] - penalty * (ends[j] - starts[j])
+        with_j = best[predecessors[j] + 1] + value
+        take[j] = with_j > best[j]
+        best[j + 1] = with_j if take[j] else best[j]
+
+    chosen = []
+    j = count - 1
+    while j >= 0:
+        if take[j]:
+            chosen.append(j)
+            j = predecessors[j]
+        else:
+            j -= 1
+    chosen.reverse()
+    return sum(ends[j] - starts[j] for j in chosen), chosen
+
+
+def select_highlights(
+    windows: Sequence[HighlightWindow],
+    target_duration: Optional[float] = None
+) -> List[HighlightWindow]:
+    """
+    在总时长预算内选出最优片段组合
+
+    候选为单个窗口以及重叠窗口合并后的片段；候选得分为其覆盖的全部关键时刻得分之和。
+    在不重叠约束下用带权区间调度求解，时长预算通过对每秒惩罚系数二分搜索（拉格朗日松弛）满足，
+    剩余预算再按单位时长得分贪心补充。候选生成与调度为 O(n log n)，
+    贪心补充时向已选区间集合插入最坏 O(n)，该步最坏 O(n²)（n 为候选数）。
+
+    Args:
+        windows: 候选窗口
+        target_duration: 总时长上限(秒)，None 表示不限制
+
+    Returns:
+        按时间排序的选中片段
+    """
+    if not windows:
+        return []
+
+    # 全部关键时刻按时间排序，前缀和用于 O(log n) 计算任意区间覆盖的得分
+    moments = sorted((m for w in windows for m in w.moments), key=lambda m: m["timestamp"])
+    times = [m["timestamp"] for m in moments]
+    prefix = [0.0]
+    for moment in moments:
+        prefix.append(prefix[-1] + moment["score"])
+
+    def covered(start: float, end: float) -> Tuple[float, List[Dict[str, Any]]]:
+        lo = bisect.bisect_left(times, start)
+        hi = bisect.bisect_right(times, end)
+        return prefix[hi] - prefix[lo], moments[lo:hi]
+
+    candidates = {}
+    for window in list(windows) + [w for w in merge_windows(windows) if len(w.moments) > 1]:
+        key = (window.start, window.end)
+        if key not in candidates:
+            score, inside = covered(window.start, window.end)
+            candidates[key] = HighlightWindow(window.start, window.end, score, inside)
+    candidates = sorted(candidates.values(), key=lambda w: (w.end, w.start))
+
+    starts = [w.start for w in candidates]
+    ends = [w.end for w in candidates]
+    weights = [w.score for w in candidates]
+    predecessors = [bisect.bisect_right(ends, start) - 1 for start in starts]
+
+    total, chosen = _schedule(starts, ends, weights, predecessors, 0.0)
+    if target_duration is not None and total > target_duration:
+        # 二分搜索每秒惩罚系数，使选中总时长不超过预算
+        low, high = 0.0, max(w / max(e - s, 1e-6) for s, e, w in zip(starts, ends, weights)) + 1.0
+        chosen = []
+        for _ in range(LAMBDA_ITERATIONS):
+            middle = (low + high) / 2
+            total, selection = _schedule(starts, ends, weights, predecessors, middle)
+            if total <= target_duration + DURATION_EPSILON:
+                high, chosen = middle, selection
+            else:
+                low = middle
+
+        # 用剩余预算按单位时长得分补充不重叠的候选；
+        # 另以空集和预算内得分最高的单个候选为起点做同样的补充，取总得分最高的一个，
+        # 保证结果不差于任何单个候选
+        order = sorted(range(len(candidates)), key=lambda j: -weights[j] / max(ends[j] - starts[j], 1e-6))
+
+        def fill(initial: List[int]) -> List[int]:
+            occupied = IntervalSet()
+            for j in initial:
+                occupied.add(starts[j], ends[j])
+            remaining = target_duration - sum(ends[j] - starts[j] for j in initial)
+            selected = set(initial)
+            for j in order:
+                length = ends[j] - starts[j]
+                if j in selected or length > remaining + DURATION_EPSILON or weights[j] <= 0 or occupied.overlaps(starts[j], ends[j]):
+                    continue
+                occupied.add(starts[j], ends[j])
+                selected.add(j)
+                remaining -= length
+            return sorted(selected, key=lambda j: starts[j])
+
+        starting_points = [chosen, []]
+        feasible = [j for j in range(len(candidates)) if ends[j] - starts[j] <= target_duration + DURATION_EPSILON]
+        if feasible:
+            starting_points.append([max(feasible, key=lambda j: weights[j])])
+        chosen = max(
+            (fill(initial) for initial in starting_points),
+            key=lambda selection: sum(weights[j] for j in selection)
+        )
+
+    return [candidates[j] for j in chosen]
+
+
+def generate_highlights(
+    moments: Sequence[Dict[str, Any]],
+    target_duration: Optional[float] = None,
+    before: float = 2.0,
+    after: float = 3.0,
+    duration: Optional[float] = None,
+    shots: Optional[Sequence[Dict[str, Any]]] = None,
+    score_key: str = "importance"
+) -> List[HighlightWindow]:
+    """由关键时刻生成重点片段（生成窗口、吸附镜头边界、合并并在预算内选择）"""
+    windows = build_windows(moments, before, after, duration, shots, score_key=score_key)
+    return select_highlights(windows, target_duration)
@@ -0,0 +1,139 @@
+"""
+共享异步HTTP客户端
+所有云端服务共用的连接池：长连接复用、按主机限制连接数、支持HTTP/2的服务商启用HTTP/2
+"""
+
+import asyncio
+import importlib.util
+import logging
+from typing import Any, Dict, Tuple
+from urllib.parse import urlsplit
+
+import httpx
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 已知支持HTTP/2的服务商主机
+HTTP2_HOSTS = {
+    "dashscope.aliyuncs.com",
+    "api.openai.com",
+    "api.anthropic.com",
+}
+
+# HTTP/2 依赖 h2 包，未安装时自动退回 HTTP/1.1
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+
+def _get_timeout(timeout_type: str) -> httpx.Timeout:
+    """根据调用类型获取超时配置"""
+    timeouts = {
+        "api": settings.api_timeout,
+        "llm": settings.llm_timeout,
+        "tts": settings.tts_timeout,
+        "vision": settings.vision_timeout,
+    }
+    total = timeouts.get(timeout_type, settings.api_timeout)
+    return httpx.Timeout(total, connect=min(settings.http_connect_timeout, total))
+
+
+class HTTPClientPool:
+    """按主机划分的异步HTTP客户端池"""
+
+    def __init__(self):
+        # 键为 (主机, 事件循环id)，客户端不能跨事件循环复用；
+        # 同时保存事件循环本身，防止已结束循环的id被新循环复用后误取旧客户端
+        self._clients: Dict[Tuple[str, int], Tuple[asyncio.AbstractEventLoop, httpx.AsyncClient]] = {}
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """获取目标主机对应的共享客户端"""
+        host = urlsplit(url).netloc
+        loop = asyncio.get_running_loop()
+        key = (host, id(loop))
+
+        entry = self._clients.get(key)
+        if entry is None or entry[0] is not loop or entry[1].is_closed:
+            # 已结束的事件循环上的连接无法再关闭，直接丢弃
+            for other_key, (other_loop, _) in list(self._clients.items()):
+                if other_loop.is_closed():
+                    del self._clients[other_key]
+            http2 = HTTP2_AVAILABLE and host in HTTP2_HOSTS
+            client = httpx.AsyncClient(
+                http2=http2,
+                limits=httpx.Limits(
+                    max_connections=settings.http_max_connections_per_host,
+                    max_keepalive_connections=settings.http_max_keepalive_connections,
+                    keepalive_expiry=settings.http_keepalive_expiry,
+                ),
+                timeout=_get_timeout("api"),
+            )
+            entry = (loop, client)
+            self._clients[key] = entry
+            logger.info(f"创建HTTP客户端: {host} (HTTP/2: {'是' if http2 else '否'})")
+        return entry[1]
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        timeout_type: str = "api",
+        **kwargs: Any
+    ) -> httpx.Response:
+        """
+        发送请求
+
+        Args:
+            method: HTTP方法
+            url: 请求地址
+            timeout_type: 超时类型 (api/llm/tts/vision)，对应 settings 中的超时配置
+            **kwargs: 透传给 httpx 的参数 (headers/params/data/json/content等)
+
+        Returns:
+            响应对象
+        """
+        client = self.get_client(url)
+        kwargs.setdefault("timeout", _get_timeout(timeout_type))
+        return await client.request(method, url, **kwargs)
+
+    async def close(self):
+        """关闭当前事件循环的客户端，并丢弃已结束事件循环上的客户端"""
+        loop = asyncio.get_running_loop()
+        clients = []
+        for key, (other_loop, client) in list(self._clients.items()):
+            if other_loop is loop:
+                clients.append(client)
+                del self._clients[key]
+            elif other_loop.is_closed():
+                del self._clients[key]
+        for client in clients:
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"关闭HTTP客户端失败: {e}")
+
+
+# 全局客户端池
+http_pool = HTTPClientPool()
+
+
+async def http_post(url: str, timeout_type: str = "api", **kwargs: Any) -> httpx.Response:
+    """使用共享连接池发送POST请求"""
+    return await http_pool.request("POST", url, timeout_type=timeout_type, **kwargs)
+
+
+async def http_get(url: str, timeout_type: str = "api", **kwargs: Any) -> httpx.Response:
+    """使用共享连接池发送GET请求"""
+    return await http_pool.request("GET", url, timeout_type=timeout_type, **kwargs)
+
+
+async def close_http_clients():
+    """关闭共享连接池（服务停止时调用）"""
+    await http_pool.close()
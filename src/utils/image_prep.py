@@ -0,0 +1,169 @@
+"""
+视觉服务图片预处理
+按服务商配置缩放并重新压缩帧图片，控制上传体积；提取帧时保留缩小后的原始图像，
+各服务商版本在首次使用时从中生成，不必解码已编码的 JPEG
+"""
+
+import logging
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+import cv2
+import numpy as np
+
+try:
+    from ..config.cloud_settings import settings
+    from .frame_buffer import EncodedFrame
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+    from src.utils.frame_buffer import EncodedFrame
+
+logger = logging.getLogger(__name__)
+
+# 超出字节上限时逐步降低的最低 JPEG 质量
+MIN_JPEG_QUALITY = 50
+
+# 质量降到下限后仍超限时，每次缩小的比例
+DOWNSCALE_STEP = 0.8
+
+
+@dataclass(frozen=True)
+class ImageProfile:
+    """图片预处理配置"""
+    max_edge: int
+    jpeg_quality: int
+    max_bytes: int
+
+    @property
+    def key(self) -> str:
+        """配置标识，用于区分预处理版本和缓存键"""
+        return f"{self.max_edge}px-q{self.jpeg_quality}-{self.max_bytes // 1024}k"
+
+
+def get_image_profile(provider: str) -> ImageProfile:
+    """获取服务商的图片预处理配置"""
+    max_edge, quality, max_kb = settings.vision_image_profiles.get(
+        provider, settings.vision_image_profiles["qwen_vl"]
+    )
+    return ImageProfile(max_edge=max_edge, jpeg_quality=quality, max_bytes=max_kb * 1024)
+
+
+def _decode_for_edge(frame: EncodedFrame, max_edge: int) -> np.ndarray:
+    """解码原图，缩小倍数足够时直接按 1/2、1/4、1/8 解码"""
+    reduce = 1
+    source_edge = max(frame.width, frame.height)
+    if source_edge:
+        for factor in (8, 4, 2):
+            if source_edge / factor >= max_edge:
+                reduce = factor
+                break
+    return frame.to_array(reduce)
+
+
+def _resize_to_edge(image: np.ndarray, max_edge: int) -> np.ndarray:
+    """等比缩放到最长边不超过 max_edge"""
+    height, width = image.shape[:2]
+    scale = max_edge / max(height, width)
+    if scale >= 1:
+        return image
+    size = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
+def prepare_image(frame: EncodedFrame, provider: str, image: Optional[np.ndarray] = None) -> EncodedFrame:
+    """
+    按服务商配置预处理帧图片，结果缓存在帧对象上
+
+    先缩放到最长边上限，再按配置质量编码；超出字节上限时依次降低质量、缩小尺寸。
+
+    Args:
+        frame: 原始编码帧
+        provider: 服务商标识 (baidu_vision / qwen_vl)
+        image: 帧的原始 BGR 图像（提取帧时传入，省去解码 JPEG 再重新编码的一代损失）
+
+    Returns:
+        预处理后的编码帧
+    """
+    profile = get_image_profile(provider)
+    prepared = frame.variants.get(profile.key)
+    if prepared is not None:
+        return prepared
+
+    if image is None:
+        image = frame.source
+    if image is None:
+        image = _decode_for_edge(frame, profile.max_edge)
+    image = _resize_to_edge(image, profile.max_edge)
+    quality = profile.jpeg_quality
+    prepared = EncodedFrame.from_array(image, frame.timestamp, quality, perceptual_hash=False)
+
+    while prepared.size > profile.max_bytes:
+        if quality > MIN_JPEG_QUALITY:
+            quality = max(MIN_JPEG_QUALITY, quality - 10)
+        else:
+            height, width = image.shape[:2]
+            if max(height, width) <= 64:
+                break
+            image = _resize_to_edge(image, int(max(height, width) * DOWNSCALE_STEP))
+        prepared = EncodedFrame.from_array(image, frame.timestamp, quality, perceptual_hash=False)
+
+    prepared.path = frame.path
+    frame.variants[profile.key] = prepared
+    if frame.source is not None and all(
+        get_image_profile(name).key in frame.variants for name in settings.vision_image_profiles
+    ):
+        frame.release_source()
+
+    logger.debug(
+        f"{provider}图片预处理: {frame.width}x{frame.height} {frame.size / 1024:.0f}KB -> "
+        f"{prepared.width}x{prepared.height} q{quality} {prepared.size / 1024:.0f}KB"
+    )
+    return prepared
+
+
+def encode_frame(image: np.ndarray, timestamp: float) -> EncodedFrame:
+    """
+    编码提取出的帧，并保留缩小后的原始图像供各服务商版本按需生成
+
+    去重或级联筛掉的帧不会生成用不到的版本。
+
+    Args:
+        image: BGR 图像
+        timestamp: 时间戳（秒）
+
+    Returns:
+        已编码帧，source 为缩小到各服务商最大边长上限的原始图像
+    """
+    frame = EncodedFrame.from_array(image, timestamp)
+    max_edge = max(get_image_profile(provider).max_edge for provider in settings.vision_image_profiles)
+    frame.source = _resize_to_edge(image, max_edge)
+    return frame
+
+
+def summarize_payloads(frames: Iterable[EncodedFrame]) -> Dict[str, Any]:
+    """
+    统计各服务商实际上传的图片体积
+
+    Returns:
+        {服务商: {"profile", "frames", "original_bytes", "sent_bytes", "avg_kb"}}
+    """
+    frames = list(frames)
+    summary: Dict[str, Dict[str, Any]] = {}
+    for provider in settings.vision_image_profiles:
+        key = get_image_profile(provider).key
+        prepared = [(frame, frame.variants[key]) for frame in frames if key in frame.variants]
+        if not prepared:
+            continue
+        sent_bytes = sum(p.size for _, p in prepared)
+        summary[provider] = {
+            "profile": key,
+            "frames": len(prepared),
+            "original_bytes": sum(f.size for f, _ in prepared),
+            "sent_bytes": sent_bytes,
+            "avg_kb": round(sent_bytes / len(prepared) / 1024, 1)
+        }
+    return summary
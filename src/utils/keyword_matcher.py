@@ -0,0 +1,172 @@
+"""
+多关键词匹配引擎
+为一组分类关键词词典构建 Aho–Corasick 自动机，单次扫描文本即可得到全部分类的命中数，
+用于重要性评分、场景分类、主题和情感分析，替代逐个关键词的子串查找
+"""
+
+import logging
+import re
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Mapping, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 片段匹配结果缓存的最大条目数，超出后清空重建
+MAX_RUN_CACHE = 65536
+
+
+class KeywordMatcher:
+    """
+    分类关键词匹配器
+
+    构建时把所有分类的关键词编入同一个自动机，匹配耗时只与文本长度和命中数有关，
+    与关键词数量无关。同一关键词可以出现在多个分类中。
+    """
+
+    def __init__(self, dictionary: Mapping[str, Iterable[str]], ignore_case: bool = False):
+        """
+        Args:
+            dictionary: {分类: 关键词列表}
+            ignore_case: 是否忽略大小写
+        """
+        self.categories: List[str] = list(dictionary)
+        self.ignore_case = ignore_case
+
+        self.keywords: List[str] = []
+        # 关键词序号 -> 所属分类
+        self._keyword_categories: List[Tuple[str, ...]] = []
+        keyword_ids: Dict[str, int] = {}
+        for category, words in dictionary.items():
+            for word in words:
+                word = self._normalize(word)
+                if not word:
+                    continue
+                if word not in keyword_ids:
+                    keyword_ids[word] = len(self.keywords)
+                    self.keywords.append(word)
+                    self._keyword_categories.append(())
+                kid = keyword_ids[word]
+                if category not in self._keyword_categories[kid]:
+                    self._keyword_categories[kid] += (category,)
+
+        self._build(self.keywords)
+        self._run_cache: Dict[str, FrozenSet[int]] = {}
+
+    def _normalize(self, text: str) -> str:
+        return text.lower() if self.ignore_case else text
+
+    def _build(self, keywords: List[str]):
+        """构建字典树、失败指针、输出表和确定化转移表"""
+        goto: List[Dict[str, int]] = [{}]
+        ends: List[int] = []
+        for word in keywords:
+            state = 0
+            for char in word:
+                next_state = goto[state].get(char)
+                if next_state is None:
+                    next_state = len(goto)
+                    goto[state][char] = next_state
+                    goto.append({})
+                state = next_state
+            ends.append(state)
+
+        fail = [0] * len(goto)
+        output: List[Tuple[int, ...]] = [()] * len(goto)
+        for kid, state in enumerate(ends):
+            output[state] += (kid,)
+
+        # 按层次遍历设置失败指针，并把失败链上的输出合并到当前状态。
+        # 同时把失败链上的转移展开到每个状态（确定化），扫描时不再沿失败指针回退；
+        # 与根状态相同的转移不重复保存，查不到时回落到根状态的转移表
+        root = goto[0]
+        delta: List[Dict[str, int]] = [{} for _ in goto]
+        queue = deque(root.values())
+        while queue:
+            state = queue.popleft()
+            delta[state] = {**delta[fail[state]], **goto[state]}
+            for char, child in goto[state].items():
+                fail[child] = delta[fail[state]].get(char) or root.get(char, 0)
+                output[child] += output[fail[child]]
+                queue.append(child)
+
+        self._root = root
+        self._delta = delta
+        self._output = output
+
+        # 不在任何关键词中出现的字符总会让自动机回到根状态，
+        # 用正则（C 实现）直接跳过这些字符，只对关键词字符组成的连续片段逐字符转移
+        alphabet = sorted({char for word in keywords for char in word})
+        self._runs = re.compile("[" + "".join(re.escape(char) for char in alphabet) + "]+") if alphabet else None
+
+    def _scan_run(self, run: str) -> Iterator[Tuple[int, Tuple[int, ...]]]:
+        """从根状态扫描一个片段，产出 (片段内结束位置, 该位置结束的关键词序号)"""
+        delta, root_get, output = self._delta, self._root.get, self._output
+        state = 0
+        for position, char in enumerate(run):
+            state = delta[state].get(char) or root_get(char, 0)
+            if output[state]:
+                yield position, output[state]
+
+    def _run_ids(self, run: str) -> FrozenSet[int]:
+        """
+        片段中出现的关键词序号
+
+        每个片段都从根状态开始扫描，结果只取决于片段内容；
+        字幕等文本中短片段大量重复，按片段缓存可省去大部分逐字符转移。
+        """
+        ids = self._run_cache.get(run)
+        if ids is None:
+            ids = frozenset(kid for _, kids in self._scan_run(run) for kid in kids)
+            if len(self._run_cache) >= MAX_RUN_CACHE:
+                self._run_cache.clear()
+            self._run_cache[run] = ids
+        return ids
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, str]]:
+        """
+        遍历文本中的全部关键词出现位置（包括相互重叠的匹配）
+
+        Yields:
+            (起始位置, 关键词)
+        """
+        if self._runs is None:
+            return
+        keywords = self.keywords
+        for run in self._runs.finditer(self._normalize(text)):
+            for position, kids in self._scan_run(run.group()):
+                for kid in kids:
+                    yield run.start() + position - len(keywords[kid]) + 1, keywords[kid]
+
+    def matched_keywords(self, text: str) -> Set[str]:
+        """文本中出现过的关键词"""
+        return {self.keywords[kid] for kid in self._matched_ids(text)}
+
+    def _matched_ids(self, text: str) -> Set[int]:
+        matched: Set[int] = set()
+        if self._runs is not None:
+            for run in self._runs.findall(self._normalize(text)):
+                matched |= self._run_ids(run)
+        return matched
+
+    def count(self, text: str) -> Dict[str, int]:
+        """
+        统计各分类命中的不同关键词数量
+
+        Returns:
+            {分类: 命中关键词数}，包含全部分类（未命中为 0）
+        """
+        counts = dict.fromkeys(self.categories, 0)
+        keyword_categories = self._keyword_categories
+        for kid in self._matched_ids(text):
+            for category in keyword_categories[kid]:
+                counts[category] += 1
+        return counts
+
+    def count_batch(self, texts: Iterable[str]) -> List[Dict[str, int]]:
+        """批量统计，每段文本扫描一次，片段匹配结果在整批文本间共享"""
+        return [self.count(text) for text in texts]
+
+    def match_categories(self, text: str) -> List[str]:
+        """命中至少一个关键词的分类（按词典顺序）"""
+        counts = self.count(text)
+        return [category for category in self.categories if counts[category]]
@@ -0,0 +1,93 @@
+"""
+感知哈希工具函数
+在缩小后的灰度图上计算 dHash，用于识别近似重复的视频帧；
+dHash 只反映亮度梯度，另用平均颜色区分纹理相近但色调不同的画面
+"""
+
+import logging
+from typing import List, Optional, Sequence
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 哈希边长，dHash 共 HASH_SIZE * HASH_SIZE 位
+HASH_SIZE = 8
+
+# 平均颜色（各通道 0-1）允许的最大差异
+DEFAULT_COLOR_TOLERANCE = 0.08
+
+
+def dhash(image: np.ndarray, hash_size: int = HASH_SIZE) -> int:
+    """
+    计算差异哈希 (dHash)
+
+    Args:
+        image: BGR 或灰度图像
+        hash_size: 哈希边长
+
+    Returns:
+        hash_size * hash_size 位的整数哈希
+    """
+    if image.ndim == 3:
+        image = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(image, (hash_size + 1, hash_size), interpolation=cv2.INTER_AREA)
+    bits = (small[:, 1:] > small[:, :-1]).ravel()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def mean_color(image: np.ndarray) -> np.ndarray:
+    """图像各通道平均值，归一化到 0-1"""
+    small = cv2.resize(image, (16, 16), interpolation=cv2.INTER_AREA)
+    return small.reshape(-1, small.shape[-1] if small.ndim == 3 else 1).mean(axis=0) / 255.0
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """两个哈希之间的汉明距离"""
+    return bin(a ^ b).count("1")
+
+
+def group_near_duplicates(
+    hashes: Sequence[int],
+    threshold: int,
+    colors: Optional[Sequence[np.ndarray]] = None,
+    color_tolerance: float = DEFAULT_COLOR_TOLERANCE
+) -> List[int]:
+    """
+    按时间顺序将近似重复的帧归组
+
+    每一帧与此前已保留的代表帧比较，汉明距离不超过阈值（且平均颜色相近）时
+    归入该代表帧，否则自身成为新的代表帧。
+
+    Args:
+        hashes: 按时间顺序排列的帧哈希
+        threshold: 汉明距离阈值，小于 0 时不做去重
+        colors: 各帧平均颜色（可选）
+        color_tolerance: 平均颜色各通道允许的最大差异
+
+    Returns:
+        每一帧对应的代表帧序号（代表帧对应自身）
+    """
+    representatives: List[int] = []
+    rep_hashes = np.zeros(0, dtype=np.uint64)
+    groups = []
+
+    for i, value in enumerate(hashes):
+        if threshold >= 0 and len(representatives):
+            # 与全部代表帧批量异或后统计位数
+            xor = rep_hashes ^ np.uint64(value)
+            distances = np.unpackbits(xor.view(np.uint8).reshape(-1, 8), axis=1).sum(axis=1)
+            if colors is not None:
+                color_diff = np.abs(np.stack([colors[r] for r in representatives]) - colors[i]).max(axis=1)
+                distances = np.where(color_diff <= color_tolerance, distances, threshold + 1)
+            best = int(np.argmin(distances))
+            if distances[best] <= threshold:
+                groups.append(representatives[best])
+                continue
+
+        representatives.append(i)
+        rep_hashes = np.append(rep_hashes, np.uint64(value))
+        groups.append(i)
+
+    return groups
@@ -0,0 +1,116 @@
+"""
+异步限流工具
+基于令牌桶算法，按服务商限制云端API的调用频率（QPS + 突发容量）
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    from pathlib import Path
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """异步令牌桶限流器"""
+
+    def __init__(self, rate: float, burst: int = 1, name: str = ""):
+        """
+        Args:
+            rate: 每秒补充的令牌数（即稳定QPS）
+            burst: 桶容量（允许的突发请求数）
+            name: 限流器名称，用于日志
+        """
+        if rate <= 0:
+            raise ValueError(f"限流速率必须大于0: {rate}")
+
+        self.rate = float(rate)
+        self.capacity = max(1, int(burst))
+        self.name = name
+        self._tokens = float(self.capacity)
+        self._updated_at = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+        self._lock_loop = None
+
+    def _get_lock(self) -> asyncio.Lock:
+        """获取与当前事件循环绑定的锁"""
+        loop = asyncio.get_event_loop()
+        if self._lock is None or self._lock_loop is not loop:
+            self._lock = asyncio.Lock()
+            self._lock_loop = loop
+        return self._lock
+
+    def _refill(self):
+        """按流逝时间补充令牌"""
+        now = time.monotonic()
+        elapsed = now - self._updated_at
+        self._tokens = min(self.capacity, self._tokens + elapsed * self.rate)
+        self._updated_at = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """
+        获取令牌，令牌不足时异步等待
+
+        Args:
+            tokens: 需要的令牌数
+
+        Returns:
+            实际等待的秒数
+        """
+        waited = 0.0
+        # 持锁等待，保证等待者按先来后到的顺序获得令牌
+        async with self._get_lock():
+            while True:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    break
+
+                delay = (tokens - self._tokens) / self.rate
+                await asyncio.sleep(delay)
+                waited += delay
+
+        if waited > 0:
+            logger.debug(f"限流器[{self.name}]等待 {waited:.2f}秒")
+        return waited
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+# 按服务商缓存的限流器实例，同一进程内所有任务共享
+_rate_limiters: Dict[str, TokenBucket] = {}
+
+
+def get_rate_limiter(provider: str) -> TokenBucket:
+    """
+    获取指定服务商的共享限流器
+
+    Args:
+        provider: 服务商标识，对应 settings.provider_rate_limits 的键
+
+    Returns:
+        令牌桶限流器
+    """
+    limiter = _rate_limiters.get(provider)
+    if limiter is None:
+        qps, burst = settings.provider_rate_limits.get(
+            provider, settings.default_provider_rate_limit
+        )
+        limiter = TokenBucket(qps, burst, name=provider)
+        _rate_limiters[provider] = limiter
+        logger.info(f"创建限流器: {provider}, QPS={qps}, 突发={burst}")
+    return limiter
@@ -10,6 +10,24 @@ import subprocess
 import shutil
 from pathlib import Path
 
+try:
+    from .edge_tts_pool import close_edge_tts_pools, get_edge_tts_pool
+except ImportError:
+    # 作为脚本直接运行时使用绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.utils.edge_tts_pool import close_edge_tts_pools, get_edge_tts_pool
+
+
+def _run_tts(coro):
+    """在新事件循环中运行TTS协程，结束前关闭该循环上的Edge-TTS连接"""
+    async def run():
+        try:
+            return await coro
+        finally:
+            await close_edge_tts_pools()
+    return asyncio.run(run())
+
 class MediaGenerator:
     """音视频生成器，包含多种备用方案"""
     
@@ -136,9 +154,14 @@ class MediaGenerator:
         audio_path = self.output_dir / filename
         
         try:
-            import edge_tts
-            communicate = edge_tts.Communicate(text, voice)
-            await communicate.save(str(audio_path))
+            pool = get_edge_tts_pool()
+            if pool is not None:
+                # 同一事件循环内多次调用复用已握手的连接
+                await pool.save(text, str(audio_path), voice)
+            else:
+                import edge_tts
+                communicate = edge_tts.Communicate(text, voice)
+                await communicate.save(str(audio_path))
             
             if audio_path.exists():
                 file_size = audio_path.stat().st_size
@@ -183,7 +206,7 @@ class MediaGenerator:
             
             # 尝试TTS
             try:
-                tts_audio = asyncio.run(self.create_tts_audio(full_text, voice))
+                tts_audio = _run_tts(self.create_tts_audio(full_text, voice))
                 if tts_audio:
                     return tts_audio
             except Exception as e:
@@ -239,7 +262,7 @@ def test_all_methods():
     # 测试TTS
     print("\n3. 测试TTS...")
     try:
-        tts_audio = asyncio.run(_generator.create_tts_audio("这是测试语音", filename="test_tts.wav"))
+        tts_audio = _run_tts(_generator.create_tts_audio("这是测试语音", filename="test_tts.wav"))
     except:
         tts_audio = None
     
@@ -0,0 +1,297 @@
+"""
+镜头检测工具函数
+在缩小后的帧上计算颜色直方图和像素差异，检测镜头切换并为每个镜头选取代表帧
+"""
+
+import logging
+from typing import Any, Dict, List, Tuple
+
+import cv2
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# 检测用缩略图尺寸 (宽, 高)
+THUMBNAIL_SIZE = (64, 36)
+
+# HSV 直方图分箱数
+H_BINS = 16
+S_BINS = 4
+V_BINS = 4
+
+# 直方图距离在综合得分中的权重，其余为像素差异
+HISTOGRAM_WEIGHT = 0.6
+
+
+def compute_frame_signature(frame: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    计算帧特征
+
+    Args:
+        frame: BGR 图像
+
+    Returns:
+        (归一化HSV直方图, 灰度缩略图)
+    """
+    small = cv2.resize(frame, THUMBNAIL_SIZE, interpolation=cv2.INTER_AREA)
+    hsv = cv2.cvtColor(small, cv2.COLOR_BGR2HSV).astype(np.int32)
+
+    # OpenCV 中 H 取值 0-179，S/V 取值 0-255
+    h = hsv[..., 0] * H_BINS // 180
+    s = hsv[..., 1] * S_BINS // 256
+    v = hsv[..., 2] * V_BINS // 256
+    bins = (h * S_BINS + s) * V_BINS + v
+
+    hist = np.bincount(bins.ravel(), minlength=H_BINS * S_BINS * V_BINS).astype(np.float32)
+    hist /= hist.sum()
+
+    gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY).astype(np.float32) / 255.0
+    return hist, gray.ravel()
+
+
+def signature_distance(
+    hists_a: np.ndarray,
+    thumbs_a: np.ndarray,
+    hists_b: np.ndarray,
+    thumbs_b: np.ndarray
+) -> np.ndarray:
+    """
+    计算两组帧特征之间的差异得分 (0-1)，支持批量计算
+
+    Args:
+        hists_a, hists_b: 直方图，形状 (N, 分箱数) 或 (分箱数,)
+        thumbs_a, thumbs_b: 灰度缩略图，形状 (N, 像素数) 或 (像素数,)
+
+    Returns:
+        差异得分
+    """
+    hist_dist = 0.5 * np.abs(hists_a - hists_b).sum(axis=-1)
+    pixel_dist = np.abs(thumbs_a - thumbs_b).mean(axis=-1)
+    return HISTOGRAM_WEIGHT * hist_dist + (1 - HISTOGRAM_WEIGHT) * pixel_dist
+
+
+def detect_shots(
+    times: np.ndarray,
+    hists: np.ndarray,
+    thumbs: np.ndarray,
+    duration: float,
+    threshold: float = 0.35,
+    min_shot_duration: float = 0.5
+) -> List[Dict[str, Any]]:
+    """
+    根据相邻采样帧的差异检测镜头边界
+
+    Args:
+        times: 采样帧时间戳
+        hists: 采样帧直方图
+        thumbs: 采样帧灰度缩略图
+        duration: 视频时长
+        threshold: 镜头切换阈值
+        min_shot_duration: 最短镜头时长，过短的切换（闪光等）不单独成镜头
+
+    Returns:
+        镜头列表，每个镜头包含起止时间和对应的采样帧范围
+    """
+    if len(times) == 0:
+        return []
+
+    # 一次性计算所有相邻帧差异
+    scores = np.zeros(len(times), dtype=np.float32)
+    if len(times) > 1:
+        scores[1:] = signature_distance(hists[1:], thumbs[1:], hists[:-1], thumbs[:-1])
+
+    boundaries = [0]
+    for i in np.flatnonzero(scores > threshold):
+        if times[i] - times[boundaries[-1]] >= min_shot_duration:
+            boundaries.append(int(i))
+
+    shots = []
+    for n, first in enumerate(boundaries):
+        last = boundaries[n + 1] if n + 1 < len(boundaries) else len(times)
+        start = 0.0 if n == 0 else float(times[first])
+        end = float(times[last]) if last < len(times) else max(duration, float(times[-1]))
+        shots.append({
+            "index": n,
+            "start": start,
+            "end": end,
+            "duration": end - start,
+            "change_score": float(scores[first]),
+            "sample_range": (first, last)
+        })
+
+    return shots
+
+
+def _split_shot(
+    first: int,
+    last: int,
+    times: np.ndarray,
+    hists: np.ndarray,
+    thumbs: np.ndarray,
+    drift_threshold: float,
+    max_gap: float
+) -> List[Tuple[int, int]]:
+    """按画面渐变（推拉摇移）和最大间隔将镜头切分为若干段"""
+    segments = []
+    anchor = first
+    for i in range(first + 1, last):
+        drift = signature_distance(hists[i], thumbs[i], hists[anchor], thumbs[anchor])
+        if drift > drift_threshold or times[i] - times[anchor] >= max_gap:
+            segments.append((anchor, i))
+            anchor = i
+    segments.append((anchor, last))
+    return segments
+
+
+def select_keyframes(
+    shots: List[Dict[str, Any]],
+    times: np.ndarray,
+    hists: np.ndarray,
+    thumbs: np.ndarray,
+    max_frames: int,
+    drift_threshold: float,
+    max_gap: float
+) -> List[Dict[str, Any]]:
+    """
+    为每个镜头选取代表帧，总数不超过 max_frames
+
+    每个镜头至少一帧；镜头内画面有明显变化或时间过长时再增加帧。
+    超出预算时优先保留时长较长的镜头。
+
+    Returns:
+        关键帧列表（按时间排序），包含采样帧序号、时间戳和所属镜头
+    """
+    candidates = []
+    for shot in shots:
+        first, last = shot["sample_range"]
+        segments = _split_shot(first, last, times, hists, thumbs, drift_threshold, max_gap)
+
+        shot_candidates = []
+        for seg_first, seg_last in segments:
+            # 选取最接近该段平均直方图的帧作为代表
+            mean_hist = hists[seg_first:seg_last].mean(axis=0)
+            dist = 0.5 * np.abs(hists[seg_first:seg_last] - mean_hist).sum(axis=1)
+            best = seg_first + int(np.argmin(dist))
+            seg_end = float(times[seg_last]) if seg_last < len(times) else shot["end"]
+            shot_candidates.append({
+                "sample": best,
+                "timestamp": float(times[best]),
+                "shot_index": shot["index"],
+                "weight": seg_end - float(times[seg_first])
+            })
+
+        # 每个镜头中时长最长的段作为主关键帧
+        shot_candidates.sort(key=lambda c: c["weight"], reverse=True)
+        shot_candidates[0]["primary"] = True
+        for candidate in shot_candidates[1:]:
+            candidate["primary"] = False
+        candidates.extend(shot_candidates)
+
+    if len(candidates) > max_frames:
+        shot_durations = {shot["index"]: shot["duration"] for shot in shots}
+        candidates.sort(
+            key=lambda c: (
+                c["primary"],
+                shot_durations[c["shot_index"]] if c["primary"] else c["weight"]
+            ),
+            reverse=True
+        )
+        candidates = candidates[:max_frames]
+
+    candidates.sort(key=lambda c: c["timestamp"])
+    return candidates
+
+
+def detect_scene_keyframes(
+    video_path: str,
+    max_frames: int = 50,
+    analysis_fps: float = 4.0,
+    threshold: float = 0.35,
+    min_shot_duration: float = 0.5,
+    max_keyframe_gap: float = 30.0
+) -> Dict[str, Any]:
+    """
+    检测视频镜头并选取关键帧
+
+    Args:
+        video_path: 视频文件路径
+        max_frames: 最大关键帧数
+        analysis_fps: 检测时每秒采样帧数
+        threshold: 镜头切换阈值
+        min_shot_duration: 最短镜头时长（秒）
+        max_keyframe_gap: 同一镜头内关键帧最大间隔（秒）
+
+    Returns:
+        包含 fps、duration、shots、keyframes 的字典；keyframes 中的 frame_index 为原视频帧序号
+    """
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频文件: {video_path}")
+
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        if fps <= 0:
+            raise ValueError("无法获取视频帧率")
+
+        stride = max(1, int(round(fps / analysis_fps)))
+
+        frame_indices = []
+        hist_list = []
+        thumb_list = []
+
+        frame_index = 0
+        while True:
+            # 非采样帧只 grab 不解码到内存，减少开销
+            if not cap.grab():
+                break
+            if frame_index % stride == 0:
+                ret, frame = cap.retrieve()
+                if not ret:
+                    break
+                hist, thumb = compute_frame_signature(frame)
+                frame_indices.append(frame_index)
+                hist_list.append(hist)
+                thumb_list.append(thumb)
+            frame_index += 1
+    finally:
+        cap.release()
+
+    if not frame_indices:
+        raise ValueError("无法读取视频帧")
+
+    total_frames = max(total_frames, frame_index)
+    duration = total_frames / fps
+
+    indices = np.array(frame_indices)
+    times = indices / fps
+    hists = np.stack(hist_list)
+    thumbs = np.stack(thumb_list)
+
+    shots = detect_shots(times, hists, thumbs, duration, threshold, min_shot_duration)
+    keyframes = select_keyframes(
+        shots, times, hists, thumbs, max_frames,
+        drift_threshold=threshold * 0.6,
+        max_gap=max_keyframe_gap
+    )
+
+    for keyframe in keyframes:
+        keyframe["frame_index"] = int(indices[keyframe.pop("sample")])
+        keyframe.pop("weight", None)
+        keyframe.pop("primary", None)
+
+    for shot in shots:
+        shot.pop("sample_range")
+        shot["keyframes"] = [k["timestamp"] for k in keyframes if k["shot_index"] == shot["index"]]
+
+    logger.info(
+        f"镜头检测完成: {len(shots)}个镜头, 选取{len(keyframes)}个关键帧 "
+        f"(采样{len(frame_indices)}帧, 步长{stride})"
+    )
+
+    return {
+        "fps": fps,
+        "duration": duration,
+        "shots": shots,
+        "keyframes": keyframes
+    }
@@ -0,0 +1,184 @@
+"""
+语速模型
+按 (服务商, 音色) 用实测的合成音频时长拟合 时长×语速 ≈ 起止静音 + 每字耗时×字数 + 每处停顿耗时×停顿数，
+合成前即可预测音频时长，并为解说段落选择恰好放进时间槽的语速，避免合成后再测量、重新合成
+"""
+
+import logging
+import math
+import re
+import threading
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+try:
+    from ..config.cloud_settings import settings
+    from .tts_cache import get_tts_cache, normalize_tts_text
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+    from src.utils.tts_cache import get_tts_cache, normalize_tts_text
+
+logger = logging.getLogger(__name__)
+
+# 先验（没有实测数据时使用）：起止静音(秒)、每字耗时(秒，约每秒 4 字)、每处停顿耗时(秒)
+PRIOR_COEFFICIENTS = np.array([0.3, 0.24, 0.25])
+
+# 先验相当于的样本数，实测样本越多先验影响越小
+PRIOR_WEIGHT = 3.0
+
+# 先验伪样本的特征 (1, 字数, 停顿数)，覆盖常见的解说段落长度
+_PRIOR_FEATURES = np.array([[1.0, 8.0, 0.0], [1.0, 20.0, 2.0], [1.0, 40.0, 3.0]])
+
+# 语速按该步长向上取整，相近的时间槽得到相同语速，便于命中语音缓存
+SPEED_STEP = 0.05
+
+# 汉字、数字按一个字计，英文单词按两个字计
+_CJK_PATTERN = re.compile(r"[\u3400-\u9fff\uf900-\ufaff]")
+_DIGIT_PATTERN = re.compile(r"\d")
+_LATIN_WORD_PATTERN = re.compile(r"[A-Za-z]+")
+# 句中停顿（句末标点不计，其后的静音已包含在起止静音中）
+_PAUSE_PATTERN = re.compile(r"[，。！？；：、,.!?;:…—]+(?=.)")
+
+# 合并全部音色数据的模型键，用于没有该音色实测数据时
+POOLED = ("*", "*")
+
+
+def text_features(text: str) -> np.ndarray:
+    """文本特征 (1, 字数, 停顿数)"""
+    text = normalize_tts_text(text)
+    units = (
+        len(_CJK_PATTERN.findall(text))
+        + len(_DIGIT_PATTERN.findall(text))
+        + 2 * len(_LATIN_WORD_PATTERN.findall(text))
+    )
+    return np.array([1.0, float(units), float(len(_PAUSE_PATTERN.findall(text)))])
+
+
+class SpeechRateModel:
+    """按音色在线更新的线性语速模型（带先验的最小二乘）"""
+
+    def __init__(self):
+        prior_xtx = PRIOR_WEIGHT / len(_PRIOR_FEATURES) * _PRIOR_FEATURES.T @ _PRIOR_FEATURES
+        self._prior = (prior_xtx, prior_xtx @ PRIOR_COEFFICIENTS)
+        # (服务商, 音色) -> [XᵀX, Xᵀy, 样本数]
+        self._stats: Dict[Tuple[str, str], list] = {}
+        self._coefficients: Dict[Tuple[str, str], np.ndarray] = {}
+
+    def observe(self, text: str, duration: float, speed: float = 1.0, provider: str = "", voice: str = ""):
+        """
+        记录一次实测结果
+
+        Args:
+            text: 合成文本
+            duration: 音频时长(秒)
+            speed: 合成时的语速
+            provider: 服务商
+            voice: 音色
+        """
+        if duration <= 0 or speed <= 0:
+            return
+        features = text_features(text)
+        # 时长近似与语速成反比，统一换算到语速 1.0
+        target = duration * speed
+        for key in ((provider, voice), POOLED):
+            stats = self._stats.setdefault(key, [np.zeros((3, 3)), np.zeros(3), 0])
+            stats[0] += np.outer(features, features)
+            stats[1] += features * target
+            stats[2] += 1
+            self._coefficients.pop(key, None)
+
+    def samples(self, provider: str = "", voice: str = "") -> int:
+        """该音色的实测样本数"""
+        stats = self._stats.get((provider, voice))
+        return stats[2] if stats else 0
+
+    def coefficients(self, provider: str = "", voice: str = "") -> np.ndarray:
+        """模型系数 (起止静音, 每字耗时, 每处停顿耗时)，该音色没有数据时使用全部音色的合并模型"""
+        key = (provider, voice) if (provider, voice) in self._stats else POOLED
+        coefficients = self._coefficients.get(key)
+        if coefficients is None:
+            xtx, xty = self._prior
+            stats = self._stats.get(key)
+            if stats is not None:
+                xtx, xty = xtx + stats[0], xty + stats[1]
+            coefficients = np.linalg.solve(xtx, xty)
+            self._coefficients[key] = coefficients
+        return coefficients
+
+    def predict(self, text: str, speed: float = 1.0, provider: str = "", voice: str = "") -> float:
+        """预测合成音频时长(秒)"""
+        duration = float(text_features(text) @ self.coefficients(provider, voice))
+        return max(0.0, duration) / speed
+
+    def fit_speed(
+        self,
+        text: str,
+        slot: float,
+        base_speed: float = 1.0,
+        provider: str = "",
+        voice: str = "",
+        max_speed: Optional[float] = None
+    ) -> float:
+        """
+        选择让音频放进时间槽的语速
+
+        预测时长不超过时间槽时保持原语速（不为填满时间槽而放慢），
+        否则加快到恰好放下，按 SPEED_STEP 向上取整，不超过 max_speed。
+
+        Args:
+            text: 合成文本
+            slot: 时间槽长度(秒)
+            base_speed: 原语速
+            provider: 服务商
+            voice: 音色
+            max_speed: 语速上限，默认使用配置
+
+        Returns:
+            语速
+        """
+        max_speed = settings.tts_max_speed if max_speed is None else max_speed
+        if slot <= 0:
+            return base_speed
+        required = self.predict(text, 1.0, provider, voice) / (slot * settings.tts_slot_fill)
+        if required <= base_speed:
+            return base_speed
+        # 先按 0.01 精度截断浮点误差再向上取整
+        speed = math.ceil(round(required / SPEED_STEP, 2)) * SPEED_STEP
+        return round(min(max(speed, base_speed), max(max_speed, base_speed)), 2)
+
+    def load_measurements(self, measurements) -> int:
+        """从语音缓存的实测记录训练，返回记录数"""
+        count = 0
+        for provider, voice, text, speed, duration in measurements:
+            self.observe(text, duration, speed, provider, voice)
+            count += 1
+        return count
+
+
+_speech_rate_model: Optional[SpeechRateModel] = None
+_speech_rate_model_lock = threading.Lock()
+
+
+def get_speech_rate_model() -> SpeechRateModel:
+    """
+    获取全局语速模型，首次使用时从语音缓存中已有的实测时长训练
+
+    首次调用要扫描语音缓存的实测记录，异步代码中应放到线程池调用（服务启动时已预先加载）；
+    加锁保证并发的首次调用只创建一个模型，不会丢失记录在另一个实例上的实测数据
+    """
+    global _speech_rate_model
+    if _speech_rate_model is None:
+        with _speech_rate_model_lock:
+            if _speech_rate_model is None:
+                model = SpeechRateModel()
+                cache = get_tts_cache()
+                if cache is not None:
+                    count = model.load_measurements(cache.measurements())
+                    logger.info(f"语速模型已从语音缓存加载{count}条实测记录")
+                _speech_rate_model = model
+    return _speech_rate_model
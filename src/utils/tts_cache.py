@@ -0,0 +1,288 @@
+"""
+语音合成结果缓存
+以 (规范化文本, 服务商, 音色, 语速, 音调, 音量, 采样率) 的哈希为键，
+合成音频按内容寻址保存在磁盘上，索引存于 SQLite，按总字节数上限做 LRU 淘汰
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import sqlite3
+import threading
+import time
+import unicodedata
+import uuid
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 最近这段时间内访问过的条目不淘汰，避免正在进行的批量合成刚拿到的音频被删除
+EVICTION_GRACE_SECONDS = 300
+
+
+def normalize_tts_text(text: str) -> str:
+    """规范化合成文本：全角/半角统一（NFKC），合并连续空白"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def tts_cache_key(
+    text: str,
+    provider: str,
+    voice: str,
+    speed: float,
+    pitch: float,
+    volume: float,
+    sample_rate: int
+) -> str:
+    """计算语音合成缓存键"""
+    payload = json.dumps(
+        [
+            normalize_tts_text(text), provider, voice,
+            round(speed, 3), round(pitch, 3), round(volume, 3), int(sample_rate)
+        ],
+        ensure_ascii=False
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TTSAudioCache:
+    """内容寻址的语音合成音频缓存"""
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        """
+        Args:
+            cache_dir: 缓存目录（音频文件和索引数据库）
+            max_bytes: 音频总字节数上限，超出后淘汰最久未使用的条目
+        """
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.cache_dir / "index.db"), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS tts_audio (
+                cache_key TEXT PRIMARY KEY,
+                provider TEXT NOT NULL,
+                voice TEXT NOT NULL,
+                file_name TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                text TEXT,
+                speed REAL,
+                duration REAL
+            )
+            """
+        )
+        # 旧版本索引没有文本和时长列，补上后旧条目不参与语速模型训练
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(tts_audio)")}
+        for column, column_type in (("text", "TEXT"), ("speed", "REAL"), ("duration", "REAL")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE tts_audio ADD COLUMN {column} {column_type}")
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_tts_last_access ON tts_audio (last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM tts_audio"
+        ).fetchone()[0]
+
+    def _audio_path(self, file_name: str) -> Path:
+        # 按键的前两位分目录，避免单个目录文件过多
+        return self.cache_dir / file_name[:2] / file_name
+
+    def _lookup(self, cache_key: str) -> Optional[str]:
+        """查询缓存，命中时刷新访问时间并返回文件名（调用方持有锁）"""
+        row = self._conn.execute(
+            "SELECT file_name, size FROM tts_audio WHERE cache_key=?", (cache_key,)
+        ).fetchone()
+        if row is not None and not self._audio_path(row[0]).exists():
+            # 音频文件被外部删除，索引作废
+            self._conn.execute("DELETE FROM tts_audio WHERE cache_key=?", (cache_key,))
+            self._conn.commit()
+            self._total_bytes -= row[1]
+            row = None
+        if row is None:
+            self.misses += 1
+            return None
+
+        self._conn.execute(
+            "UPDATE tts_audio SET last_access=? WHERE cache_key=?", (time.time(), cache_key)
+        )
+        self._conn.commit()
+        self.hits += 1
+        return row[0]
+
+    def get(self, cache_key: str) -> Optional[str]:
+        """查询缓存，命中时刷新访问时间并返回缓存中的音频路径（可能随淘汰被删除）"""
+        with self._lock:
+            file_name = self._lookup(cache_key)
+        return str(self._audio_path(file_name)) if file_name else None
+
+    def checkout(self, cache_key: str, output_dir: str) -> Optional[str]:
+        """
+        查询缓存，命中时把音频硬链接（不在同一文件系统时复制）到 output_dir
+
+        副本归调用方所有，之后的淘汰或清空缓存不会删除它
+
+        Returns:
+            副本路径，未命中时返回 None
+        """
+        with self._lock:
+            file_name = self._lookup(cache_key)
+            if file_name is None:
+                return None
+            source = self._audio_path(file_name)
+            target = Path(output_dir) / f"cached_{uuid.uuid4().hex[:12]}{source.suffix}"
+            target.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                os.link(source, target)
+            except OSError:
+                shutil.copyfile(source, target)
+        return str(target)
+
+    def put(
+        self,
+        cache_key: str,
+        audio_path: str,
+        provider: str,
+        voice: str,
+        text: Optional[str] = None,
+        speed: Optional[float] = None,
+        duration: Optional[float] = None
+    ) -> str:
+        """
+        把合成的音频存入缓存
+
+        Args:
+            cache_key: 缓存键
+            audio_path: 合成的音频文件
+            provider: 服务商
+            voice: 音色
+            text: 合成文本（与语速、实测时长一起供语速模型训练）
+            speed: 语速
+            duration: 音频实测时长(秒)
+
+        Returns:
+            缓存中的音频路径；音频超过容量上限时不缓存，返回原路径
+        """
+        size = os.path.getsize(audio_path)
+        if size > self.max_bytes:
+            return audio_path
+
+        file_name = f"{cache_key}{Path(audio_path).suffix or '.wav'}"
+        target = self._audio_path(file_name)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        # 先写临时文件再改名，读取方不会看到不完整的音频
+        partial = target.with_name(f"{target.name}.{threading.get_ident()}.part")
+        shutil.copyfile(audio_path, partial)
+        os.replace(partial, target)
+
+        now = time.time()
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM tts_audio WHERE cache_key=?", (cache_key,)
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO tts_audio VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (cache_key, provider, voice, file_name, size, now, now, text, speed, duration)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+        return str(target)
+
+    def _evict(self):
+        """按 LRU 淘汰直到总字节数不超过上限（调用方持有锁）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT cache_key, file_name, size FROM tts_audio WHERE last_access < ? ORDER BY last_access",
+            (time.time() - EVICTION_GRACE_SECONDS,)
+        ).fetchall()
+        for cache_key, file_name, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM tts_audio WHERE cache_key=?", (cache_key,))
+            self._audio_path(file_name).unlink(missing_ok=True)
+            self._total_bytes -= size
+            evicted += 1
+
+        logger.debug(f"语音缓存淘汰{evicted}条")
+
+    def measurements(self) -> List[Tuple[str, str, str, float, float]]:
+        """
+        已缓存音频的实测时长
+
+        Returns:
+            [(服务商, 音色, 文本, 语速, 时长)]
+        """
+        with self._lock:
+            return self._conn.execute(
+                "SELECT provider, voice, text, speed, duration FROM tts_audio "
+                "WHERE text IS NOT NULL AND speed IS NOT NULL AND duration > 0"
+            ).fetchall()
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            for (file_name,) in self._conn.execute("SELECT file_name FROM tts_audio").fetchall():
+                self._audio_path(file_name).unlink(missing_ok=True)
+            self._conn.execute("DELETE FROM tts_audio")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM tts_audio").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_tts_cache: Optional[TTSAudioCache] = None
+
+
+def get_tts_cache() -> Optional[TTSAudioCache]:
+    """获取全局语音合成缓存，未启用缓存时返回 None"""
+    global _tts_cache
+    if not settings.enable_cache:
+        return None
+    if _tts_cache is None:
+        _tts_cache = TTSAudioCache(
+            settings.tts_cache_dir,
+            settings.tts_cache_max_mb * 1024 * 1024
+        )
+    return _tts_cache
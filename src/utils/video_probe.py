@@ -0,0 +1,263 @@
+"""
+视频探测服务
+一次性读取帧率、帧数、时长、分辨率、编码、关键帧索引和音轨信息，
+按 (路径, 大小, 修改时间) 缓存，各模块共用，避免重复打开容器
+"""
+
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import cv2
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+# ffprobe/ffmpeg 探测超时(秒)
+PROBE_TIMEOUT = 120
+
+# 无 ffprobe 时从 ffmpeg -i 输出中解析音轨信息
+_FFMPEG_AUDIO_PATTERN = re.compile(r"Stream #\d+:\d+.*?: Audio: (\w+).*?, (\d+) Hz, ([^,\n]+)")
+
+
+@dataclass
+class VideoProbe:
+    """视频元数据"""
+    path: str
+    size: int
+    mtime: float
+    fps: float
+    frame_count: int
+    duration: float
+    width: int
+    height: int
+    codec: str
+    keyframe_indices: Optional[List[int]] = None
+    audio: Optional[Dict[str, Any]] = None
+
+    @property
+    def resolution(self) -> Tuple[int, int]:
+        return (self.width, self.height)
+
+    @property
+    def has_audio(self) -> bool:
+        return self.audio is not None
+
+    def to_dict(self, include_keyframes: bool = False) -> Dict[str, Any]:
+        """可 JSON 序列化的表示，关键帧索引默认只给出数量"""
+        info = asdict(self)
+        keyframes = info.pop("keyframe_indices")
+        info["keyframe_count"] = len(keyframes) if keyframes is not None else None
+        if include_keyframes:
+            info["keyframe_indices"] = keyframes
+        info["has_audio"] = self.has_audio
+        return info
+
+
+def _fourcc_to_str(value: float) -> str:
+    code = int(value)
+    chars = "".join(chr((code >> (8 * i)) & 0xFF) for i in range(4))
+    return chars.strip("\x00 ").lower()
+
+
+def _probe_streams(video_path: str) -> Tuple[Optional[str], Optional[Dict[str, Any]]]:
+    """探测视频编码和第一条音轨，返回 (视频编码, 音轨信息)"""
+    ffprobe = shutil.which("ffprobe")
+    if ffprobe:
+        output = subprocess.run(
+            [
+                ffprobe, "-v", "error",
+                "-show_entries", "stream=codec_type,codec_name,sample_rate,channels",
+                "-of", "json", video_path
+            ],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT
+        ).stdout
+        streams = json.loads(output or "{}").get("streams", [])
+        video = next((s for s in streams if s.get("codec_type") == "video"), None)
+        audio = next((s for s in streams if s.get("codec_type") == "audio"), None)
+        return (
+            video.get("codec_name") if video else None,
+            {
+                "codec": audio.get("codec_name"),
+                "sample_rate": int(audio.get("sample_rate", 0)),
+                "channels": audio.get("channels")
+            } if audio else None
+        )
+
+    ffmpeg = shutil.which("ffmpeg")
+    if ffmpeg:
+        # ffmpeg -i 只读取文件头并打印流信息（以“未指定输出”错误退出）
+        stderr = subprocess.run(
+            [ffmpeg, "-hide_banner", "-nostdin", "-i", video_path],
+            capture_output=True, text=True, timeout=PROBE_TIMEOUT
+        ).stderr
+        video = re.search(r"Stream #\d+:\d+.*?: Video: (\w+)", stderr)
+        audio = _FFMPEG_AUDIO_PATTERN.search(stderr)
+        return (
+            video.group(1) if video else None,
+            {
+                "codec": audio.group(1),
+                "sample_rate": int(audio.group(2)),
+                "channels": audio.group(3).strip()
+            } if audio else None
+        )
+
+    return None, None
+
+
+def _probe_keyframes(video_path: str, fps: float) -> Optional[List[int]]:
+    """
+    读取视频流关键帧（I帧）序号
+
+    只解析数据包标志位，不解码；需要 ffprobe，不可用时返回 None。
+    """
+    ffprobe = shutil.which("ffprobe")
+    if not ffprobe or fps <= 0:
+        return None
+
+    output = subprocess.run(
+        [
+            ffprobe, "-v", "error", "-select_streams", "v:0",
+            "-show_entries", "packet=pts_time,flags",
+            "-of", "csv=p=0", video_path
+        ],
+        capture_output=True, text=True, timeout=PROBE_TIMEOUT
+    ).stdout
+
+    times = []
+    for line in output.splitlines():
+        pts_time, _, flags = line.partition(",")
+        if "K" in flags and pts_time not in ("", "N/A"):
+            times.append(float(pts_time))
+    if not times:
+        return None
+
+    # 以首个关键帧为第 0 帧，换算为解码顺序中的帧序号
+    start = min(times)
+    return sorted({int(round((t - start) * fps)) for t in times})
+
+
+def _probe(video_path: str, size: int, mtime: float, with_keyframes: bool) -> VideoProbe:
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"无法打开视频文件: {video_path}")
+    try:
+        fps = cap.get(cv2.CAP_PROP_FPS) or 0.0
+        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fourcc = _fourcc_to_str(cap.get(cv2.CAP_PROP_FOURCC))
+    finally:
+        cap.release()
+
+    try:
+        codec, audio = _probe_streams(video_path)
+    except Exception as e:
+        logger.warning(f"探测音视频流失败: {e}")
+        codec, audio = None, None
+
+    keyframes = None
+    if with_keyframes:
+        try:
+            keyframes = _probe_keyframes(video_path, fps)
+        except Exception as e:
+            logger.warning(f"读取关键帧索引失败: {e}")
+
+    return VideoProbe(
+        path=video_path,
+        size=size,
+        mtime=mtime,
+        fps=fps,
+        frame_count=frame_count,
+        duration=frame_count / fps if fps > 0 else 0,
+        width=width,
+        height=height,
+        codec=codec or fourcc,
+        keyframe_indices=keyframes,
+        audio=audio
+    )
+
+
+class VideoProbeCache:
+    """视频元数据 LRU 缓存，文件大小或修改时间变化后自动失效"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # 值为 (元数据, 是否已尝试读取关键帧索引)
+        self._entries: "OrderedDict[Tuple[str, int, int], Tuple[VideoProbe, bool]]" = OrderedDict()
+
+    def get(self, video_path: str, with_keyframes: bool = True) -> VideoProbe:
+        """获取视频元数据，未缓存时探测"""
+        path = str(Path(video_path).resolve())
+        stat = os.stat(path)
+        key = (path, stat.st_size, stat.st_mtime_ns)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] or not with_keyframes):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            self.misses += 1
+
+        probe = _probe(str(video_path), stat.st_size, stat.st_mtime, with_keyframes)
+        logger.debug(
+            f"视频探测: {video_path} {probe.duration:.1f}秒 {probe.width}x{probe.height} {probe.codec}, "
+            f"关键帧{len(probe.keyframe_indices) if probe.keyframe_indices is not None else '未知'}"
+        )
+
+        with self._lock:
+            self._entries[key] = (probe, with_keyframes)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return probe
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        return {"entries": len(self._entries), "max_entries": self.max_entries, "hits": self.hits, "misses": self.misses}
+
+
+_probe_cache: Optional[VideoProbeCache] = None
+
+
+def get_probe_cache() -> VideoProbeCache:
+    """获取全局视频元数据缓存"""
+    global _probe_cache
+    if _probe_cache is None:
+        _probe_cache = VideoProbeCache(settings.video_probe_cache_size)
+    return _probe_cache
+
+
+def probe_video(video_path: str, with_keyframes: Optional[bool] = None) -> VideoProbe:
+    """
+    获取视频元数据（带缓存）
+
+    Args:
+        video_path: 视频文件路径
+        with_keyframes: 是否读取关键帧索引，默认按 settings.video_probe_keyframes
+
+    Returns:
+        视频元数据
+    """
+    if with_keyframes is None:
+        with_keyframes = settings.video_probe_keyframes
+    return get_probe_cache().get(video_path, with_keyframes)
@@ -2,118 +2,202 @@
 视频处理工具函数
 """
 
-import os
-import cv2
 import logging
-from pathlib import Path
-from typing import List, Optional, Tuple
+from typing import Any, Dict, List, Optional, Tuple
+import shutil
 import tempfile
 
+import numpy as np
+
+from .audio_extraction import extract_audio
+from .frame_buffer import EncodedFrame
+from .frame_extractor import FrameExtractor
+from .image_prep import encode_frame
+from .scene_detection import detect_scene_keyframes
+from .video_probe import probe_video
+
 logger = logging.getLogger(__name__)
 
+def _extract_frames_by_interval(
+    video_path: str, 
+    interval: int, 
+    max_frames: int
+) -> List[EncodedFrame]:
+    """按固定间隔提取帧"""
+    probe = probe_video(video_path)
+    with FrameExtractor(video_path, keyframe_indices=probe.keyframe_indices) as extractor:
+        fps = extractor.fps
+        total_frames = extractor.frame_count
+        duration = total_frames / fps if fps > 0 else 0
+        
+        logger.info(f"视频信息: FPS={fps}, 总帧数={total_frames}, 时长={duration:.2f}秒")
+        
+        timestamps = list(np.arange(0, duration, interval)[:max_frames])
+        decoded = extractor.read_at_timestamps(timestamps)
+    
+    return [
+        encode_frame(frame, float(timestamp))
+        for timestamp, frame in decoded
+        if frame is not None
+    ]
+
+def extract_keyframes(
+    video_path: str, 
+    output_dir: str = None, 
+    interval: int = 3, 
+    max_frames: int = 50,
+    use_scene_detection: bool = True,
+    scene_threshold: float = 0.35,
+    analysis_fps: float = 4.0,
+    min_shot_duration: float = 0.5,
+    max_keyframe_gap: float = 30.0,
+    persist: bool = False
+) -> Dict[str, Any]:
+    """
+    提取关键帧，默认按镜头选取
+    
+    帧以内存JPEG (EncodedFrame) 形式返回，只有 persist 为 True 时才写入磁盘
+    
+    Args:
+        video_path: 视频文件路径
+        output_dir: 帧图片输出目录（仅 persist 时使用），如果为None则使用临时目录
+        interval: 固定间隔抽帧时的间隔（秒），镜头检测失败时也使用该方式
+        max_frames: 最大帧数
+        use_scene_detection: 是否按镜头选取关键帧
+        scene_threshold: 镜头切换阈值
+        analysis_fps: 镜头检测时每秒采样帧数
+        min_shot_duration: 最短镜头时长（秒）
+        max_keyframe_gap: 同一镜头内关键帧最大间隔（秒）
+        persist: 是否将帧图片写入磁盘（调试或需要保留中间文件时）
+    
+    Returns:
+        {
+            "frames": [EncodedFrame, ...],
+            "frame_shots": [每帧所属镜头序号，固定间隔抽帧时为None, ...],
+            "shots": [{"index", "start", "end", "duration", "change_score", "keyframes"}, ...],
+            "method": "scene" 或 "interval"
+        }
+    """
+    result = None
+    
+    if use_scene_detection:
+        try:
+            detection = detect_scene_keyframes(
+                video_path,
+                max_frames=max_frames,
+                analysis_fps=analysis_fps,
+                threshold=scene_threshold,
+                min_shot_duration=min_shot_duration,
+                max_keyframe_gap=max_keyframe_gap
+            )
+            
+            keyframes = detection["keyframes"]
+            probe = probe_video(video_path)
+            with FrameExtractor(video_path, keyframe_indices=probe.keyframe_indices) as extractor:
+                decoded = dict(extractor.read_at_indices([k["frame_index"] for k in keyframes]))
+            
+            frames = []
+            frame_shots = []
+            for keyframe in keyframes:
+                frame = decoded.get(keyframe["frame_index"])
+                if frame is None:
+                    continue
+                frames.append(encode_frame(frame, keyframe["timestamp"]))
+                frame_shots.append(keyframe["shot_index"])
+            
+            if frames:
+                logger.info(f"按镜头提取 {len(frames)} 帧 ({len(detection['shots'])}个镜头)")
+                result = {
+                    "frames": frames,
+                    "frame_shots": frame_shots,
+                    "shots": detection["shots"],
+                    "method": "scene"
+                }
+            
+        except Exception as e:
+            logger.warning(f"镜头检测失败，改用固定间隔抽帧: {e}")
+    
+    if result is None:
+        frames = _extract_frames_by_interval(video_path, interval, max_frames)
+        logger.info(f"成功提取 {len(frames)} 帧")
+        result = {
+            "frames": frames,
+            "frame_shots": [None] * len(frames),
+            "shots": [],
+            "method": "interval"
+        }
+    
+    if persist:
+        if output_dir is None:
+            output_dir = tempfile.mkdtemp(prefix="frames_")
+        for i, frame in enumerate(result["frames"]):
+            frame.save(output_dir, i)
+    
+    return result
+
 def extract_frames_from_video(
     video_path: str, 
     output_dir: str = None, 
     interval: int = 3, 
-    max_frames: int = 50
-) -> List[str]:
+    max_frames: int = 50,
+    use_scene_detection: bool = True
+) -> List[Tuple[str, float]]:
     """
-    从视频中提取帧
+    从视频中提取帧并保存为图片
     
     Args:
         video_path: 视频文件路径
         output_dir: 输出目录，如果为None则使用临时目录
         interval: 提取间隔（秒）
         max_frames: 最大帧数
+        use_scene_detection: 是否按镜头选取关键帧
     
     Returns:
-        提取的帧文件路径列表
+        提取的 (帧文件路径, 时间戳) 列表
     """
     try:
-        if output_dir is None:
-            output_dir = tempfile.mkdtemp(prefix="frames_")
-        else:
-            os.makedirs(output_dir, exist_ok=True)
-        
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            logger.error(f"无法打开视频文件: {video_path}")
-            return []
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        duration = total_frames / fps if fps > 0 else 0
-        
-        logger.info(f"视频信息: FPS={fps}, 总帧数={total_frames}, 时长={duration:.2f}秒")
-        
-        frame_paths = []
-        frame_interval = int(fps * interval) if fps > 0 else 30
-        
-        frame_count = 0
-        extracted_count = 0
-        
-        while cap.isOpened() and extracted_count < max_frames:
-            ret, frame = cap.read()
-            if not ret:
-                break
-            
-            if frame_count % frame_interval == 0:
-                timestamp = frame_count / fps if fps > 0 else extracted_count * interval
-                frame_filename = f"frame_{extracted_count:04d}_{timestamp:.2f}s.jpg"
-                frame_path = os.path.join(output_dir, frame_filename)
-                
-                # 保存帧
-                cv2.imwrite(frame_path, frame)
-                frame_paths.append(frame_path)
-                extracted_count += 1
-                
-                logger.debug(f"提取帧 {extracted_count}: {frame_path}")
-            
-            frame_count += 1
-        
-        cap.release()
-        logger.info(f"成功提取 {len(frame_paths)} 帧")
-        return frame_paths
+        frames = extract_keyframes(
+            video_path,
+            output_dir=output_dir,
+            interval=interval,
+            max_frames=max_frames,
+            use_scene_detection=use_scene_detection,
+            persist=True
+        )["frames"]
+        return [(frame.path, frame.timestamp) for frame in frames]
         
     except Exception as e:
         logger.error(f"提取视频帧失败: {e}")
         return []
 
-def extract_audio_from_video(video_path: str, output_path: str = None) -> Optional[str]:
+def extract_audio_from_video(
+    video_path: str,
+    output_path: str = None,
+    sample_rate: int = 16000
+) -> Optional[str]:
     """
-    从视频中提取音频
+    从视频中提取音频（16位单声道WAV）
+    
+    音轨由音频提取服务解码并缓存，同一视频重复提取时直接复用。
     
     Args:
         video_path: 视频文件路径
-        output_path: 输出音频文件路径，如果为None则自动生成
+        output_path: 输出音频文件路径，如果为None则直接返回缓存文件路径（调用方不应删除）
+        sample_rate: 采样率
     
     Returns:
-        提取的音频文件路径，失败返回None
+        提取的音频文件路径，视频没有音轨或失败时返回None
     """
     try:
-        if output_path is None:
-            video_name = Path(video_path).stem
-            output_path = os.path.join(tempfile.gettempdir(), f"{video_name}_audio.wav")
-        
-        # 使用OpenCV提取音频（简化版本）
-        # 注意：OpenCV主要用于视频处理，音频提取功能有限
-        # 在实际项目中，建议使用ffmpeg或moviepy
-        
-        # 这里我们先返回一个占位符，表示音频提取功能需要进一步实现
-        logger.warning("音频提取功能需要安装ffmpeg或moviepy")
-        
-        # 检查视频是否有音频轨道
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            logger.error(f"无法打开视频文件: {video_path}")
+        audio = extract_audio(video_path, sample_rate)
+        if audio is None:
+            logger.warning(f"视频没有音轨: {video_path}")
             return None
         
-        # 创建一个空的音频文件作为占位符
-        with open(output_path, 'w') as f:
-            f.write("# 音频提取占位符\n")
+        if output_path is None:
+            return audio.path
         
-        cap.release()
-        logger.info(f"音频提取占位符已创建: {output_path}")
+        shutil.copyfile(audio.path, output_path)
         return output_path
         
     except Exception as e:
@@ -161,7 +245,7 @@ def create_narrated_video(
 
 def get_video_info(video_path: str) -> dict:
     """
-    获取视频基本信息
+    获取视频基本信息（读取视频元数据缓存）
     
     Args:
         video_path: 视频文件路径
@@ -170,26 +254,10 @@ def get_video_info(video_path: str) -> dict:
         视频信息字典
     """
     try:
-        cap = cv2.VideoCapture(video_path)
-        if not cap.isOpened():
-            return {"error": "无法打开视频文件"}
-        
-        fps = cap.get(cv2.CAP_PROP_FPS)
-        frame_count = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
-        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-        duration = frame_count / fps if fps > 0 else 0
-        
-        cap.release()
-        
-        return {
-            "fps": fps,
-            "frame_count": frame_count,
-            "width": width,
-            "height": height,
-            "duration": duration,
-            "size_mb": os.path.getsize(video_path) / (1024 * 1024)
-        }
+        probe = probe_video(video_path)
+        info = probe.to_dict()
+        info["size_mb"] = probe.size / (1024 * 1024)
+        return info
         
     except Exception as e:
         logger.error(f"获取视频信息失败: {e}")
@@ -0,0 +1,184 @@
+"""
+视觉分析结果缓存
+以 (帧内容哈希, 服务商, 模型, 提示词版本) 为键，将单帧分析结果持久化到 SQLite，
+按总字节数上限做 LRU 淘汰
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+try:
+    from ..config.cloud_settings import settings
+except ImportError:
+    # 如果相对导入失败，尝试绝对导入
+    import sys
+    sys.path.append(str(Path(__file__).parent.parent.parent))
+    from src.config.cloud_settings import settings
+
+logger = logging.getLogger(__name__)
+
+
+class VisionResultCache:
+    """基于 SQLite 的视觉分析结果缓存"""
+
+    def __init__(self, db_path: str, max_bytes: int):
+        """
+        Args:
+            db_path: 数据库文件路径
+            max_bytes: 缓存结果总字节数上限，超出后淘汰最久未使用的条目
+        """
+        self.db_path = Path(db_path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS vision_results (
+                frame_hash TEXT NOT NULL,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                result TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_access REAL NOT NULL,
+                PRIMARY KEY (frame_hash, provider, model, prompt_version)
+            )
+            """
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_vision_last_access ON vision_results (last_access)"
+        )
+        self._conn.commit()
+        self._total_bytes = self._conn.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM vision_results"
+        ).fetchone()[0]
+
+    def get(
+        self,
+        frame_hash: str,
+        provider: str,
+        model: str,
+        prompt_version: str
+    ) -> Optional[Dict[str, Any]]:
+        """查询缓存，命中时刷新访问时间"""
+        key = (frame_hash, provider, model, prompt_version)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT result FROM vision_results "
+                "WHERE frame_hash=? AND provider=? AND model=? AND prompt_version=?",
+                key
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE vision_results SET last_access=? "
+                "WHERE frame_hash=? AND provider=? AND model=? AND prompt_version=?",
+                (time.time(),) + key
+            )
+            self._conn.commit()
+            self.hits += 1
+
+        return json.loads(row[0])
+
+    def put(
+        self,
+        frame_hash: str,
+        provider: str,
+        model: str,
+        prompt_version: str,
+        result: Dict[str, Any]
+    ):
+        """写入缓存，超出容量时淘汰最久未使用的条目"""
+        payload = json.dumps(result, ensure_ascii=False)
+        size = len(payload.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+
+        now = time.time()
+        key = (frame_hash, provider, model, prompt_version)
+        with self._lock:
+            old = self._conn.execute(
+                "SELECT size FROM vision_results "
+                "WHERE frame_hash=? AND provider=? AND model=? AND prompt_version=?",
+                key
+            ).fetchone()
+            self._conn.execute(
+                "INSERT OR REPLACE INTO vision_results VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                key + (payload, size, now, now)
+            )
+            self._total_bytes += size - (old[0] if old else 0)
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        """按 LRU 淘汰直到总字节数不超过上限（调用方持有锁）"""
+        if self._total_bytes <= self.max_bytes:
+            return
+
+        evicted = 0
+        rows = self._conn.execute(
+            "SELECT rowid, size FROM vision_results ORDER BY last_access"
+        ).fetchall()
+        for rowid, size in rows:
+            if self._total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM vision_results WHERE rowid=?", (rowid,))
+            self._total_bytes -= size
+            evicted += 1
+
+        logger.debug(f"视觉缓存淘汰{evicted}条")
+
+    def clear(self):
+        """清空缓存"""
+        with self._lock:
+            self._conn.execute("DELETE FROM vision_results")
+            self._conn.commit()
+            self._total_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            entries = self._conn.execute("SELECT COUNT(*) FROM vision_results").fetchone()[0]
+        lookups = self.hits + self.misses
+        return {
+            "entries": entries,
+            "size_bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        """关闭数据库连接"""
+        with self._lock:
+            self._conn.close()
+
+
+_vision_cache: Optional[VisionResultCache] = None
+
+
+def get_vision_cache() -> Optional[VisionResultCache]:
+    """获取全局视觉缓存，未启用缓存时返回 None"""
+    global _vision_cache
+    if not settings.enable_cache:
+        return None
+    if _vision_cache is None:
+        _vision_cache = VisionResultCache(
+            settings.vision_cache_path,
+            settings.vision_cache_max_mb * 1024 * 1024
+        )
+    return _vision_cache
@@ -0,0 +1,45 @@
+"""
+Tests for streamed frame analysis
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_stream_yields_reused_frames_with_own_fields():
+    """Each frame is yielded once; reused frames keep their own timestamp and shot"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent
+    from utils.frame_buffer import EncodedFrame
+
+    agent = CloudVideoAnalysisAgent()
+    calls = []
+
+    async def fake_batch(frames):
+        calls.append([frame.timestamp for frame in frames])
+        return [{"timestamp": frame.timestamp, "scene_description": "画面"} for frame in frames]
+
+    agent._analyze_frame_batch = fake_batch
+
+    rng = np.random.default_rng(0)
+    scene = np.kron(rng.integers(0, 255, (9, 16, 3), dtype=np.uint8), np.ones((20, 20, 1), dtype=np.uint8))
+    frames = [
+        {"frame": EncodedFrame.from_array(scene, float(t)), "shot_index": shot}
+        for t, shot in [(0, 0), (1, 0), (2, 1)]
+    ]
+
+    async def collect():
+        return [analysis async for analysis in agent._analyze_frames_stream(frames)]
+
+    results = asyncio.run(collect())
+
+    assert sum(len(batch) for batch in calls) == 1
+    assert sorted(r["timestamp"] for r in results) == [0.0, 1.0, 2.0]
+    reused = {r["timestamp"]: r for r in results if "reused_from" in r}
+    assert reused[2.0]["shot_index"] == 1
+    assert reused[2.0]["reused_from"] == 0.0
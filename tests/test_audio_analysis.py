@@ -0,0 +1,35 @@
+"""
+Tests for streaming audio feature analysis
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _signal(sample_rate=16000):
+    t = np.arange(sample_rate * 4) / sample_rate
+    tone = 0.3 * np.sin(2 * np.pi * 440 * t)
+    # 每0.4秒一半时间有声，模拟语音的音节停顿
+    gate = np.where((t % 0.4) < 0.2, 1.0, 0.02)
+    noise = 0.3 * np.random.default_rng(0).standard_normal(len(t)) * gate
+    silence = np.zeros(sample_rate * 2)
+    return (np.concatenate((tone, noise, silence)) * 32767).astype(np.int16)
+
+
+def test_timeline_labels_and_chunking():
+    """Tone, gated noise and silence are labelled; chunk size does not change the result"""
+    from utils.audio_analysis import analyze_pcm_chunks
+
+    pcm = _signal()
+    whole = analyze_pcm_chunks([pcm], 16000)
+    chunked = analyze_pcm_chunks(np.array_split(pcm, 37), 16000)
+
+    assert [s["label"] for s in whole.segments()] == ["music", "speech", "silence"]
+    assert whole.duration == 10.0
+    assert np.array_equal(whole.labels, chunked.labels)
+    assert np.allclose(whole.rms, chunked.rms)
@@ -0,0 +1,76 @@
+"""
+Tests for cached ffmpeg audio extraction
+"""
+
+import shutil
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="ffmpeg not installed")
+def test_extract_once_and_memmap(tmp_path):
+    """Audio is decoded once per (file, sample rate) and read back via memmap"""
+    from utils.audio_extraction import AudioExtractionService
+
+    source = tmp_path / "source.wav"
+    samples = (np.sin(np.arange(16000) / 5) * 10000).astype(np.int16)
+    with wave.open(str(source), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(samples.tobytes())
+
+    service = AudioExtractionService(str(tmp_path / "cache"), 10 * 1024 * 1024)
+    audio = service.extract(str(source), 16000)
+    again = service.extract(str(source), 16000)
+
+    assert service.decodes == 1
+    assert again is audio
+    assert audio.duration == 1.0
+    assert np.array_equal(np.asarray(audio.samples), samples)
+    assert sum(len(chunk) for chunk in audio.iter_chunks(0.3)) == len(samples)
+
+
+def test_fingerprint_tracks_mtime(tmp_path):
+    """An in-place edit between the hashed head and tail still changes the fingerprint"""
+    import os
+
+    from utils.audio_extraction import FINGERPRINT_BYTES, video_fingerprint
+
+    video = tmp_path / "video.mp4"
+    data = bytearray(FINGERPRINT_BYTES * 3)
+    video.write_bytes(data)
+    before = video_fingerprint(str(video))
+
+    # 只改动首尾 1MB 之外的内容，大小不变
+    data[FINGERPRINT_BYTES + 10] = 1
+    video.write_bytes(data)
+    stat = video.stat()
+    os.utime(video, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert video_fingerprint(str(video)) != before
+
+
+@pytest.mark.skipif(shutil.which("sh") is None, reason="sh not available")
+def test_chatty_stderr_does_not_block_the_pipe(tmp_path):
+    """ffmpeg output on stderr larger than a pipe buffer never stalls PCM reading"""
+    from utils.audio_extraction import iter_pcm_chunks
+
+    # 模拟 ffmpeg：先向 stderr 写出超过管道缓冲区的内容，再输出 PCM
+    fake_ffmpeg = tmp_path / "ffmpeg"
+    fake_ffmpeg.write_text(
+        "#!/bin/sh\n"
+        "head -c 262144 /dev/zero | tr '\\0' x >&2\n"
+        "head -c 32000 /dev/zero\n"
+    )
+    fake_ffmpeg.chmod(0o755)
+
+    chunks = list(iter_pcm_chunks("unused.mp4", 16000, chunk_seconds=0.5, ffmpeg=str(fake_ffmpeg)))
+    assert sum(len(chunk) for chunk in chunks) == 16000
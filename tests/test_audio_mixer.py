@@ -0,0 +1,131 @@
+"""
+Tests for the timeline audio mixer
+"""
+
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def write_wav(path, samples, sample_rate, channels=1):
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(channels)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes((np.asarray(samples) * 32767).astype("<i2").tobytes())
+    return str(path)
+
+
+def read_wav(path):
+    with wave.open(str(path), "rb") as wav:
+        return wav.getframerate(), np.frombuffer(wav.readframes(wav.getnframes()), dtype="<i2") / 32767
+
+
+def test_segments_are_placed_sample_accurately_with_gain_and_resampling(tmp_path):
+    """Each segment starts at its exact sample, is resampled to the output rate and scaled by its gain"""
+    from utils.audio_mixer import AudioTrack, mix_tracks
+
+    a = write_wav(tmp_path / "a.wav", np.full(800, 0.5), 8000)        # 0.1 秒，8kHz
+    b = write_wav(tmp_path / "b.wav", np.full(3200, 0.2), 16000)      # 0.2 秒，16kHz
+    stereo = write_wav(tmp_path / "c.wav", np.tile([0.4, 0.0], 1600), 16000, channels=2)
+
+    output = mix_tracks(
+        [AudioTrack(b, 0.3, gain=2.0), AudioTrack(a, 0.25), AudioTrack(stereo, 1.0)],
+        str(tmp_path / "mix.wav"),
+        sample_rate=16000,
+        block_seconds=0.07
+    )
+    rate, mixed = read_wav(output)
+
+    assert rate == 16000
+    assert len(mixed) == 16000 + 1600
+    assert np.all(mixed[:4000] == 0)
+    assert np.allclose(mixed[4000:4800], 0.5, atol=1e-3)
+    # 0.3 秒起两段重叠：0.5 + 0.2 * 2
+    assert np.allclose(mixed[4800:5600], 0.9, atol=1e-3)
+    assert np.allclose(mixed[5600:8000], 0.4, atol=1e-3)
+    assert np.all(mixed[8000:16000] == 0)
+    # 双声道下混为单声道
+    assert np.allclose(mixed[16000:], 0.2, atol=1e-3)
+
+
+def test_background_music_loops_and_ducks_under_narration(tmp_path):
+    """Music is looped to the timeline, lowered while narration plays and the result does not depend on block size"""
+    from utils.audio_mixer import AudioTrack, mix_tracks
+
+    voice = write_wav(tmp_path / "voice.wav", np.zeros(8000), 8000)   # 1 秒静默解说
+    music = write_wav(tmp_path / "music.wav", np.full(4000, 0.5), 8000)  # 0.5 秒，循环播放
+
+    outputs = [
+        mix_tracks(
+            [AudioTrack(voice, 2.0)],
+            str(tmp_path / f"mix_{block}.wav"),
+            sample_rate=8000,
+            background_music=music,
+            music_volume=0.4,
+            duck_ratio=0.25,
+            duck_fade=0.5,
+            duration=5.0,
+            block_seconds=block
+        )
+        for block in (0.013, 10.0)
+    ]
+    _, small_blocks = read_wav(outputs[0])
+    _, one_block = read_wav(outputs[1])
+
+    assert len(small_blocks) == 40000
+    assert np.array_equal(small_blocks, one_block)
+    assert np.allclose(small_blocks[:12000], 0.2, atol=1e-3)
+    assert np.allclose(small_blocks[16000:24000], 0.05, atol=1e-3)
+    # 渐变区间中点
+    assert abs(small_blocks[14000] - 0.125) < 2e-3
+    assert np.allclose(small_blocks[28000:], 0.2, atol=1e-3)
+
+
+def test_audio_utils_merge_and_silence(tmp_path):
+    """The audio_utils helpers produce real audio instead of placeholders"""
+    from utils.audio_probe import probe_audio
+    from utils.audio_utils import create_silence, merge_audio_files
+
+    a = write_wav(tmp_path / "a.wav", np.full(16000, 0.3), 16000)
+    b = write_wav(tmp_path / "b.wav", np.full(8000, 0.3), 16000)
+    merged = merge_audio_files([a, b], str(tmp_path / "merged.wav"))
+    assert abs(probe_audio(merged).duration - 1.5) < 1e-3
+
+    silence = create_silence(2.0, str(tmp_path / "silence.wav"))
+    _, samples = read_wav(silence)
+    assert len(samples) == 2 * 44100 and not samples.any()
+
+
+@pytest.mark.skipif(__import__("shutil").which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_aac_output(tmp_path):
+    """Non-WAV outputs are streamed through ffmpeg"""
+    from utils.audio_mixer import AudioTrack, mix_tracks
+    from utils.audio_probe import get_audio_duration
+
+    voice = write_wav(tmp_path / "voice.wav", np.full(16000, 0.3), 16000)
+    output = mix_tracks([AudioTrack(voice, 1.0)], str(tmp_path / "mix.m4a"), sample_rate=44100)
+    assert abs(get_audio_duration(output) - 2.0) < 0.1
+
+
+def test_narration_segments_with_only_start_time_keep_their_slot(tmp_path):
+    """Segments timed by start_time (no timestamp) are placed at their start, not at zero"""
+    import asyncio
+
+    from agents.cloud_tts_agent import CloudTTSAgent
+    from utils.audio_probe import get_audio_duration
+
+    a = write_wav(tmp_path / "a.wav", np.full(8000, 0.3), 16000)
+    b = write_wav(tmp_path / "b.wav", np.full(8000, 0.3), 16000)
+    segments = [
+        {"start_time": 0.0, "end_time": 1.0, "audio_path": a},
+        {"start_time": 2.0, "end_time": 3.0, "audio_path": b},
+    ]
+    output = asyncio.run(CloudTTSAgent().merge_narration_audio(segments, str(tmp_path / "narration.wav")))
+    assert abs(get_audio_duration(output) - 2.5) < 1e-3
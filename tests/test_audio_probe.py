@@ -0,0 +1,84 @@
+"""
+Tests for header-based audio duration probing
+"""
+
+import shutil
+import struct
+import subprocess
+import sys
+import wave
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+# MPEG-2 Layer III, 48kbps, 24kHz, 单声道：每帧 144 字节、576 个样本（0.024 秒）
+MP3_HEADER = b"\xff\xf3\x64\xc0"
+MP3_FRAME = MP3_HEADER + b"\0" * 140
+
+
+def test_wav_header_with_extra_chunks_and_streamed_size(tmp_path):
+    """WAV duration comes from fmt/data chunks, skipping LIST chunks and unknown data sizes"""
+    from utils.audio_probe import get_audio_duration, probe_audio
+
+    path = tmp_path / "tts.wav"
+    with wave.open(str(path), "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(16000)
+        wav.writeframes(b"\0\0" * 16000 * 3)
+    raw = path.read_bytes()
+
+    info = probe_audio(str(path))
+    assert (info.duration, info.sample_rate, info.channels, info.format) == (3.0, 16000, 1, "wav")
+
+    # 在 fmt 与 data 之间插入 LIST 块，并把 data 大小置 0（流式写出）
+    data_at = raw.index(b"data")
+    streamed = (
+        raw[:data_at] + b"LIST" + struct.pack("<I", 5) + b"INFOx\0"
+        + b"data" + struct.pack("<I", 0) + raw[data_at + 8:]
+    )
+    path.write_bytes(streamed)
+    assert get_audio_duration(str(path)) == 3.0
+
+
+def test_mp3_cbr_xing_and_id3(tmp_path):
+    """MP3 duration uses the Xing frame count when present, otherwise the constant bitrate"""
+    from utils.audio_probe import probe_audio
+
+    id3 = b"ID3\x04\x00\x00" + bytes([0, 0, 1, 0]) + b"\0" * 128
+    path = tmp_path / "edge.wav"
+    path.write_bytes(id3 + MP3_FRAME * 250 + b"TAG" + b"\0" * 125)
+
+    info = probe_audio(str(path))
+    assert info.format == "mp3"
+    assert (info.sample_rate, info.channels) == (24000, 1)
+    assert abs(info.duration - 6.0) < 1e-9
+
+    # 边信息(9 字节)之后的 Xing 标签给出总帧数
+    xing = MP3_HEADER + b"\0" * 9 + b"Xing" + struct.pack(">II", 0x01, 1000)
+    path.write_bytes(xing + b"\0" * (144 - len(xing)) + MP3_FRAME * 10)
+    assert abs(probe_audio(str(path)).duration - 24.0) < 1e-9
+
+
+@pytest.mark.skipif(shutil.which("ffmpeg") is None, reason="需要 ffmpeg")
+def test_matches_ffmpeg_and_falls_back_for_other_formats(tmp_path):
+    """Header durations agree with ffmpeg; formats without a header parser use ffmpeg"""
+    from utils.audio_probe import get_audio_duration, probe_audio
+
+    def encode(name, *args):
+        path = tmp_path / name
+        subprocess.run(
+            ["ffmpeg", "-hide_banner", "-loglevel", "error", "-f", "lavfi",
+             "-i", "sine=d=4.2:r=24000", *args, "-y", str(path)],
+            check=True
+        )
+        return str(path)
+
+    assert abs(get_audio_duration(encode("a.mp3", "-ac", "1", "-b:a", "48k")) - 4.2) < 0.1
+    assert abs(get_audio_duration(encode("b.mp3", "-ac", "2", "-q:a", "5")) - 4.2) < 0.1
+    ogg = encode("c.ogg")
+    assert probe_audio(ogg) is None
+    assert abs(get_audio_duration(ogg) - 4.2) < 0.05
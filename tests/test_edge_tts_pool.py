@@ -0,0 +1,126 @@
+"""
+Tests for the pooled Edge-TTS client
+"""
+
+import asyncio
+import re
+import sys
+from pathlib import Path
+
+import pytest
+
+aiohttp = pytest.importorskip("aiohttp")
+from aiohttp import WSMsgType, web  # noqa: E402
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+class StandIn:
+    """Local websocket server answering with the Edge-TTS turn protocol"""
+
+    def __init__(self, turns_per_connection=None):
+        self.turns_per_connection = turns_per_connection
+        self.connections = 0
+        self.active = self.max_active = 0
+        self.voices = []
+
+    async def handle(self, request):
+        websocket = web.WebSocketResponse()
+        await websocket.prepare(request)
+        self.connections += 1
+        turns = 0
+        async for message in websocket:
+            if message.type != WSMsgType.TEXT or "Path:ssml" not in message.data:
+                continue
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            text = re.search(r"<prosody[^>]*>(.*?)</prosody>", message.data, re.S).group(1)
+            self.voices.append(re.search(r"<voice name='([^']*)'>", message.data).group(1))
+            await asyncio.sleep(0.01)
+            await websocket.send_str("Path:turn.start\r\n\r\n{}")
+            header = b"Content-Type:audio/mpeg\r\nPath:audio\r\n"
+            await websocket.send_bytes(len(header).to_bytes(2, "big") + header + text.encode())
+            await websocket.send_str("Path:turn.end\r\n\r\n{}")
+            self.active -= 1
+            turns += 1
+            if turns == self.turns_per_connection:
+                # 模拟服务端关闭空闲连接
+                await websocket.close()
+        return websocket
+
+
+async def serve(stand_in, body):
+    app = web.Application()
+    app.router.add_get("/v1", stand_in.handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    await web.TCPSite(runner, "127.0.0.1", 0).start()
+    try:
+        return await body(f"ws://127.0.0.1:{runner.addresses[0][1]}/v1")
+    finally:
+        await runner.cleanup()
+
+
+def test_connections_are_reused_and_concurrency_is_bounded():
+    """Many syntheses share the pool's warm connections and never exceed its size"""
+    from utils.edge_tts_pool import EdgeTTSPool
+
+    stand_in = StandIn()
+    texts = [f"第{i}句解说。" for i in range(12)]
+
+    async def body(url):
+        async with EdgeTTSPool(size=2, url=url, heartbeat=0) as pool:
+            results = await asyncio.gather(*(pool.synthesize(text) for text in texts))
+            return results, pool.stats()
+
+    results, stats = asyncio.run(serve(stand_in, body))
+
+    assert results == [text.encode() for text in texts]
+    assert stand_in.connections == 2 and stand_in.max_active == 2
+    assert stats["connects"] == 2 and stats["reuses"] == 10
+
+
+def test_stale_connections_are_replaced():
+    """Connections closed by the server or idle too long are reconnected transparently"""
+    from utils.edge_tts_pool import EdgeTTSPool
+
+    stand_in = StandIn(turns_per_connection=1)
+
+    async def body(url):
+        async with EdgeTTSPool(size=1, url=url, heartbeat=0) as pool:
+            results = [await pool.synthesize(f"第{i}句。") for i in range(3)]
+            closed_by_server = pool.stats()
+        async with EdgeTTSPool(size=1, url=url, heartbeat=0, idle_timeout=0) as pool:
+            results.append(await pool.synthesize("空闲超时。"))
+            results.append(await pool.synthesize("重新连接。"))
+            return results, closed_by_server, pool.stats()
+
+    results, closed_by_server, idle_expired = asyncio.run(serve(stand_in, body))
+
+    assert results == [text.encode() for text in ["第0句。", "第1句。", "第2句。", "空闲超时。", "重新连接。"]]
+    assert stand_in.connections == 5
+    assert closed_by_server["connects"] == 3
+    assert idle_expired["connects"] == 2 and idle_expired["reuses"] == 0
+
+
+def test_voice_is_normalised_and_parameters_validated():
+    """Short voice names are expanded like edge_tts.Communicate and malformed prosody is rejected"""
+    from utils.edge_tts_pool import EdgeTTSPool
+
+    stand_in = StandIn()
+
+    async def body(url):
+        async with EdgeTTSPool(size=1, url=url, heartbeat=0) as pool:
+            audio = await pool.synthesize("镜头推进。", "zh-CN-XiaoxiaoNeural", rate="+20%")
+            with pytest.raises(ValueError):
+                await pool.synthesize("镜头推进。", "zh-CN-XiaoxiaoNeural", rate="fast")
+            with pytest.raises(ValueError):
+                await pool.synthesize("镜头推进。", "Xiaoxiao")
+            return audio, pool.stats()
+
+    audio, stats = asyncio.run(serve(stand_in, body))
+
+    assert audio == "镜头推进。".encode()
+    assert stand_in.voices == ["Microsoft Server Speech Text to Speech Voice (zh-CN, XiaoxiaoNeural)"]
+    assert stats["connects"] == 1
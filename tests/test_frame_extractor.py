@@ -0,0 +1,71 @@
+"""
+Tests for the timestamp-based frame extractor
+"""
+
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _make_video(path, frames=120, fps=20):
+    """Each frame is a flat grey whose level encodes the frame index"""
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*"mp4v"), fps, (64, 48))
+    for i in range(frames):
+        writer.write(np.full((48, 64, 3), i * 2, dtype=np.uint8))
+    writer.release()
+
+
+def test_read_at_timestamps_keeps_input_order(tmp_path):
+    """Unsorted timestamps come back in input order with the right frames"""
+    from utils.frame_extractor import FrameExtractor
+
+    video = tmp_path / "grey.mp4"
+    _make_video(video)
+
+    timestamps = [4.0, 0.5, 2.25, 0.5]
+    with FrameExtractor(str(video)) as extractor:
+        frames = extractor.read_at_timestamps(timestamps)
+        # three distinct frames decoded, the rest only grabbed or skipped by seeking
+        assert extractor.decodes == 3
+
+    assert [t for t, _ in frames] == timestamps
+    for timestamp, frame in frames:
+        assert abs(frame.mean() - timestamp * 20 * 2) < 6
+
+
+def test_extract_frames_at_writes_files(tmp_path):
+    """Extracted frames are saved as images, one path per timestamp"""
+    from utils.frame_extractor import extract_frames_at
+
+    video = tmp_path / "grey.mp4"
+    _make_video(video)
+
+    paths = extract_frames_at(str(video), [1.0, 3.0], str(tmp_path / "frames"))
+
+    assert len(paths) == 2
+    assert all(Path(p).exists() for p in paths)
+
+
+def test_encode_frames_at_stays_in_memory(tmp_path):
+    """Encoded frames carry JPEG bytes and a cached base64 string, no files"""
+    import base64
+
+    from utils.frame_extractor import encode_frames_at
+
+    video = tmp_path / "grey.mp4"
+    _make_video(video)
+
+    frames = encode_frames_at(str(video), [2.0])
+    frame = frames[0]
+
+    assert frame.path is None
+    assert frame.data[:2] == b"\xff\xd8"
+    assert base64.b64decode(frame.b64) == frame.data
+    assert frame.b64 is frame.b64
+    assert abs(frame.to_array().mean() - 80) < 6
+    assert list(tmp_path.iterdir()) == [video]
@@ -0,0 +1,90 @@
+"""
+Tests for the highlight engine
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_overlapping_windows_merge_and_snap_to_shots():
+    """Nearby moments merge into one clip whose edges land on shot boundaries"""
+    from utils.highlight_engine import build_windows, merge_windows
+
+    moments = [
+        {"timestamp": 10.0, "importance": 0.9},
+        {"timestamp": 11.5, "importance": 0.6},
+        {"timestamp": 30.0, "importance": 0.7},
+    ]
+    shots = [{"start": 0.0, "end": 7.5}, {"start": 7.5, "end": 15.0}, {"start": 15.0, "end": 40.0}]
+
+    windows = build_windows(moments, before=2, after=3, duration=32.0, shots=shots)
+    assert (windows[0].start, windows[0].end) == (7.5, 13.0)
+    assert windows[2].end == 32.0
+
+    merged = merge_windows(windows)
+    assert [(w.start, w.end) for w in merged] == [(7.5, 15.0), (28.0, 32.0)]
+    assert abs(merged[0].score - 1.5) < 1e-9
+    assert merged[0].best["timestamp"] == 10.0
+
+
+def test_selection_respects_budget_and_beats_every_single_window():
+    """The budgeted selection never overlaps, stays within budget, is at least as good as any
+    single window that fits and lands close to the exhaustive optimum"""
+    import itertools
+    import random
+
+    from utils.highlight_engine import build_windows, merge_windows, select_highlights
+
+    for seed in range(20):
+        rng = random.Random(seed)
+        moments = [
+            {"timestamp": rng.uniform(0, 120), "importance": rng.uniform(0.1, 1.0)}
+            for _ in range(12)
+        ]
+        windows = build_windows(moments, before=2, after=3, duration=120.0)
+
+        selected = select_highlights(windows, target_duration=20)
+        total = sum(w.score for w in selected)
+        assert sum(w.duration for w in selected) <= 20 + 1e-6
+        for previous, current in zip(selected, selected[1:]):
+            assert previous.end <= current.start
+
+        def covered_score(spans):
+            return sum(m["importance"] for m in moments if any(s <= m["timestamp"] <= e for s, e in spans))
+
+        # 单个窗口（含合并后的窗口）的穷举下界：结果必须不差于其中任何一个
+        singles = [w for w in list(windows) + merge_windows(windows) if w.duration <= 20]
+        assert total >= max(covered_score([(w.start, w.end)]) for w in singles) - 1e-9
+
+        # 与多窗口组合的穷举最优相比只允许小幅差距（预算约束下的近似解）
+        best = 0.0
+        for size in range(1, 5):
+            for combo in itertools.combinations(windows, size):
+                spans = sorted((w.start, w.end) for w in combo)
+                if sum(e - s for s, e in spans) > 20:
+                    continue
+                if any(a[1] > b[0] for a, b in zip(spans, spans[1:])):
+                    continue
+                best = max(best, covered_score(spans))
+        assert total >= best * 0.85
+
+
+def test_selection_scales_to_thousands_of_candidates():
+    """Thousands of candidate moments are scheduled quickly"""
+    import random
+    import time
+
+    from utils.highlight_engine import generate_highlights
+
+    rng = random.Random(3)
+    moments = [
+        {"timestamp": rng.uniform(0, 7200), "importance": rng.random()}
+        for _ in range(5000)
+    ]
+    started = time.perf_counter()
+    highlights = generate_highlights(moments, target_duration=180, duration=7200.0)
+    assert time.perf_counter() - started < 10
+    assert 0 < sum(w.duration for w in highlights) <= 180
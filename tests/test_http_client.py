@@ -0,0 +1,54 @@
+"""
+Tests for the shared HTTP client pool lifecycle
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_clients_are_reused_within_a_loop_and_closed_on_shutdown():
+    """One client per host and loop; close() shuts the current loop's clients"""
+    from utils.http_client import HTTPClientPool
+
+    pool = HTTPClientPool()
+
+    async def main():
+        first = pool.get_client("https://dashscope.aliyuncs.com/api/v1/a")
+        again = pool.get_client("https://dashscope.aliyuncs.com/api/v1/b")
+        other = pool.get_client("https://aip.baidubce.com/rest/2.0")
+        assert first is again
+        assert other is not first
+
+        await pool.close()
+        assert first.is_closed and other.is_closed
+        assert not pool._clients
+
+        # 关闭后再次获取会创建新客户端
+        fresh = pool.get_client("https://dashscope.aliyuncs.com/api/v1/a")
+        assert fresh is not first and not fresh.is_closed
+        await pool.close()
+
+    asyncio.run(main())
+
+
+def test_clients_from_finished_loops_are_dropped():
+    """A new loop never gets a client bound to an earlier, closed loop"""
+    from utils.http_client import HTTPClientPool
+
+    pool = HTTPClientPool()
+    url = "https://dashscope.aliyuncs.com/api/v1/a"
+
+    async def get():
+        return pool.get_client(url)
+
+    first = asyncio.run(get())
+    second = asyncio.run(get())
+    assert second is not first
+
+    # 已结束事件循环上的客户端被清理，只保留当前循环的一个
+    assert len(pool._clients) == 1
+    assert next(iter(pool._clients.values()))[1] is second
@@ -0,0 +1,124 @@
+"""
+Tests for per-provider image preparation
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _frame(width=3840, height=2160):
+    from utils.frame_buffer import EncodedFrame
+
+    rng = np.random.default_rng(0)
+    image = rng.integers(0, 255, (height // 16, width // 16, 3), dtype=np.uint8)
+    image = np.kron(image, np.ones((16, 16, 1), dtype=np.uint8))
+    return EncodedFrame.from_array(image, 1.0)
+
+
+def test_prepare_image_limits_edge_and_reuses_variant():
+    """A 4K frame is scaled to the provider's max edge and prepared only once"""
+    from config.cloud_settings import settings
+    from utils.image_prep import prepare_image
+
+    max_edge = settings.vision_image_profiles["baidu_vision"][0]
+    frame = _frame()
+    prepared = prepare_image(frame, "baidu_vision")
+
+    assert max(prepared.width, prepared.height) == max_edge
+    assert prepare_image(frame, "baidu_vision") is prepared
+
+
+def test_prepare_image_respects_byte_budget():
+    """Quality and size are lowered until the payload fits the budget"""
+    from config.cloud_settings import settings
+    from utils.image_prep import get_image_profile, prepare_image
+
+    original = settings.vision_image_profiles["qwen_vl"]
+    settings.vision_image_profiles["qwen_vl"] = (1280, 95, 40)
+    try:
+        prepared = prepare_image(_frame(), "qwen_vl")
+        assert prepared.size <= get_image_profile("qwen_vl").max_bytes
+    finally:
+        settings.vision_image_profiles["qwen_vl"] = original
+
+
+def test_encode_frame_builds_variants_lazily_from_raw_pixels(monkeypatch):
+    """Variants are built on first use from the kept raw pixels, without decoding the JPEG"""
+    from config.cloud_settings import settings
+    from utils.frame_buffer import EncodedFrame
+    from utils.image_prep import encode_frame, get_image_profile, prepare_image
+
+    rng = np.random.default_rng(0)
+    image = np.kron(rng.integers(0, 255, (135, 240, 3), dtype=np.uint8), np.ones((16, 16, 1), dtype=np.uint8))
+
+    def no_decode(self, reduce=1):
+        raise AssertionError("variants must not decode the encoded frame")
+
+    monkeypatch.setattr(EncodedFrame, "to_array", no_decode)
+    frame = encode_frame(image, 2.0)
+
+    # 提取时不生成任何版本，只保留缩小后的原图
+    assert frame.variants == {}
+    max_edge = max(get_image_profile(provider).max_edge for provider in settings.vision_image_profiles)
+    assert max(frame.source.shape[:2]) == max_edge
+
+    for provider in settings.vision_image_profiles:
+        variant = prepare_image(frame, provider)
+        assert frame.variants[get_image_profile(provider).key] is variant
+        assert prepare_image(frame, provider) is variant
+        assert variant.timestamp == 2.0
+        # 感知哈希只在原始帧上计算
+        assert variant._dhash is None and variant._mean_color is None
+    assert frame._dhash is not None
+
+    # 全部版本生成后释放原图
+    assert frame.source is None
+
+
+def test_released_frames_fall_back_to_decoding():
+    """A frame whose source was released still prepares variants from the JPEG"""
+    from utils.image_prep import encode_frame, prepare_image
+
+    image = np.full((720, 1280, 3), 120, dtype=np.uint8)
+    frame = encode_frame(image, 1.0)
+    frame.release_source()
+
+    prepared = prepare_image(frame, "baidu_vision")
+    assert prepared.size > 0
+    assert frame.source is None
+
+
+def test_deduplicated_frames_never_build_variants():
+    """Frames that reuse another frame's analysis drop their raw pixels without encoding variants"""
+    import asyncio
+
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent
+    from utils.image_prep import encode_frame, prepare_image
+
+    agent = CloudVideoAnalysisAgent()
+
+    async def fake_batch(frames):
+        for frame in frames:
+            prepare_image(frame, "qwen_vl")
+        return [{"timestamp": frame.timestamp, "scene_description": "画面"} for frame in frames]
+
+    agent._analyze_frame_batch = fake_batch
+
+    rng = np.random.default_rng(0)
+    scene = np.kron(rng.integers(0, 255, (9, 16, 3), dtype=np.uint8), np.ones((20, 20, 1), dtype=np.uint8))
+    frames = [{"frame": encode_frame(scene, float(t))} for t in range(3)]
+
+    async def collect():
+        return [analysis async for analysis in agent._analyze_frames_stream(frames)]
+
+    results = asyncio.run(collect())
+
+    assert len(results) == 3
+    # 只有代表帧生成了上传版本，复用帧的原图已释放
+    assert [len(info["frame"].variants) for info in frames] == [1, 0, 0]
+    assert all(info["frame"].source is None for info in frames[1:])
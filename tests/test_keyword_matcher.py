@@ -0,0 +1,47 @@
+"""
+Tests for the Aho-Corasick keyword matcher
+"""
+
+import random
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_counts_match_substring_search():
+    """Per-category hit counts agree with a naive `keyword in text` scan"""
+    from utils.keyword_matcher import KeywordMatcher
+
+    dictionary = {
+        "a": ["he", "she", "his", "hers"],
+        "b": ["s", "hers", "爱", "爱情"],
+        "c": ["xyz"],
+    }
+    matcher = KeywordMatcher(dictionary)
+
+    rng = random.Random(0)
+    alphabet = "hers爱情xyz "
+    for _ in range(200):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 30)))
+        expected = {
+            category: sum(1 for word in set(words) if word in text)
+            for category, words in dictionary.items()
+        }
+        assert matcher.count(text) == expected
+
+    assert sorted(matcher.iter_matches("ushers")) == [(1, "s"), (1, "she"), (2, "he"), (2, "hers"), (5, "s")]
+    assert matcher.match_categories("他们的爱情") == ["b"]
+
+
+def test_ignore_case_and_batch():
+    """Case-insensitive matching and batch scoring of several texts"""
+    from utils.keyword_matcher import KeywordMatcher
+
+    matcher = KeywordMatcher({"人物": ["人", "person"], "交通": ["车"]}, ignore_case=True)
+    assert matcher.count_batch(["A Person on a 车", "", "街道"]) == [
+        {"人物": 1, "交通": 1},
+        {"人物": 0, "交通": 0},
+        {"人物": 0, "交通": 0},
+    ]
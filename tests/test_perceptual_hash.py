@@ -0,0 +1,54 @@
+"""
+Tests for perceptual-hash frame deduplication
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _scene(seed, noise=0):
+    rng = np.random.default_rng(seed)
+    base = rng.integers(0, 255, (9, 16, 3), dtype=np.uint8)
+    image = np.kron(base, np.ones((20, 20, 1), dtype=np.uint8))
+    if noise:
+        jitter = np.random.default_rng(seed + 100).integers(0, noise, image.shape)
+        image = np.clip(image.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_dhash_tolerates_noise():
+    """Small pixel noise keeps the hash within a few bits; a new scene does not"""
+    from utils.perceptual_hash import dhash, hamming_distance
+
+    a = dhash(_scene(1))
+    assert hamming_distance(a, dhash(_scene(1, noise=6))) <= 6
+    assert hamming_distance(a, dhash(_scene(2))) > 6
+
+
+def test_group_near_duplicates():
+    """Frames map to the earliest matching representative, e.g. A B A' B'"""
+    from utils.perceptual_hash import dhash, group_near_duplicates, mean_color
+
+    images = [_scene(1), _scene(2), _scene(1, noise=6), _scene(2, noise=6)]
+    hashes = [dhash(image) for image in images]
+    colors = [mean_color(image) for image in images]
+
+    assert group_near_duplicates(hashes, threshold=6, colors=colors) == [0, 1, 0, 1]
+    assert group_near_duplicates(hashes, threshold=-1) == [0, 1, 2, 3]
+
+
+def test_flat_frames_need_matching_colour():
+    """Flat frames share an empty dHash, so the colour check keeps them apart"""
+    from utils.perceptual_hash import dhash, group_near_duplicates, mean_color
+
+    images = [np.full((90, 160, 3), c, dtype=np.uint8) for c in (20, 200)]
+    hashes = [dhash(image) for image in images]
+    colors = [mean_color(image) for image in images]
+
+    assert hashes[0] == hashes[1]
+    assert group_near_duplicates(hashes, threshold=6, colors=colors) == [0, 1]
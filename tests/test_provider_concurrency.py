@@ -0,0 +1,96 @@
+"""
+Tests for concurrent dual-provider frame analysis
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_providers_run_concurrently_and_degrade():
+    """Both providers run at once; a timed-out provider falls back to the other's result"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent, settings
+    from utils.frame_buffer import EncodedFrame
+
+    agent = CloudVideoAnalysisAgent()
+    events = []
+
+    async def qwen(frame):
+        events.append("qwen_start")
+        await asyncio.sleep(0.2)
+        events.append("qwen_end")
+        return {"objects": [], "scene_description": "一只猫趴在沙发上", "confidence": 0.8}
+
+    async def baidu(frame):
+        events.append("baidu_start")
+        await asyncio.sleep(0.2)
+        events.append("baidu_end")
+        return {"objects": [{"name": "猫", "confidence": 0.9}], "scene_description": "检测到1个物体", "confidence": 0.9}
+
+    agent._analyze_image_with_qwen_vl = qwen
+    agent._analyze_image_with_baidu = baidu
+    frame = EncodedFrame.from_array(np.full((20, 20, 3), 100, dtype=np.uint8), 1.0)
+
+    async def main():
+        result = await agent._analyze_single_frame(frame)
+        # 两个服务都在任一服务返回前启动
+        assert sorted(events[:2]) == ["baidu_start", "qwen_start"]
+        assert result["scene_description"] == "一只猫趴在沙发上"
+        assert result["objects"][0]["name"] == "猫"
+
+        original = settings.vision_provider_timeouts
+        settings.vision_provider_timeouts = dict(original, qwen_vl=0.05)
+        try:
+            result = await agent._analyze_single_frame(frame)
+        finally:
+            settings.vision_provider_timeouts = original
+        assert result["scene_description"] == "检测到1个物体"
+
+    # 两次调用共用一个事件循环
+    asyncio.run(main())
+
+def test_only_complete_qwen_descriptions_win_the_race():
+    """Baidu finishing first never cancels Qwen-VL; Qwen-VL wins only with a description for every frame"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent, settings
+    from utils.frame_buffer import EncodedFrame
+
+    agent = CloudVideoAnalysisAgent()
+    frames = [EncodedFrame.from_array(np.full((20, 20, 3), 100, dtype=np.uint8), float(i)) for i in range(2)]
+    described = {"objects": [], "scene_description": "一只猫趴在沙发上", "confidence": 0.8}
+    failed = {"objects": [], "scene_description": "分析失败", "confidence": 0}
+    detected = {"objects": [{"name": "猫", "confidence": 0.9}], "scene_description": "检测到1个物体", "confidence": 0.9}
+
+    async def run(qwen_results, qwen_delay, baidu_delay):
+        async def qwen_call():
+            await asyncio.sleep(qwen_delay)
+            return qwen_results
+
+        async def baidu_call():
+            await asyncio.sleep(baidu_delay)
+            return [dict(detected) for _ in frames]
+
+        return await agent._run_providers(frames, qwen_call(), baidu_call())
+
+    original = settings.vision_first_description_wins
+    settings.vision_first_description_wins = True
+    try:
+        # 百度AI先完成，仍等待通义千问-VL的描述
+        qwen_results, baidu_results = asyncio.run(run([described, described], 0.1, 0.01))
+        assert [r["scene_description"] for r in qwen_results] == ["一只猫趴在沙发上"] * 2
+        assert baidu_results[0]["objects"][0]["name"] == "猫"
+
+        # 通义千问-VL全部描述成功，取消仍在进行的百度AI
+        qwen_results, baidu_results = asyncio.run(run([described, described], 0.01, 0.2))
+        assert qwen_results[0]["scene_description"] == "一只猫趴在沙发上"
+        assert baidu_results[0]["confidence"] == 0
+
+        # 只描述出部分帧时不算胜出，等待百度AI补齐
+        qwen_results, baidu_results = asyncio.run(run([described, failed], 0.01, 0.1))
+        assert baidu_results[1]["objects"][0]["name"] == "猫"
+    finally:
+        settings.vision_first_description_wins = original
@@ -0,0 +1,38 @@
+"""
+Tests for batched Qwen-VL frame analysis
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_split_batch_descriptions():
+    """Per-image sections are recovered from common reply formats"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent
+
+    agent = CloudVideoAnalysisAgent()
+    text = "好的，描述如下：\n图1: 一只猫\n趴在沙发上\n**图2：** 一条狗\n图 3: 海边日落\n图9: 多余"
+
+    descriptions = agent._split_batch_descriptions(text, 3)
+
+    assert descriptions == {0: "一只猫\n趴在沙发上", 1: "一条狗", 2: "海边日落"}
+
+
+def test_build_batches_follow_shots():
+    """Batches never cross a shot boundary and never exceed the batch size"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent, settings
+
+    agent = CloudVideoAnalysisAgent()
+    frames = [{"shot_index": s} for s in [0, 0, 0, 0, 0, 1, 2, 2]]
+
+    original = settings.qwen_vl_batch_size
+    settings.qwen_vl_batch_size = 3
+    try:
+        batches = agent._build_batches(frames, list(range(len(frames))))
+    finally:
+        settings.qwen_vl_batch_size = original
+
+    assert batches == [[0, 1, 2], [3, 4], [5], [6, 7]]
@@ -0,0 +1,56 @@
+"""
+Tests for the token bucket rate limiter
+"""
+
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import pytest
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_burst_is_immediate():
+    """Tokens within the burst capacity are granted without waiting"""
+    from utils.rate_limiter import TokenBucket
+
+    async def run():
+        bucket = TokenBucket(rate=1.0, burst=3)
+        return [await bucket.acquire() for _ in range(3)]
+
+    waits = asyncio.run(run())
+    assert waits == [0.0, 0.0, 0.0]
+
+
+def test_rate_is_enforced():
+    """Requests beyond the burst are spaced out at the configured rate"""
+    from utils.rate_limiter import TokenBucket
+
+    async def run():
+        bucket = TokenBucket(rate=50.0, burst=1)
+        start = time.monotonic()
+        await asyncio.gather(*[bucket.acquire() for _ in range(6)])
+        return time.monotonic() - start
+
+    elapsed = asyncio.run(run())
+    # 1 burst token + 5 refills at 50/s => at least ~0.1s
+    assert elapsed >= 0.09
+
+
+def test_invalid_rate():
+    """A non-positive rate is rejected"""
+    from utils.rate_limiter import TokenBucket
+
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_shared_limiter_per_provider():
+    """The same provider always gets the same limiter instance"""
+    from utils.rate_limiter import get_rate_limiter
+
+    assert get_rate_limiter("qwen_vl") is get_rate_limiter("qwen_vl")
+    assert get_rate_limiter("qwen_vl") is not get_rate_limiter("baidu_vision")
@@ -0,0 +1,62 @@
+"""
+Tests for shot-boundary keyframe selection
+"""
+
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _solid_frames(colors, repeat):
+    """Build one solid-colour BGR frame per colour, each repeated `repeat` times"""
+    frames = []
+    for color in colors:
+        frame = np.zeros((72, 128, 3), dtype=np.uint8)
+        frame[:] = color
+        frames.extend([frame] * repeat)
+    return frames
+
+
+def _signatures(frames):
+    from utils.scene_detection import compute_frame_signature
+
+    hists, thumbs = zip(*[compute_frame_signature(f) for f in frames])
+    return np.stack(hists), np.stack(thumbs)
+
+
+def test_detect_shots_finds_cuts():
+    """Hard cuts between solid colours become shot boundaries"""
+    from utils.scene_detection import detect_shots
+
+    frames = _solid_frames([(255, 0, 0), (0, 255, 0), (0, 0, 255)], repeat=8)
+    hists, thumbs = _signatures(frames)
+    times = np.arange(len(frames)) * 0.25
+
+    shots = detect_shots(times, hists, thumbs, duration=6.0)
+
+    assert [s["start"] for s in shots] == [0.0, 2.0, 4.0]
+    assert shots[-1]["end"] == 6.0
+
+
+def test_select_keyframes_respects_budget():
+    """One keyframe per shot, capped at max_frames, longest shots kept"""
+    from utils.scene_detection import detect_shots, select_keyframes
+
+    colors = [(255, 0, 0), (0, 255, 0), (0, 0, 255), (255, 255, 0)]
+    frames = _solid_frames(colors, repeat=4) + _solid_frames([(0, 255, 255)], repeat=20)
+    hists, thumbs = _signatures(frames)
+    times = np.arange(len(frames)) * 0.25
+
+    shots = detect_shots(times, hists, thumbs, duration=len(frames) * 0.25)
+    keyframes = select_keyframes(
+        shots, times, hists, thumbs, max_frames=3, drift_threshold=0.2, max_gap=30
+    )
+
+    assert len(shots) == 5
+    assert len(keyframes) == 3
+    assert 4 in [k["shot_index"] for k in keyframes]
+    assert [k["timestamp"] for k in keyframes] == sorted(k["timestamp"] for k in keyframes)
@@ -0,0 +1,152 @@
+"""
+Tests for the per-voice speech-rate model
+"""
+
+import asyncio
+import random
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+WORDS = ["镜头", "慢慢", "推进", "主角", "回到", "家乡", "雨", "停了", "2024年", "AI"]
+
+
+def make_text(rng):
+    parts = ["".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))) for _ in range(rng.randint(1, 4))]
+    return "，".join(parts) + "。"
+
+
+def true_duration(text, speed):
+    """模拟某音色的真实时长：0.2 秒静音 + 每字 0.18 秒 + 每处停顿 0.4 秒"""
+    from utils.speech_rate import text_features
+
+    _, units, pauses = text_features(text)
+    return (0.2 + 0.18 * units + 0.4 * pauses) / speed
+
+
+def test_model_learns_voice_rate_from_cached_measurements(tmp_path):
+    """Measurements stored with cached audio train a per-voice model that predicts unseen texts"""
+    from utils.speech_rate import SpeechRateModel, text_features
+    from utils.tts_cache import TTSAudioCache
+
+    assert list(text_features("你好，AI 世界2024。")) == [1.0, 10.0, 1.0]
+
+    rng = random.Random(5)
+    source = tmp_path / "a.wav"
+    source.write_bytes(b"\0" * 10)
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=1024 * 1024)
+    for i in range(40):
+        text, speed = make_text(rng), rng.choice([0.8, 1.0, 1.2])
+        cache.put(f"{i:04d}", str(source), "edge", "zh-CN-YunxiNeural",
+                  text=text, speed=speed, duration=true_duration(text, speed))
+    # 没有实测时长的旧条目不参与训练
+    cache.put("old", str(source), "edge", "zh-CN-YunxiNeural")
+
+    model = SpeechRateModel()
+    assert model.load_measurements(cache.measurements()) == 40
+    assert model.samples("edge", "zh-CN-YunxiNeural") == 40
+
+    for _ in range(10):
+        text = make_text(rng)
+        predicted = model.predict(text, 1.1, "edge", "zh-CN-YunxiNeural")
+        assert abs(predicted - true_duration(text, 1.1)) / true_duration(text, 1.1) < 0.05
+    # 没有数据的音色使用合并模型
+    assert model.predict("镜头慢慢推进", 1.0, "aliyun", "xiaoyun") == model.predict("镜头慢慢推进", 1.0, "edge", "zh-CN-YunxiNeural")
+
+
+def test_fit_speed_only_speeds_up_and_is_capped():
+    """Speed stays at the base rate when the text fits and rises just enough when it does not"""
+    from utils.speech_rate import SpeechRateModel
+
+    model = SpeechRateModel()
+    text = "主角回到家乡，雨停了，镜头慢慢推进。"
+    natural = model.predict(text)
+
+    assert model.fit_speed(text, natural * 2) == 1.0
+    speed = model.fit_speed(text, natural / 1.2, max_speed=2.0)
+    assert 1.2 < speed <= 1.35 and round(speed / 0.05, 6).is_integer()
+    assert model.predict(text, speed) <= natural / 1.2
+    assert model.fit_speed(text, natural / 3, max_speed=1.5) == 1.5
+    assert model.fit_speed(text, 0) == 1.0
+
+
+def test_narration_segments_fit_their_slots_on_first_call(monkeypatch):
+    """Batch synthesis picks per-segment speeds so every segment fits without re-synthesis"""
+    import agents.cloud_tts_agent as tts_module
+    from utils.speech_rate import SpeechRateModel
+
+    monkeypatch.setattr(tts_module.settings, "enable_speech_rate_fit", True)
+    monkeypatch.setattr(tts_module.settings, "enable_tts_packing", False)
+    monkeypatch.setattr(tts_module.settings, "tts_max_speed", 2.0)
+    monkeypatch.setattr(tts_module.settings, "retry_delay", 0)
+
+    rng = random.Random(9)
+    model = SpeechRateModel()
+    for _ in range(30):
+        text = make_text(rng)
+        model.observe(text, true_duration(text, 1.0), 1.0, "edge", "zh-CN-XiaoxiaoNeural")
+    monkeypatch.setattr(tts_module, "get_speech_rate_model", lambda: model)
+
+    agent = tts_module.CloudTTSAgent()
+    monkeypatch.setattr(agent, "_primary_voice", lambda style: ("edge", "zh-CN-XiaoxiaoNeural"))
+    calls = []
+    durations = {}
+
+    async def synthesize_speech(text, voice_style, speed, pitch, volume):
+        calls.append(text)
+        path = f"/tmp/{len(calls)}.wav"
+        durations[path] = true_duration(text, speed)
+        return path
+
+    async def audio_duration(path):
+        return durations[path]
+
+    agent.synthesize_speech = synthesize_speech
+    agent._get_audio_duration = audio_duration
+
+    segments = []
+    for i in range(12):
+        text = make_text(rng)
+        slot = true_duration(text, 1.0) / rng.uniform(0.8, 1.6)
+        segments.append({"start_time": i * 10, "end_time": i * 10 + slot, "text": text})
+    segments.append({"timestamp": 200, "duration": 0, "text": "感谢观看。"})
+
+    results = asyncio.run(agent.synthesize_narration(segments))
+
+    assert len(calls) == len(segments)
+    for segment, result in zip(segments[:-1], results):
+        assert result["speed"] >= 1.0
+        assert result["audio_duration"] <= segment["end_time"] - segment["start_time"]
+    assert "speed" not in results[-1]
+
+
+def test_concurrent_first_callers_share_one_model(monkeypatch):
+    """Racing first calls build the global model once, so no observations land on a discarded instance"""
+    import threading
+    import time
+
+    import utils.speech_rate as speech_rate
+
+    scans = []
+
+    class SlowCache:
+        def measurements(self):
+            scans.append(threading.get_ident())
+            time.sleep(0.05)
+            return [("edge", "zh-CN-XiaoxiaoNeural", "欢迎收看本期解说。", 1.0, 2.4)]
+
+    monkeypatch.setattr(speech_rate, "_speech_rate_model", None)
+    monkeypatch.setattr(speech_rate, "get_tts_cache", lambda: SlowCache())
+
+    models = []
+    threads = [threading.Thread(target=lambda: models.append(speech_rate.get_speech_rate_model())) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(scans) == 1
+    assert len({id(model) for model in models}) == 1
+    assert models[0].samples("edge", "zh-CN-XiaoxiaoNeural") == 1
@@ -0,0 +1,69 @@
+"""
+Tests for concurrent batch narration synthesis
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_batch_is_concurrent_ordered_and_marks_failures(monkeypatch):
+    """Segments run concurrently up to the limit, keep input order, retry, and report failures"""
+    from agents.cloud_tts_agent import CloudTTSAgent, settings
+
+    monkeypatch.setattr(settings, "max_concurrent_tts_requests", 4)
+    monkeypatch.setattr(settings, "api_retry_times", 2)
+    monkeypatch.setattr(settings, "retry_delay", 0)
+    monkeypatch.setattr(settings, "enable_cache", False)
+    monkeypatch.setattr(settings, "enable_tts_packing", False)
+
+    agent = CloudTTSAgent()
+    calls = {}
+    events = []
+    active = 0
+    peak = 0
+
+    async def synthesize_speech(text, *args):
+        nonlocal active, peak
+        calls[text] = calls.get(text, 0) + 1
+        events.append(("start", text))
+        active += 1
+        peak = max(peak, active)
+        try:
+            # 后面的段落先完成，检验结果仍按输入顺序返回
+            await asyncio.sleep(0.1 / int(text[-1]))
+            if text == "段落3" and calls[text] == 1:
+                raise RuntimeError("临时错误")
+            if text == "段落5":
+                raise RuntimeError("服务不可用")
+            return f"/tmp/{text}.wav"
+        finally:
+            events.append(("end", text))
+            active -= 1
+
+    async def audio_duration(path):
+        return 1.0
+
+    agent.synthesize_speech = synthesize_speech
+    agent._get_audio_duration = audio_duration
+
+    segments = [{"text": f"段落{i}", "timestamp": i} for i in range(1, 9)]
+    segments.insert(2, {"text": "  "})
+
+    results = asyncio.run(agent.synthesize_narration(segments))
+
+    assert [r.get("timestamp") for r in results] == [1, 2, None, 3, 4, 5, 6, 7, 8]
+    assert [r["status"] for r in results] == [
+        "success", "success", "skipped", "success", "success", "failed", "success", "success", "success"
+    ]
+    assert results[3]["attempts"] == 2
+    assert results[5]["error"] == "服务不可用" and "audio_path" not in results[5]
+    assert results[0]["audio_path"] == "/tmp/段落1.wav"
+    assert peak == 4
+    # 前 4 段同时开始，之后每完成一段才开始下一段
+    assert [kind for kind, _ in events[:5]] == ["start"] * 4 + ["end"]
+    # 后开始但耗时更短的段落先完成，说明请求确实重叠执行
+    assert events.index(("end", "段落4")) < events.index(("end", "段落1"))
@@ -0,0 +1,99 @@
+"""
+Tests for the content-addressed TTS audio cache
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_key_normalization_and_persistence(tmp_path):
+    """Equivalent texts share a key, any voice parameter changes it, and entries survive reopening"""
+    from utils.tts_cache import TTSAudioCache, tts_cache_key
+
+    key = tts_cache_key("你好，  世界\n", "aliyun", "xiaoyun", 1.0, 1.0, 1.0, 16000)
+    assert key == tts_cache_key("你好， 世界", "aliyun", "xiaoyun", 1.0, 1.0, 1.0, 16000)
+    # 全角标点与半角等价
+    assert key == tts_cache_key("你好, 世界", "aliyun", "xiaoyun", 1.0, 1.0, 1.0, 16000)
+    assert key != tts_cache_key("你好， 世界", "aliyun", "xiaoyun", 1.1, 1.0, 1.0, 16000)
+    assert key != tts_cache_key("你好， 世界", "aliyun", "xiaoyun", 1.0, 1.0, 1.0, 24000)
+    assert key != tts_cache_key("你好， 世界", "edge", "xiaoyun", 1.0, 1.0, 1.0, 16000)
+
+    source = tmp_path / "out.wav"
+    source.write_bytes(b"RIFF" + b"\0" * 100)
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=1024 * 1024)
+    assert cache.get(key) is None
+    stored = cache.put(key, str(source), "aliyun", "xiaoyun")
+    assert Path(stored).read_bytes() == source.read_bytes()
+    cache.close()
+
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=1024 * 1024)
+    assert cache.get(key) == stored
+    Path(stored).unlink()
+    assert cache.get(key) is None
+
+    stats = cache.stats()
+    assert (stats["entries"], stats["size_bytes"]) == (0, 0)
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_eviction(tmp_path, monkeypatch):
+    """The least recently used audio is removed from disk once the byte budget is exceeded"""
+    import utils.tts_cache as tts_cache
+
+    monkeypatch.setattr(tts_cache, "EVICTION_GRACE_SECONDS", -1)
+    source = tmp_path / "out.wav"
+    source.write_bytes(b"\0" * 100)
+    cache = tts_cache.TTSAudioCache(str(tmp_path / "tts"), max_bytes=250)
+
+    a = cache.put("aa", str(source), "edge", "v")
+    cache.put("bb", str(source), "edge", "v")
+    cache.get("aa")
+    cache.put("cc", str(source), "edge", "v")
+
+    assert cache.get("aa") == a
+    assert cache.get("bb") is None
+    assert cache.get("cc") is not None
+    assert cache.stats()["size_bytes"] == 200
+    assert len(list((tmp_path / "tts").glob("*/*.wav"))) == 2
+
+
+def test_synthesize_speech_reuses_cached_audio(tmp_path, monkeypatch):
+    """A repeated request is served from the cache without calling the provider"""
+    import agents.cloud_tts_agent as tts_module
+    from utils.speech_rate import SpeechRateModel
+    from utils.tts_cache import TTSAudioCache
+
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=1024 * 1024)
+    model = SpeechRateModel()
+    monkeypatch.setattr(tts_module, "get_tts_cache", lambda: cache)
+    monkeypatch.setattr(tts_module, "get_speech_rate_model", lambda: model)
+    monkeypatch.setattr(tts_module.settings, "get_available_tts_services", lambda: ["Edge-TTS"])
+
+    agent = tts_module.CloudTTSAgent()
+    agent.temp_dir = tmp_path / "out"
+    calls = []
+
+    async def synthesize_with_edge(text, voice, rate, pitch, volume):
+        calls.append((text, rate))
+        path = tmp_path / f"edge_{len(calls)}.wav"
+        path.write_bytes(b"ID3" + text.encode("utf-8"))
+        return str(path)
+
+    agent._synthesize_with_edge = synthesize_with_edge
+
+    first = asyncio.run(agent.synthesize_speech("欢迎收看"))
+    second = asyncio.run(agent.synthesize_speech(" 欢迎收看 "))
+    third = asyncio.run(agent.synthesize_speech("欢迎收看", speed=1.5))
+
+    assert calls == [("欢迎收看", "+0%"), ("欢迎收看", "+50%")]
+    assert cache.stats()["hits"] == 1
+    # 命中时返回调用方自己的副本，清空缓存不影响已返回的文件
+    assert len({first, second, third}) == 3
+    assert Path(first).read_bytes() == Path(second).read_bytes()
+    assert not Path(second).is_relative_to(tmp_path / "tts")
+    cache.clear()
+    assert Path(first).exists() and Path(second).exists()
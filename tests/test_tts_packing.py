@@ -0,0 +1,153 @@
+"""
+Tests for packing short narration segments into fewer TTS requests
+"""
+
+import asyncio
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+SAMPLE_RATE = 16000
+
+
+def speech(seconds, pause_at=None):
+    """模拟语音：正弦波，可在中间插入短停顿（句内停顿）"""
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    samples = 0.5 * np.sin(2 * np.pi * 220 * t)
+    if pause_at is not None:
+        start = int(pause_at * SAMPLE_RATE)
+        samples[start:start + int(0.2 * SAMPLE_RATE)] = 0
+    return samples
+
+
+def test_cuts_land_on_segment_breaks_not_inner_pauses():
+    """Long breaks between segments are chosen over shorter pauses inside a segment"""
+    from utils.audio_split import plan_cuts
+
+    silence = np.zeros(int(0.6 * SAMPLE_RATE))
+    parts = [speech(1.0), speech(2.4, pause_at=1.2), speech(0.8), speech(1.6, pause_at=0.5)]
+    samples = np.concatenate([np.zeros(1600), parts[0], silence, parts[1], silence, parts[2], silence, parts[3], np.zeros(1600)])
+
+    # 预测时长与实际有偏差
+    cuts = plan_cuts(samples, SAMPLE_RATE, [1.3, 2.0, 1.0, 1.4])
+
+    boundaries = np.cumsum([1600] + [len(p) + len(silence) for p in parts[:-1]])
+    assert len(cuts) == 4
+    for (start, end), (next_start, _), boundary in zip(cuts, cuts[1:], boundaries[1:]):
+        # 前一段结束于间隙开头附近，后一段开始于间隙末尾附近
+        gap_start = boundary - len(silence)
+        assert gap_start <= end <= gap_start + 0.06 * SAMPLE_RATE
+        assert boundary - 0.06 * SAMPLE_RATE <= next_start <= boundary
+    assert plan_cuts(speech(3.0), SAMPLE_RATE, [1, 1]) is None
+
+
+def test_packed_batch_uses_fewer_requests_and_keeps_segment_fields(tmp_path, monkeypatch):
+    """Consecutive segments share one request; results keep their timing fields and get split audio"""
+    import agents.cloud_tts_agent as tts_module
+    from utils.audio_probe import get_audio_duration
+    from utils.speech_rate import SpeechRateModel
+    from utils.tts_cache import TTSAudioCache
+
+    model = SpeechRateModel()
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(tts_module.settings, "enable_tts_packing", True)
+    monkeypatch.setattr(tts_module.settings, "enable_speech_rate_fit", False)
+    monkeypatch.setattr(tts_module.settings, "retry_delay", 0)
+    monkeypatch.setattr(tts_module.settings, "get_available_tts_services", lambda: ["腾讯TTS", "Edge-TTS"])
+    monkeypatch.setattr(tts_module, "get_speech_rate_model", lambda: model)
+    monkeypatch.setattr(tts_module, "get_tts_cache", lambda: cache)
+
+    agent = tts_module.CloudTTSAgent()
+    agent.temp_dir = tmp_path
+    requests = []
+
+    async def synthesize_speech(text, voice_style, speed, pitch, volume, progress_callback=None):
+        # 按 SSML 停顿渲染：每段语音时长与字数成正比，段落之间 0.6 秒静音
+        rendered = agent._render_text("tencent", text)
+        requests.append(rendered)
+        parts = text.split(tts_module.PACK_SEPARATOR)
+        pieces = []
+        for n, part in enumerate(parts):
+            if n:
+                pieces.append(np.zeros(int(0.6 * SAMPLE_RATE)))
+            pieces.append(speech(0.2 * len(part)))
+        path = tmp_path / f"request_{len(requests)}.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes((np.concatenate(pieces) * 32767).astype("<i2").tobytes())
+        return str(path), "tencent", "101001"
+
+    agent._synthesize_speech = synthesize_speech
+
+    texts = ["主角回到了家乡", "雨停了", "镜头慢慢推进到老屋门前", "", "他推开门" * 37, "故事开始了"]
+    segments = [
+        {"timestamp": i * 5, "duration": 5, "text": text}
+        for i, text in enumerate(texts)
+    ]
+
+    results = asyncio.run(agent.synthesize_narration(segments))
+
+    # 腾讯云单次上限 150 字：前三段合并，空段落打断合并，超长段落单独合成
+    assert len(requests) == 3
+    assert requests[0].startswith("<speak>") and requests[0].count('<break time="600ms"/>') == 2
+    assert [r["status"] for r in results] == ["success", "success", "success", "skipped", "success", "success"]
+    assert [r.get("packed_with") for r in results] == [3, 3, 3, None, None, None]
+    for segment, result in zip(segments, results):
+        assert (result["timestamp"], result["duration"], result["text"]) == (
+            segment["timestamp"], segment["duration"], segment["text"]
+        )
+    # 每段语音时长加上切点处保留的 0.05 秒余量（首段开头、末段结尾无间隙）
+    for text, result, pad in zip(texts[:3], results[:3], (0.05, 0.1, 0.05)):
+        assert abs(result["audio_duration"] - (0.2 * len(text) + pad)) < 0.015
+        assert abs(get_audio_duration(result["audio_path"]) - result["audio_duration"]) < 1e-3
+
+    # 切出的各段按单段文本写入缓存并训练语速模型
+    assert model.samples("tencent", "101001") == 3
+    assert cache.stats()["entries"] == 3
+
+    # 再次合成时命中缓存的段落不再参与合并，相邻的新段落单独请求
+    segments[1]["text"] = "雨终于停了"
+    again = asyncio.run(agent.synthesize_narration(segments))
+    assert requests[3:] == ["雨终于停了", texts[4], texts[5]]
+    for n in (0, 2):
+        assert Path(again[n]["audio_path"]).read_bytes() == Path(results[n]["audio_path"]).read_bytes()
+    assert [r.get("packed_with") for r in again] == [None] * 6
+
+
+def test_unsplittable_audio_falls_back_to_single_requests(monkeypatch):
+    """When the packed audio has no usable gaps every segment is synthesized on its own"""
+    import agents.cloud_tts_agent as tts_module
+    from utils.speech_rate import SpeechRateModel
+
+    monkeypatch.setattr(tts_module.settings, "enable_speech_rate_fit", False)
+    monkeypatch.setattr(tts_module.settings, "retry_delay", 0)
+    monkeypatch.setattr(tts_module.settings, "get_available_tts_services", lambda: ["Edge-TTS"])
+    monkeypatch.setattr(tts_module, "get_speech_rate_model", lambda: SpeechRateModel())
+    monkeypatch.setattr(tts_module, "get_tts_cache", lambda: None)
+
+    agent = tts_module.CloudTTSAgent()
+    requests = []
+
+    async def synthesize_speech(text, voice_style, speed, pitch, volume, progress_callback=None):
+        requests.append(text)
+        return "/nonexistent/packed.wav", "edge", "zh-CN-XiaoxiaoNeural"
+
+    async def audio_duration(path):
+        return 1.0
+
+    agent._synthesize_speech = synthesize_speech
+    agent._get_audio_duration = audio_duration
+
+    segments = [{"text": f"第{i}句解说。"} for i in range(4)]
+    results = asyncio.run(agent.synthesize_narration(segments, pack=True))
+
+    assert len(requests) == 5
+    assert all(r["status"] == "success" and "packed_with" not in r for r in results)
+    assert agent._render_text("edge", tts_module.PACK_SEPARATOR.join(["甲", "乙。"])) == "甲。\n乙。"
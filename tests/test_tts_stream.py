@@ -0,0 +1,126 @@
+"""
+Tests for streaming speech synthesis
+"""
+
+import asyncio
+import sys
+import wave
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+SAMPLE_RATE = 16000
+
+
+def make_agent(tmp_path, monkeypatch, services):
+    import agents.cloud_tts_agent as tts_module
+    from utils.speech_rate import SpeechRateModel
+    from utils.tts_cache import TTSAudioCache
+
+    cache = TTSAudioCache(str(tmp_path / "tts"), max_bytes=10 * 1024 * 1024)
+    monkeypatch.setattr(tts_module.settings, "get_available_tts_services", lambda: services)
+    monkeypatch.setattr(tts_module, "get_tts_cache", lambda: cache)
+    monkeypatch.setattr(tts_module, "get_speech_rate_model", lambda: SpeechRateModel())
+
+    agent = tts_module.CloudTTSAgent()
+    agent.temp_dir = tmp_path
+    return agent, cache
+
+
+async def collect(stream):
+    return b"".join([chunk async for chunk in stream.chunks])
+
+
+def test_sentence_stream_starts_after_first_sentence_and_fills_cache(tmp_path, monkeypatch):
+    """Non-streaming providers are pipelined per sentence; the full audio lands in the cache"""
+    from utils.tts_cache import tts_cache_key
+
+    agent, cache = make_agent(tmp_path, monkeypatch, ["Edge-TTS", "腾讯TTS"])
+    requests = []
+    events = []
+
+    async def edge_fails(*args):
+        raise ConnectionError("edge unavailable")
+        yield b""
+
+    async def synthesize_with_tencent(text, voice, speed, volume):
+        requests.append(text)
+        number = len(requests)
+        events.append(("start", number))
+        await asyncio.sleep(0.05)
+        events.append(("end", number))
+        path = tmp_path / f"sentence_{number}.wav"
+        with wave.open(str(path), "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(2)
+            wav.setframerate(SAMPLE_RATE)
+            wav.writeframes(np.full(int(0.05 * len(text) * SAMPLE_RATE), number, dtype="<i2").tobytes())
+        return str(path)
+
+    agent._stream_with_edge = edge_fails
+    agent._synthesize_with_tencent = synthesize_with_tencent
+
+    text = "主角回到了家乡。雨停了！镜头慢慢推进到老屋门前"
+
+    async def run():
+        stream = await agent.open_speech_stream(text)
+        events.append("first_chunk")
+        # 模拟播放首块，之后才读取下一块
+        await asyncio.sleep(0.01)
+        events.append("next_requested")
+        return stream, await collect(stream)
+
+    stream, data = asyncio.run(run())
+
+    assert requests == ["主角回到了家乡。", "雨停了！", "镜头慢慢推进到老屋门前"]
+    assert (stream.service, stream.media_type, stream.cached) == ("tencent", "audio/wav", False)
+    # 首块只等首句，不等其余句子合成完
+    assert events.index(("end", 1)) < events.index("first_chunk") < events.index(("end", 2))
+    # 播放首块期间下一句已开始合成，而不是等读取下一块时才开始
+    assert events.index(("start", 2)) < events.index("next_requested")
+    assert stream.first_chunk_latency > 0
+    pcm = np.frombuffer(data[44:], dtype="<i2")
+    assert len(pcm) == int(0.05 * 8 * SAMPLE_RATE) + int(0.05 * 4 * SAMPLE_RATE) + int(0.05 * 11 * SAMPLE_RATE)
+    assert list(np.unique(pcm)) == [1, 2, 3]
+    assert not list(tmp_path.glob("sentence_*.wav"))
+
+    # 缓存副本的 WAV 头已改为实际大小，再次请求直接分块返回缓存文件
+    async def run_cached():
+        stream = await agent.open_speech_stream(text)
+        return stream, await collect(stream)
+
+    cached, cached_data = asyncio.run(run_cached())
+    assert cached.cached and cached.service == "tencent"
+    assert cached_data[44:] == data[44:]
+    with wave.open(cache.get(tts_cache_key(text, "tencent", "101001", 1.0, 1.0, 1.0, SAMPLE_RATE)), "rb") as wav:
+        assert wav.getnframes() == len(pcm)
+    assert len(requests) == 3
+    # 命中缓存时流式读取的是临时副本，读完即删除
+    assert not list(tmp_path.glob("cached_*"))
+    assert set(agent.stream_stats()) == {"tencent", "cache"}
+
+
+def test_interrupted_stream_is_not_cached(tmp_path, monkeypatch):
+    """A client that stops reading mid-stream leaves no partial audio in the cache"""
+    agent, cache = make_agent(tmp_path, monkeypatch, ["Edge-TTS"])
+
+    async def stream_with_edge(text, voice, rate, pitch, volume):
+        for i in range(5):
+            yield bytes([i]) * 100
+
+    agent._stream_with_edge = stream_with_edge
+
+    async def run():
+        stream = await agent.open_speech_stream("镜头慢慢推进。")
+        first = await stream.chunks.__anext__()
+        await stream.chunks.aclose()
+        return stream, first
+
+    stream, first = asyncio.run(run())
+
+    assert stream.media_type == "audio/mpeg" and first == b"\0" * 100
+    assert cache.stats()["entries"] == 0
+    assert not list(tmp_path.glob("edge_stream_*"))
@@ -0,0 +1,50 @@
+"""
+Tests for the cached video probe
+"""
+
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import cv2
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_probe_is_cached_until_file_changes(tmp_path):
+    """Repeated probes hit the cache; rewriting the file invalidates the entry"""
+    from utils.video_probe import VideoProbeCache
+
+    video_path = str(tmp_path / "clip.avi")
+    writer = cv2.VideoWriter(video_path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (64, 48))
+    for _ in range(20):
+        writer.write(np.zeros((48, 64, 3), dtype=np.uint8))
+    writer.release()
+
+    cache = VideoProbeCache(max_entries=4)
+    probe = cache.get(video_path, with_keyframes=False)
+    assert (probe.fps, probe.frame_count, probe.resolution) == (10, 20, (64, 48))
+    assert probe.duration == 2.0
+    assert cache.get(video_path, with_keyframes=False) is probe
+
+    stat = os.stat(video_path)
+    os.utime(video_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+    assert cache.get(video_path, with_keyframes=False) is not probe
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_keyframe_index_from_packet_flags(monkeypatch):
+    """Keyframe packet timestamps become frame indices relative to the first keyframe"""
+    from utils import video_probe
+
+    output = "0.040000,K_\n0.080000,__\n2.040000,K_\nN/A,K_\n4.040000,K_\n"
+    monkeypatch.setattr(video_probe.shutil, "which", lambda name: "/usr/bin/" + name)
+    monkeypatch.setattr(
+        video_probe.subprocess, "run",
+        lambda *args, **kwargs: subprocess.CompletedProcess(args, 0, stdout=output, stderr="")
+    )
+
+    assert video_probe._probe_keyframes("clip.mp4", 25.0) == [0, 50, 100]
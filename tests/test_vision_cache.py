@@ -0,0 +1,87 @@
+"""
+Tests for the persistent vision result cache
+"""
+
+import sys
+from pathlib import Path
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def test_hit_miss_and_persistence(tmp_path):
+    """Results survive reopening the database; counters track lookups"""
+    from utils.vision_cache import VisionResultCache
+
+    db = tmp_path / "vision.db"
+    cache = VisionResultCache(str(db), max_bytes=1024 * 1024)
+    result = {"objects": [], "scene_description": "一只猫", "confidence": 0.8}
+
+    assert cache.get("abc", "qwen_vl", "qwen-vl-plus", "v1") is None
+    cache.put("abc", "qwen_vl", "qwen-vl-plus", "v1", result)
+    cache.close()
+
+    cache = VisionResultCache(str(db), max_bytes=1024 * 1024)
+    assert cache.get("abc", "qwen_vl", "qwen-vl-plus", "v1") == result
+    assert cache.get("abc", "qwen_vl", "qwen-vl-plus", "v2") is None
+
+    stats = cache.stats()
+    assert stats["entries"] == 1
+    assert (stats["hits"], stats["misses"]) == (1, 1)
+
+
+def test_lru_eviction(tmp_path):
+    """The least recently used entry is evicted once the byte budget is exceeded"""
+    from utils.vision_cache import VisionResultCache
+
+    cache = VisionResultCache(str(tmp_path / "vision.db"), max_bytes=250)
+    result = {"scene_description": "x" * 80}
+
+    cache.put("a", "baidu_vision", "m", "v1", result)
+    cache.put("b", "baidu_vision", "m", "v1", result)
+    cache.get("a", "baidu_vision", "m", "v1")
+    cache.put("c", "baidu_vision", "m", "v1", result)
+
+    assert cache.get("a", "baidu_vision", "m", "v1") is not None
+    assert cache.get("b", "baidu_vision", "m", "v1") is None
+    assert cache.get("c", "baidu_vision", "m", "v1") is not None
+    assert cache.stats()["size_bytes"] <= 250
+
+
+def test_agent_cache_access_stays_off_the_event_loop(tmp_path, monkeypatch):
+    """Lookups and writes from the analysis agent run in worker threads, not on the event loop"""
+    import asyncio
+    import threading
+
+    import numpy as np
+
+    import agents.cloud_video_analysis_agent as agent_module
+    from utils.frame_buffer import EncodedFrame
+    from utils.vision_cache import VisionResultCache
+
+    cache = VisionResultCache(str(tmp_path / "vision.db"), max_bytes=1024 * 1024)
+    threads = []
+    for name in ("get", "put"):
+        method = getattr(cache, name)
+
+        def record(*args, _method=method):
+            threads.append(threading.get_ident())
+            return _method(*args)
+
+        monkeypatch.setattr(cache, name, record)
+    monkeypatch.setattr(agent_module, "get_vision_cache", lambda: cache)
+
+    agent = agent_module.CloudVideoAnalysisAgent()
+    frame = EncodedFrame.from_array(np.full((20, 20, 3), 100, dtype=np.uint8), 1.0)
+    result = {"objects": [], "scene_description": "一只猫", "confidence": 0.8}
+
+    async def run():
+        loop_thread = threading.get_ident()
+        missed = await agent._get_cached_result(frame, "qwen_vl", "m", "v1")
+        await agent._cache_result(frame, "qwen_vl", "m", "v1", result)
+        return loop_thread, missed, await agent._get_cached_result(frame, "qwen_vl", "m", "v1")
+
+    loop_thread, missed, hit = asyncio.run(run())
+
+    assert missed is None and hit == result
+    assert len(threads) == 3 and loop_thread not in threads
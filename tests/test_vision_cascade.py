@@ -0,0 +1,62 @@
+"""
+Tests for the cost-aware vision cascade
+"""
+
+import asyncio
+import sys
+from pathlib import Path
+
+import numpy as np
+
+# Add src to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent / "src"))
+
+
+def _scene(seed, noise=0):
+    rng = np.random.default_rng(seed)
+    image = np.kron(rng.integers(0, 255, (9, 16, 3), dtype=np.uint8), np.ones((20, 20, 1), dtype=np.uint8))
+    if noise:
+        jitter = np.random.default_rng(seed + 100).integers(0, noise, image.shape)
+        image = np.clip(image.astype(int) + jitter, 0, 255).astype(np.uint8)
+    return image
+
+
+def test_only_novel_frames_escalate():
+    """Similar frames inherit the last description; a new scene or object set escalates"""
+    from agents.cloud_video_analysis_agent import CloudVideoAnalysisAgent, settings
+    from utils.frame_buffer import EncodedFrame
+
+    agent = CloudVideoAnalysisAgent()
+    described = []
+    objects = {0.0: ["猫"], 1.0: ["猫"], 2.0: ["狗"], 3.0: ["狗"]}
+
+    async def baidu(frame):
+        names = objects[frame.timestamp]
+        return {"objects": [{"name": n, "confidence": 0.9} for n in names], "scene_description": "", "confidence": 0.9}
+
+    async def describe(frames):
+        described.extend(frame.timestamp for frame in frames)
+        return [{"objects": [], "scene_description": f"描述{f.timestamp}", "confidence": 0.8} for f in frames]
+
+    agent._analyze_image_with_baidu = baidu
+    agent._describe_frames = describe
+
+    # 0/1 同一画面，2 画面相近但物体变化，3 是新画面
+    images = [_scene(1), _scene(1, noise=8), _scene(1, noise=4), _scene(2)]
+    frames = [{"frame": EncodedFrame.from_array(image, float(t))} for t, image in enumerate(images)]
+
+    saved = (settings.vision_cascade_mode, settings.enable_frame_dedup, settings.BAIDU_API_KEY)
+    settings.vision_cascade_mode, settings.enable_frame_dedup, settings.BAIDU_API_KEY = True, False, "key"
+    try:
+        results = asyncio.run(agent._analyze_frames(frames))
+        stats = agent._get_cascade_stats(results)
+    finally:
+        settings.vision_cascade_mode, settings.enable_frame_dedup, settings.BAIDU_API_KEY = saved
+
+    assert sorted(described) == [0.0, 2.0, 3.0]
+    assert results[1]["escalated"] is False
+    assert results[1]["description_from"] == 0.0
+    assert results[1]["scene_description"] == "描述0.0"
+    assert stats["enabled"] is True
+    assert (stats["frames_screened"], stats["frames_escalated"], stats["vlm_calls_saved"]) == (4, 3, 1)
+    assert agent._get_cascade_stats(results) == {"enabled": False}